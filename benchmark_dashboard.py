@@ -0,0 +1,393 @@
+"""
+IMDB Movies Dashboard - Benchmark Suite
+=======================================
+Measures the server-side cost of the dashboard callbacks across dataset scales,
+without a browser.
+
+For every scale a synthetic catalog with the same columns as imdb_top_1000.csv
+is generated, and a fresh Python process loads the dashboard on it (so startup
+time and peak memory are measured per scale). The worker then replays a mix of
+filter states (reset, single genres, decades, rating thresholds, multi-genre
+selections) through update_dashboard and every chart builder, with the caches
+emptied before each state so every call does the full computation.
+
+Usage:
+    python benchmark_dashboard.py --scales 1k,100k --output bench.json
+    python benchmark_dashboard.py --compare old.json new.json
+"""
+
+# ============================================================================
+# IMPORTS
+# ============================================================================
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# ============================================================================
+# SYNTHETIC CATALOGS
+# ============================================================================
+
+SCALES = {'1k': 1_000, '100k': 100_000, '1M': 1_000_000, '10M': 10_000_000}
+
+GENRES = ['Action', 'Adventure', 'Animation', 'Biography', 'Comedy', 'Crime', 'Drama',
+          'Family', 'Fantasy', 'Film-Noir', 'History', 'Horror', 'Music', 'Musical',
+          'Mystery', 'Romance', 'Sci-Fi', 'Sport', 'Thriller', 'War', 'Western']
+CERTIFICATES = ['U', 'A', 'UA', 'R', 'PG-13', 'PG', 'G', 'Passed', 'Approved', 'TV-14']
+
+# Rows written to the CSV at a time, so 10M rows never sit in memory as text
+GENERATE_CHUNK_ROWS = 500_000
+
+
+def _synthetic_chunk(rng, start, n_rows):
+    """
+    Build n_rows raw catalog rows in the imdb_top_1000.csv format.
+
+    Directors and stars are drawn from pools that grow with the catalog, so
+    groupby cardinality scales like a real catalog. About 1% of years are
+    unparseable and about 17% of gross/meta-score values are missing, like
+    the real file.
+    """
+    ids = np.arange(start, start + n_rows)
+    id_text = ids.astype(str).astype(object)
+    n_people = max(50, (start + n_rows) // 2)
+
+    years = rng.integers(1920, 2021, n_rows).astype(str).astype(object)
+    years[rng.random(n_rows) < 0.01] = 'PG'
+
+    genre_picks = rng.integers(0, len(GENRES), (n_rows, 3))
+    n_genres = rng.integers(1, 4, n_rows)
+    genre_text = np.array([', '.join(sorted({GENRES[g] for g in picks[:k]}))
+                           for picks, k in zip(genre_picks, n_genres)], dtype=object)
+
+    gross = rng.lognormal(16, 2, n_rows).astype(np.int64)
+    gross_text = np.array([f'{value:,}' for value in gross], dtype=object)
+    gross_text[rng.random(n_rows) < 0.17] = None
+
+    meta_score = rng.integers(30, 101, n_rows).astype(float)
+    meta_score[rng.random(n_rows) < 0.16] = np.nan
+
+    def people(prefix):
+        return prefix + rng.integers(0, n_people, n_rows).astype(str).astype(object)
+
+    return pd.DataFrame({
+        'Poster_Link': 'https://example.com/posters/' + id_text + '.jpg',
+        'Series_Title': 'Movie ' + id_text,
+        'Released_Year': years,
+        'Certificate': rng.choice(CERTIFICATES, n_rows),
+        'Runtime': rng.integers(60, 240, n_rows).astype(str).astype(object) + ' min',
+        'Genre': genre_text,
+        'IMDB_Rating': np.round(np.clip(rng.normal(7.9, 0.3, n_rows), 7.6, 9.3), 1),
+        'Overview': 'A synthetic film number ' + id_text + ' about people, places and events.',
+        'Meta_score': meta_score,
+        'Director': people('Director '),
+        'Star1': people('Actor '),
+        'Star2': people('Actor '),
+        'Star3': people('Actor '),
+        'Star4': people('Actor '),
+        'No_of_Votes': rng.lognormal(11.5, 1.2, n_rows).astype(np.int64) + 25_000,
+        'Gross': gross_text,
+    })
+
+
+def generate_catalog(path, n_rows, seed=0):
+    """Write a synthetic catalog of n_rows movies to path (skipped if it already exists)."""
+    if os.path.exists(path):
+        return path
+    rng = np.random.default_rng(seed)
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    for start in range(0, n_rows, GENERATE_CHUNK_ROWS):
+        chunk = _synthetic_chunk(rng, start, min(GENERATE_CHUNK_ROWS, n_rows - start))
+        chunk.to_csv(tmp_path, mode='a', header=start == 0, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+# ============================================================================
+# WORKLOAD
+# ============================================================================
+
+def filter_workload(year_min, year_max):
+    """
+    A realistic mix of filter states as update_dashboard arguments.
+
+    Returns:
+        list: (name, (year_range, selected_genre, min_rating, genre_mode)) pairs
+    """
+    full_range = [year_min, year_max]
+    workload = [('reset', (full_range, [], 5, 'any'))]
+    for genre in ['Drama', 'Comedy', 'Action', 'Sci-Fi']:
+        workload.append((f'genre:{genre}', (full_range, genre, 5, 'any')))
+    for decade in [1950, 1980, 1990, 2000, 2010]:
+        workload.append((f'decade:{decade}s', ([decade, decade + 9], [], 5, 'any')))
+    for rating in [7.5, 8.0, 8.45, 8.8]:
+        workload.append((f'rating>={rating}', (full_range, [], rating, 'any')))
+    workload.append(('drama-1990s-8.0', ([1990, 1999], 'Drama', 8.0, 'any')))
+    workload.append(('crime|thriller', (full_range, ['Crime', 'Thriller'], 5, 'any')))
+    workload.append(('crime&drama-7.9', (full_range, ['Crime', 'Drama'], 7.9, 'all')))
+    return workload
+
+
+def search_workload(year_min, year_max):
+    """
+    Search box queries over the synthetic catalogs, alone and combined with filters.
+
+    Returns:
+        list: (name, (year_range, selected_genre, min_rating, genre_mode), query) triples
+    """
+    full_range = [year_min, year_max]
+    return [
+        ('common-word', (full_range, [], 5, 'any'), 'synthetic'),
+        ('rare-word', (full_range, [], 5, 'any'), 'number 4242'),
+        ('director', (full_range, [], 5, 'any'), 'director:"Director 7"'),
+        ('star', (full_range, [], 5, 'any'), 'star:"Actor 42"'),
+        ('words+drama-1990s-8.0', ([1990, 1999], 'Drama', 8.0, 'any'), 'film people'),
+    ]
+
+# ============================================================================
+# WORKER (runs inside a fresh process per scale)
+# ============================================================================
+
+def _percentiles(samples):
+    samples = np.asarray(samples) * 1000
+    return {'p50_ms': round(float(np.percentile(samples, 50)), 3),
+            'p95_ms': round(float(np.percentile(samples, 95)), 3),
+            'max_ms': round(float(samples.max()), 3)}
+
+
+# Data source queries timed per backend, with the arguments they take besides the filter state
+SOURCE_QUERIES = {
+    'rows': (),
+    'totals': (),
+    'yearly': (),
+    'genre_counts': (),
+    'director_totals': (),
+    'top_votes': (30,),
+}
+
+
+def run_worker(rounds, figure_pools=(), data_sources=()):
+    """
+    Import the dashboard on the dataset named by DASHBOARD_DATA_FILE and time every stage.
+
+    Response sizes are those of the full figure JSON, plus '<graph id>:patch'
+    for the graphs whose callbacks only send a Patch of the trace data.
+
+    For every figure pool mode, the time to build all seven figures of a
+    filter state on that pool is recorded as 'all_figures:<mode>'.
+
+    Search queries are timed as 'search:<name>', with the rows of the
+    other filters already cached as they are after the first request.
+
+    For every data source backend, the time to build it (or to open its
+    database when an earlier run left it in the cache) is recorded as
+    'source_build:<backend>' and each of its queries over the same filter
+    workload as 'source:<backend>:<query>'.
+
+    The approximate view is disabled for the stages above, so they time the
+    exact path. Drawing the stratified sample is timed as 'sample_build' and
+    its metric estimates over the filter workload as 'approximate:metrics'.
+
+    Returns:
+        dict: Startup time, peak RSS, and per-stage latency percentiles and response sizes
+    """
+    started = time.perf_counter()
+    import movie_dashboard as dashboard
+    import plotly.io as pio
+    startup_s = time.perf_counter() - started
+
+    workload = filter_workload(*dashboard.current_dataset().year_bounds)
+    timings = {'update_dashboard': []}
+    sizes = {}
+    for graph_id in dashboard.FIGURE_BUILDERS:
+        timings[f'build:{graph_id}'] = []
+        timings[f'serialize:{graph_id}'] = []
+        sizes[graph_id] = []
+    for graph_id in dashboard.PATCHED_GRAPHS:
+        sizes[f'{graph_id}:patch'] = []
+
+    for _ in range(rounds):
+        for _name, args in workload:
+            dashboard.clear_caches()
+            started = time.perf_counter()
+            result = dashboard.update_dashboard(args[0], args[1], args[2], 0, args[3])
+            timings['update_dashboard'].append(time.perf_counter() - started)
+            filter_state = result[0]
+
+            for graph_id, builder in dashboard.FIGURE_BUILDERS.items():
+                started = time.perf_counter()
+                fig = builder(filter_state)
+                timings[f'build:{graph_id}'].append(time.perf_counter() - started)
+                started = time.perf_counter()
+                payload = pio.to_json(fig, validate=False)
+                timings[f'serialize:{graph_id}'].append(time.perf_counter() - started)
+                sizes[graph_id].append(len(payload))
+
+            # What the browser actually receives for graphs updated with a Patch
+            for graph_id in dashboard.PATCHED_GRAPHS:
+                patch = dashboard.chart_patch(graph_id, dashboard.chart_figure(graph_id, filter_state))
+                sizes[f'{graph_id}:patch'].append(len(pio.json.to_json_plotly(patch.to_plotly_json())))
+
+    for name, args, query in search_workload(*dashboard.current_dataset().year_bounds):
+        samples = timings[f'search:{name}'] = []
+        for _ in range(rounds):
+            dashboard.clear_caches()
+            dashboard.filtered_rows(dashboard.make_filter_state(*args))
+            filter_state = dashboard.make_filter_state(*args, search=query)
+            started = time.perf_counter()
+            dashboard.filtered_rows(filter_state)
+            samples.append(time.perf_counter() - started)
+
+    for mode in figure_pools:
+        pool = dashboard.FigurePool(mode)
+        # Start the workers before timing
+        pool.build_all(dashboard.default_filter_state())
+        samples = timings[f'all_figures:{mode}'] = []
+        for _ in range(rounds):
+            for _name, args in workload:
+                dashboard.clear_caches()
+                filter_state = dashboard.make_filter_state(*args)
+                started = time.perf_counter()
+                pool.build_all(filter_state)
+                samples.append(time.perf_counter() - started)
+        pool.shutdown()
+
+    dataset = dashboard.current_dataset()
+    started = time.perf_counter()
+    sample = dashboard.StratifiedSample(dataset.frame)
+    timings['sample_build'] = [time.perf_counter() - started]
+    timings['approximate:metrics'] = []
+    for _ in range(rounds):
+        for _name, args in workload:
+            filter_state = dashboard.make_filter_state(*args, dataset=dataset)
+            started = time.perf_counter()
+            sample.metric_estimates(filter_state)
+            timings['approximate:metrics'].append(time.perf_counter() - started)
+
+    for name in data_sources:
+        started = time.perf_counter()
+        source = dashboard.make_data_source(name, dataset.frame, dashboard.DATA_FILE)
+        timings[f'source_build:{name}'] = [time.perf_counter() - started]
+        for query in SOURCE_QUERIES:
+            timings[f'source:{name}:{query}'] = []
+        for _ in range(rounds):
+            for _name, args in workload:
+                filter_state = dashboard.make_filter_state(*args, dataset=dataset)
+                for query, extra_args in SOURCE_QUERIES.items():
+                    started = time.perf_counter()
+                    getattr(source, query)(filter_state, *extra_args)
+                    timings[f'source:{name}:{query}'].append(time.perf_counter() - started)
+
+    return {
+        'rows': len(dashboard.current_dataset().frame),
+        'startup_s': round(startup_s, 3),
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        'peak_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                          * (1 if sys.platform == 'darwin' else 1024),
+        'stages': {stage: _percentiles(samples) for stage, samples in timings.items()},
+        'response_bytes': {graph_id: {'median': int(np.median(values)), 'max': int(max(values))}
+                           for graph_id, values in sizes.items()},
+    }
+
+# ============================================================================
+# DRIVER
+# ============================================================================
+
+def run_scale(scale, data_dir, rounds, figure_pools='', data_sources=''):
+    """Generate the catalog for one scale and benchmark it in a fresh process."""
+    csv_path = generate_catalog(os.path.join(data_dir, f'catalog_{scale}.csv'), SCALES[scale])
+    env = dict(os.environ,
+               DASHBOARD_DATA_FILE=csv_path,
+               DASHBOARD_CACHE_DIR=os.path.join(data_dir, 'cache'),
+               DASHBOARD_RELOAD_INTERVAL='0',
+               # update_dashboard is timed on the exact path; the sample is timed on its own
+               DASHBOARD_APPROXIMATE_MIN_ROWS='0')
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', '--rounds', str(rounds),
+         '--figure-pools', figure_pools, '--data-sources', data_sources],
+        env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(old_path, new_path):
+    """Print p50/p95 and response size changes between two benchmark JSON files."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    for scale, new_result in new['scales'].items():
+        old_result = old['scales'].get(scale)
+        if old_result is None:
+            continue
+        print(f"\n{scale} ({new_result['rows']:,} rows)")
+        print(f"  {'stage':<40}{'old p50':>10}{'new p50':>10}{'old p95':>10}{'new p95':>10}")
+        for stage, stats in new_result['stages'].items():
+            before = old_result['stages'].get(stage)
+            if before is None:
+                continue
+            print(f"  {stage:<40}{before['p50_ms']:>10.2f}{stats['p50_ms']:>10.2f}"
+                  f"{before['p95_ms']:>10.2f}{stats['p95_ms']:>10.2f}")
+        for graph_id, size in new_result['response_bytes'].items():
+            before = old_result['response_bytes'].get(graph_id)
+            if before is not None:
+                print(f"  {graph_id + ' bytes':<40}{before['median']:>10,}{size['median']:>10,}")
+        print(f"  peak RSS: {old_result['peak_rss_bytes'] / 2**20:.0f} MB -> "
+              f"{new_result['peak_rss_bytes'] / 2**20:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the IMDB dashboard callbacks")
+    parser.add_argument('--scales', default=','.join(SCALES),
+                        help="comma-separated scales to run (default: %(default)s)")
+    parser.add_argument('--rounds', type=int, default=3,
+                        help="times the filter workload is replayed per scale")
+    parser.add_argument('--figure-pools', default='serial,thread,process',
+                        help="figure pool modes to compare, or '' to skip (default: %(default)s)")
+    parser.add_argument('--data-sources', default='pandas,sqlite',
+                        help="data source backends to compare, or '' to skip (default: %(default)s)")
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'imdb_dash_bench'),
+                        help="where synthetic catalogs are generated and kept between runs")
+    parser.add_argument('--output', help="write the JSON results to this file")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help="compare two JSON result files and exit")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.rounds, [mode for mode in args.figure_pools.split(',') if mode],
+                                    [name for name in args.data_sources.split(',') if name])))
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    results = {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'rounds': args.rounds,
+        'scales': {},
+    }
+    for scale in args.scales.split(','):
+        print(f"Benchmarking {scale} rows...", file=sys.stderr)
+        results['scales'][scale] = run_scale(scale, args.data_dir, args.rounds, args.figure_pools,
+                                             args.data_sources)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -17,733 +17,5240 @@ This dashboard allows users to:
 # ============================================================================
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
 import plotly.express as px
-from plotly.subplots import make_subplots
+import plotly.io as pio
 import dash
-from dash import dcc, html, Input, Output, State
+from dash import dcc, html, Input, Output, State, Patch
+from dash.exceptions import MissingCallbackContextException, PreventUpdate
+import flask
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+import abc
+import bisect
+import cProfile
+import glob
+import hashlib
+import heapq
+import io
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import queue
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    import duckdb
+except ImportError:
+    # Only needed for DASHBOARD_DATA_SOURCE=duckdb
+    duckdb = None
+
+try:
+    import redis
+except ImportError:
+    # Only needed for DASHBOARD_RESULT_STORE=redis
+    redis = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    # Only needed for the Arrow format of the export API
+    pyarrow = None
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows; the disk result store then only coalesces within a process
+    fcntl = None
+
 # ============================================================================
 # DATA LOADING AND PREPROCESSING
 # ============================================================================
 
-def load_and_preprocess_data():
+# Source dataset (can be pointed at another export with the same columns)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = os.environ.get('DASHBOARD_DATA_FILE', os.path.join(BASE_DIR, 'imdb_top_1000.csv'))
+
+# Preprocessed on-disk copy of the dataset, one .npy file per column
+DATASET_CACHE_DIR = os.environ.get('DASHBOARD_CACHE_DIR', os.path.join(BASE_DIR, '.dataset_cache'))
+USE_DATASET_CACHE = os.environ.get('DASHBOARD_DATASET_CACHE', '1') != '0'
+DATASET_CACHE_FORMAT = 4
+
+# Rows per chunk when streaming the CSV
+INGEST_CHUNK_ROWS = int(os.environ.get('DASHBOARD_INGEST_CHUNK_ROWS', '200000'))
+
+# Wide free-text columns kept out of the in-memory table (see TEXT SIDE STORE)
+TEXT_FIELDS = ['Overview', 'Poster_Link']
+
+# Raw columns dropped after cleaning (Runtime_Minutes replaces Runtime)
+DROPPED_COLUMNS = ['Runtime']
+
+# Raw columns always read as text, so type inference cannot differ between chunks
+# (e.g. a chunk whose only title is "1917")
+RAW_TEXT_COLUMNS = ['Poster_Link', 'Series_Title', 'Released_Year', 'Certificate', 'Runtime',
+                    'Genre', 'Overview', 'Director', 'Star1', 'Star2', 'Star3', 'Star4', 'Gross']
+
+# Genres are stored as bits of an int64 column, so the vocabulary is capped
+MAX_GENRES = 63
+
+# Compact in-memory schema applied while preprocessing (see compact_chunk).
+# Low-cardinality text columns become categoricals, and numbers get the
+# narrowest type that holds them. Genre_Mask is narrowed to int32 when there
+# are at most 31 genres.
+COMPACT_SCHEMA = {
+    'Released_Year': 'int16',
+    'Runtime_Minutes': 'int16',
+    'Decade': 'int16',
+    'No_of_Votes': 'int32',
+    'IMDB_Rating': 'float32',
+    'Meta_score': 'float32',
+    'Certificate': 'category',
+    'Genre': 'category',
+    'Director': 'category',
+    'Star1': 'category',
+    'Star2': 'category',
+    'Star3': 'category',
+    'Star4': 'category',
+}
+
+
+def dataset_version(path):
+    """
+    Identify the current contents of a dataset file by modification time and size.
+
+    Cached results computed from one version are never served for another.
+    """
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def file_sha256(path):
+    """SHA-256 of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_fingerprint(path):
+    """Modification time, size and SHA-256 of a dataset file, stored with derived files."""
+    stat = os.stat(path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': file_sha256(path)}
+
+
+def _source_matches(fingerprint, path):
+    """Whether files derived from a source fingerprint are valid for the current file."""
+    stat = os.stat(path)
+    if fingerprint['mtime_ns'] == stat.st_mtime_ns and fingerprint['size'] == stat.st_size:
+        return True
+    # Touched but possibly unchanged (e.g. copied during a deploy): compare contents
+    return fingerprint['size'] == stat.st_size and fingerprint['sha256'] == file_sha256(path)
+
+
+# ----------------------------------------------------------------------------
+# Preprocessing pipeline
+# ----------------------------------------------------------------------------
+# Cleaning is a list of declared steps. CHUNK_STEPS run on each chunk of the
+# raw CSV as it is streamed, so their memory is bounded by the chunk size;
+# FILE_STEPS run once on the concatenated table and need whole-file
+# statistics. Each step is a function (frame, run) -> None that writes the
+# columns it declares. The run records every step's time and the peak size of
+# the columns it wrote, and counts data-quality issues while the values are
+# parsed, so the report needs no second pass over the data.
+
+# Anchored patterns: anything else is counted as unparseable instead of being
+# half-parsed (e.g. "2h 22min" is not 2 minutes)
+RUNTIME_PATTERN = r'^\s*(\d+)\s*(?:min)?\s*$'
+GROSS_NOISE_PATTERN = r'[,$\s]'
+
+# Data-quality counters of the report and how each issue is handled
+QUALITY_ISSUES = {
+    'coerced_years': "Released_Year is not a number (filled with the median year)",
+    'missing_years': "Released_Year is empty (filled with the median year)",
+    'unparseable_gross': "Gross is not a number (counted as 0)",
+    'missing_gross': "Gross is empty (counted as 0)",
+    'imputed_meta_scores': "Meta_score is empty or not a number (filled with the mean score)",
+}
+
+
+class PreprocessRun:
+    """
+    State and report of one run of the preprocessing pipeline.
+
+    Attributes:
+        genre_positions (dict): Genre -> bit, in first-seen order across chunks
+        vocabularies (dict): Categorical COMPACT_SCHEMA column -> Index of its
+            values, in first-seen order across chunks (see compact_chunk)
+        issues (dict): QUALITY_ISSUES name -> number of rows
+        steps (dict): Step name -> {'seconds': total time, 'peak_bytes': largest
+            output of one call}
+    """
+
+    def __init__(self):
+        self.genre_positions = {}
+        self.vocabularies = {}
+        self.rows = 0
+        self.issues = dict.fromkeys(QUALITY_ISSUES, 0)
+        self.steps = {}
+
+    def count(self, issue, mask):
+        """Add the rows flagged by a boolean mask to an issue counter."""
+        self.issues[issue] += int(np.count_nonzero(mask))
+
+    def apply(self, steps, frame):
+        """Run pipeline steps on a frame in place, recording their cost."""
+        for name, step, columns in steps:
+            started = time.perf_counter()
+            step(frame, self)
+            self.record(name, time.perf_counter() - started,
+                        int(frame[columns].memory_usage(index=False, deep=True).sum()))
+
+    def record(self, name, seconds, output_bytes=0):
+        """Add one call of a step to its totals."""
+        totals = self.steps.setdefault(name, {'seconds': 0.0, 'peak_bytes': 0})
+        totals['seconds'] += seconds
+        totals['peak_bytes'] = max(totals['peak_bytes'], output_bytes)
+
+    def report(self):
+        """The data-quality report as a JSON-serializable dict."""
+        return {'rows': self.rows, 'issues': dict(self.issues),
+                'steps': {name: dict(totals) for name, totals in self.steps.items()}}
+
+
+def _parse_year(chunk, run):
+    """Released_Year to numbers; non-numeric years become NaN."""
+    # errors='coerce' նշանակում է՝ եթե տվյալը չի կարող փոխակերպվել թվային արժեքի, ապա այն կվերածվի NaN:
+    raw = chunk['Released_Year']
+    years = pd.to_numeric(raw, errors='coerce')
+    run.count('missing_years', raw.isna())
+    run.count('coerced_years', raw.notna() & years.isna())
+    chunk['Released_Year'] = years
+
+
+def _parse_runtime(chunk, run):
+    """Runtime_Minutes from "142 min" runtimes."""
+    # այստեղ ֆիլմի րոպեները ևս թվային արժեքի ենք վերափոխում , որպեսզի հետագայում վիզուալիզացիայում օգտագործենք։
+    minutes = pd.to_numeric(chunk['Runtime'].str.extract(RUNTIME_PATTERN, expand=False))
+    if minutes.isna().any():
+        bad = chunk['Runtime'][minutes.isna()]
+        raise ValueError(f"{len(bad)} runtimes could not be parsed, e.g. {bad.iloc[0]!r}")
+    chunk['Runtime_Minutes'] = minutes.astype(int)
+
+
+def _parse_gross(chunk, run):
+    """Gross revenue from comma-separated text ("28,341,469")."""
+    raw = chunk['Gross']
+    gross = pd.to_numeric(raw.str.replace(GROSS_NOISE_PATTERN, '', regex=True), errors='coerce')
+    run.count('missing_gross', raw.isna())
+    run.count('unparseable_gross', raw.notna() & gross.isna())
+    # Missing revenue counts as 0
+    chunk['Gross'] = gross.fillna(0)
+
+
+def _encode_genres(chunk, run):
+    """Genre_Mask: one bit per genre, assigned in run.genre_positions."""
+    # Each distinct genre string ("Action, Crime, Drama") is split once and its
+    # bitmask is broadcast to the rows through the factorized codes
+    # այստեղ յուրաքանչյուր ժանրին տալիս ենք մեկ բիթ, որպեսզի ֆիլտրելիս օգտագործենք բիթային գործողություններ։
+    codes, combinations = pd.factorize(chunk['Genre'])
+    combination_masks = np.zeros(len(combinations) + 1, dtype=np.int64)
+    for i, combination in enumerate(combinations):
+        for genre in filter(None, combination.split(', ')):
+            position = run.genre_positions.setdefault(genre, len(run.genre_positions))
+            if position >= MAX_GENRES:
+                raise ValueError(f"Genre bitmask supports at most {MAX_GENRES} genres, "
+                                 f"found {len(run.genre_positions)}")
+            combination_masks[i] |= 1 << position
+    # Code -1 (no genre) picks the trailing empty mask
+    chunk['Genre_Mask'] = combination_masks[codes]
+
+
+def _parse_meta_score(chunk, run):
+    """Meta_score to numbers (NaN is filled with the mean score by a file step)."""
+    # մետա սկորը դա ֆիլմի որակի լրացուցիչ գնահատական է։ այստեղ այն նույնպես թվային արժեքի ենք վերափոխում։
+    scores = pd.to_numeric(chunk['Meta_score'], errors='coerce')
+    run.count('imputed_meta_scores', scores.isna())
+    chunk['Meta_score'] = scores
+
+
+def _rating_category(chunk, run):
+    """Rating_Category bins of IMDB_Rating (4 bins = 3 labels)."""
+    # այստեղ ստեղծում ենք ֆիլմերի գնահատականների կատեգորիաներ՝ ըստ IMDB գնահատականի։
+    chunk['Rating_Category'] = pd.cut(chunk['IMDB_Rating'],
+                                      bins=[0, 7, 8, 9, 10.1],
+                                      labels=['Low (<7)', 'Good (7-8)', 'Very Good (8-9)',
+                                              'Excellent (9+)'])
+
+
+def _revenue_per_vote(chunk, run):
+    """Revenue_Per_Vote (proxy for financial impact); missing revenue is already 0."""
+    # այսինքն՝ որքան գումար է բերել ֆիլմը յուրաքանչյուր քվեի դիմաց։
+    chunk['Revenue_Per_Vote'] = (chunk['Gross'] / chunk['No_of_Votes']).fillna(0)
+
+
+def _impute_year(frame, run):
+    """Fill missing years with the median year of the whole file."""
+    years = frame['Released_Year']
+    frame['Released_Year'] = years.fillna(years.median()).astype(int)
+
+
+def _impute_meta_score(frame, run):
+    """Fill missing meta scores with the mean score of the whole file."""
+    # այստեղ լրացնում ենք բաց թողնված արժեքները՝ մետա սկորը՝ միջին արժեքով։
+    scores = frame['Meta_score']
+    # Averaged in float64 also when the chunks were compacted to float32
+    frame['Meta_score'] = scores.fillna(scores.astype(np.float64).mean())
+
+
+def _decade(frame, run):
+    """Numerical decade column for analysis."""
+    frame['Decade'] = (frame['Released_Year'] // 10 * 10).astype(int)
+
+
+def _sort_genre_bits(frame, run):
+    """Renumber genre bits so that bit i is the i-th genre in alphabetical order."""
+    first_seen_masks = frame['Genre_Mask'].to_numpy()
+    genre_masks = np.zeros_like(first_seen_masks)
+    for new_position, genre in enumerate(sorted(run.genre_positions)):
+        genre_masks |= ((first_seen_masks >> run.genre_positions[genre]) & 1) << new_position
+    frame['Genre_Mask'] = genre_masks
+
+
+# (name, step, columns it writes)
+CHUNK_STEPS = [
+    ('parse_year', _parse_year, ['Released_Year']),
+    ('parse_runtime', _parse_runtime, ['Runtime_Minutes']),
+    ('parse_gross', _parse_gross, ['Gross']),
+    ('encode_genres', _encode_genres, ['Genre_Mask']),
+    ('parse_meta_score', _parse_meta_score, ['Meta_score']),
+    ('rating_category', _rating_category, ['Rating_Category']),
+    ('revenue_per_vote', _revenue_per_vote, ['Revenue_Per_Vote']),
+]
+
+FILE_STEPS = [
+    ('impute_year', _impute_year, ['Released_Year']),
+    ('impute_meta_score', _impute_meta_score, ['Meta_score']),
+    ('decade', _decade, ['Decade']),
+    ('sort_genre_bits', _sort_genre_bits, ['Genre_Mask']),
+]
+
+
+def format_quality_report(report):
+    """Plain-text rendering of a PreprocessRun.report() dict."""
+    lines = [f"{report['rows']:,} movies"]
+    for issue, description in QUALITY_ISSUES.items():
+        lines.append(f"  {report['issues'].get(issue, 0):>10,}  {description}")
+    lines.append("Preprocessing steps (total seconds, peak output bytes per call):")
+    for name, totals in report['steps'].items():
+        lines.append(f"  {name:<20} {totals['seconds']:>9.3f}s {totals['peak_bytes']:>14,}")
+    return '\n'.join(lines)
+
+
+def compact_chunk(chunk, run):
+    """
+    Convert a cleaned chunk to compact types as it is read.
+
+    Numbers are narrowed to COMPACT_SCHEMA (Released_Year to float32 until
+    its missing years are filled), and categorical columns become int32 codes
+    into run.vocabularies, which grow across chunks.
+    """
+    for column, dtype in COMPACT_SCHEMA.items():
+        if column not in chunk.columns:
+            continue
+        if dtype != 'category':
+            chunk[column] = chunk[column].astype(np.float32 if column == 'Released_Year' else dtype)
+            continue
+        # Each distinct value is looked up once, as in _encode_genres
+        codes, values = pd.factorize(chunk[column])
+        vocabulary = run.vocabularies.get(column, pd.Index([], dtype=object))
+        value_codes = np.append(vocabulary.get_indexer(values), -1).astype(np.int32)
+        new = value_codes[:-1] < 0
+        if new.any():
+            value_codes[:-1][new] = np.arange(len(vocabulary), len(vocabulary) + np.count_nonzero(new))
+            vocabulary = vocabulary.append(pd.Index(values[new], dtype=object))
+        run.vocabularies[column] = vocabulary
+        # Code -1 (missing value) picks the trailing -1
+        chunk[column] = value_codes[codes]
+
+
+def decode_categories(frame, run):
+    """Turn the codes written by compact_chunk into categoricals with sorted categories."""
+    for column, vocabulary in run.vocabularies.items():
+        categories = pd.Categorical.from_codes(frame[column].to_numpy(), categories=vocabulary)
+        # Same categories, in the same order, as .astype('category') on the text
+        frame[column] = categories.reorder_categories(vocabulary.sort_values())
+
+
+def apply_compact_schema(frame):
+    """
+    Convert a preprocessed frame to COMPACT_SCHEMA.
+
+    Returns:
+        DataFrame: A new frame with compact column types (attrs are kept)
+    """
+    compact = frame.astype({column: dtype for column, dtype in COMPACT_SCHEMA.items()
+                            if column in frame.columns})
+    if len(frame.attrs.get('all_genres', [])) <= 31:
+        compact['Genre_Mask'] = compact['Genre_Mask'].astype(np.int32)
+    compact.attrs = frame.attrs
+    return compact
+
+
+def widen_float32(values):
+    """
+    Widen float32 values to the float64 numbers they were parsed from.
+
+    float32 keeps about 7 significant digits, so rounding to that many digits
+    turns e.g. float32(8.1) back into 8.1 instead of 8.100000381469727 in
+    charts, hover labels and averages.
+    """
+    values = np.asarray(values)
+    if values.dtype != np.float32:
+        return values
+    widened = values.astype(np.float64)
+    largest = np.nanmax(np.abs(widened)) if len(widened) else 0
+    if not largest > 0:
+        return widened
+    return np.round(widened, max(0, 6 - int(np.floor(np.log10(largest)))))
+
+
+def memory_report(before, after):
+    """
+    Compare the memory used by each column of two versions of the movie table.
+
+    Returns:
+        DataFrame: Bytes before/after per column (deep, including string objects),
+        with a TOTAL row
+    """
+    before_bytes = before.memory_usage(index=False, deep=True)
+    after_bytes = after.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({'Before_Bytes': before_bytes, 'After_Bytes': after_bytes})
+    report.loc['TOTAL'] = report.sum()
+    report = report.fillna(0).astype(np.int64)
+    report['Ratio'] = (report['Before_Bytes'] / report['After_Bytes'].replace(0, np.nan)).round(2)
+    return report
+
+
+def load_and_preprocess_data(path=DATA_FILE, chunksize=INGEST_CHUNK_ROWS, compact=True):
+    """
+    Load the IMDB dataset and perform necessary data cleaning and preprocessing.
+    
+    The CSV is streamed in chunks of `chunksize` rows so a catalog larger than
+    memory never has to be held as raw text. The wide free-text columns
+    (TEXT_FIELDS) are spilled to the text side store as they are read, and
+    each chunk is cleaned by CHUNK_STEPS. With `compact`, each cleaned chunk
+    is then converted to compact types (compact_chunk) before it is kept, so
+    only the title stays as Python strings and the table is never held with
+    object columns. FILE_STEPS then fill missing values with statistics of
+    the whole file (median year, mean meta score), add the decade and sort
+    the genre bits.
+    
+    The data-quality report and the cost of every step are stored in
+    attrs['quality_report'] (see PreprocessRun.report()).
+    
+    Args:
+        path (str): CSV file to load
+        chunksize (int): Rows per chunk
+        compact (bool): Apply COMPACT_SCHEMA to the result
+    
+    Returns:
+        DataFrame: Cleaned and preprocessed movie data
+    """
+    
+    version = dataset_version(path)
+    text_writer = TextStoreWriter(text_store_path(path), TEXT_FIELDS)
+    run = PreprocessRun()
+    chunks = []
+    reader = pd.read_csv(path, chunksize=chunksize, dtype={column: str for column in RAW_TEXT_COLUMNS})
+    while True:
+        started = time.perf_counter()
+        chunk = next(reader, None)
+        if chunk is None:
+            break
+        run.record('read_csv', time.perf_counter() - started)
+        started = time.perf_counter()
+        text_writer.append(chunk)
+        run.record('spill_text', time.perf_counter() - started)
+        chunk = chunk.drop(columns=TEXT_FIELDS)
+        run.apply(CHUNK_STEPS, chunk)
+        chunk = chunk.drop(columns=DROPPED_COLUMNS)
+        if compact:
+            started = time.perf_counter()
+            compact_chunk(chunk, run)
+            run.record('compact', time.perf_counter() - started,
+                       int(chunk.memory_usage(index=False, deep=True).sum()))
+        chunks.append(chunk)
+        run.rows += len(chunk)
+    if not chunks:
+        raise ValueError(f"{path} contains no movies")
+    df = pd.concat(chunks, ignore_index=True)
+    del chunks
+    run.apply(FILE_STEPS, df)
+    decode_categories(df, run)
+    
+    df.attrs['all_genres'] = sorted(run.genre_positions)
+    df.attrs['version'] = version
+    df.attrs['text_store'] = text_writer.close(source_fingerprint(path))
+    df.attrs['quality_report'] = run.report()
+    
+    return apply_compact_schema(df) if compact else df
+
+# ============================================================================
+# TEXT SIDE STORE
+# ============================================================================
+
+# Overview and Poster_Link are by far the widest columns and no chart needs
+# them. Each field is written as one file of UTF-8 bytes plus an array of row
+# offsets; a movie's text is read (memory-mapped) only when its detail view
+# is shown. ստեղ պահում ենք երկար տեքստերը սկավառակի վրա, ոչ թե հիշողության մեջ։
+
+def text_store_path(source_path):
+    """Directory of the text side store for a dataset file."""
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(DATASET_CACHE_DIR, f"{name}.text")
+
+
+class TextStoreWriter:
+    """Streams text columns to a text store directory, chunk by chunk."""
+
+    def __init__(self, directory, fields):
+        try:
+            os.makedirs(os.path.dirname(directory), exist_ok=True)
+            self.tmp_directory = tempfile.mkdtemp(prefix=os.path.basename(directory) + '.tmp-',
+                                                  dir=os.path.dirname(directory))
+            self.directory = directory
+        except OSError:
+            # Read-only deployment: keep the store in a private temporary directory
+            self.tmp_directory = tempfile.mkdtemp(prefix='movie-text-')
+            self.directory = None
+        self.fields = fields
+        self.n_rows = 0
+        self._files = {field: open(os.path.join(self.tmp_directory, f"{field}.bin"), 'wb')
+                       for field in fields}
+        self._offsets = {field: [np.zeros(1, dtype=np.int64)] for field in fields}
+        self._sizes = {field: 0 for field in fields}
+
+    def append(self, chunk):
+        """Write the text fields of one chunk of raw rows."""
+        for field in self.fields:
+            encoded = [value.encode('utf-8') if isinstance(value, str) else b''
+                       for value in chunk[field]]
+            self._files[field].write(b''.join(encoded))
+            ends = np.cumsum([len(value) for value in encoded], dtype=np.int64) + self._sizes[field]
+            if len(ends):
+                self._sizes[field] = int(ends[-1])
+            self._offsets[field].append(ends)
+        self.n_rows += len(chunk)
+
+    def close(self, fingerprint):
+        """Finish the store and move it into place. Returns its directory."""
+        for field in self.fields:
+            self._files[field].close()
+            np.save(os.path.join(self.tmp_directory, f"{field}.offsets.npy"),
+                    np.concatenate(self._offsets[field]))
+        with open(os.path.join(self.tmp_directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'source': fingerprint, 'fields': self.fields, 'n_rows': self.n_rows}, f)
+        if self.directory is None:
+            return self.tmp_directory
+        shutil.rmtree(self.directory, ignore_errors=True)
+        try:
+            os.rename(self.tmp_directory, self.directory)
+        except OSError:
+            # Another worker finished first
+            shutil.rmtree(self.tmp_directory, ignore_errors=True)
+        return self.directory
+
+
+class TextStore:
+    """Read-only access to a text side store; empty values read as None."""
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.directory = directory
+        self._data = {}
+        self._offsets = {}
+        for field in self.meta['fields']:
+            self._offsets[field] = np.load(os.path.join(directory, f"{field}.offsets.npy"), mmap_mode='r')
+            path = os.path.join(directory, f"{field}.bin")
+            # np.memmap cannot map an empty file
+            self._data[field] = np.memmap(path, dtype=np.uint8, mode='r') if os.path.getsize(path) else b''
+
+    def values(self, field, start, stop):
+        """Texts of one field for rows start..stop-1 (None for empty values)."""
+        offsets = np.asarray(self._offsets[field][start:stop + 1])
+        if len(offsets) < 2:
+            return []
+        block = bytes(self._data[field][offsets[0]:offsets[-1]])
+        bounds = (offsets - offsets[0]).tolist()
+        return [block[begin:end].decode('utf-8') if end > begin else None
+                for begin, end in zip(bounds[:-1], bounds[1:])]
+
+    def get(self, field, row):
+        """Text of one field for one row (a positional row index of df)."""
+        offsets = self._offsets[field]
+        start, end = int(offsets[row]), int(offsets[row + 1])
+        if start == end:
+            return None
+        return bytes(self._data[field][start:end]).decode('utf-8')
+
+
+def open_text_store(source_path, directory=None):
+    """
+    Open the text store of a dataset file, rebuilding it if it does not match the file.
+
+    Args:
+        source_path (str): Dataset CSV
+        directory (str): Store directory if it is not the default for source_path
+    """
+    directory = directory or text_store_path(source_path)
+    try:
+        store = TextStore(directory)
+        if _source_matches(store.meta['source'], source_path):
+            return store
+    except (OSError, ValueError, KeyError):
+        pass
+    text_writer = TextStoreWriter(text_store_path(source_path), TEXT_FIELDS)
+    for chunk in pd.read_csv(source_path, chunksize=INGEST_CHUNK_ROWS, usecols=TEXT_FIELDS,
+                             dtype={field: str for field in TEXT_FIELDS}):
+        text_writer.append(chunk)
+    return TextStore(text_writer.close(source_fingerprint(source_path)))
+
+# ============================================================================
+# DATASET CACHE
+# ============================================================================
+
+# Preprocessing the CSV is repeated by every worker on every start. The cleaned
+# table is written once to a cache directory: numeric columns as .npy files,
+# text and categorical columns as integer codes (.npy) plus their values (JSON).
+# Later starts memory-map the .npy files, so worker processes share the same
+# pages instead of each parsing the CSV again.
+# այսինքն՝ CSV-ն մշակվում է միայն մեկ անգամ, իսկ հաջորդ գործարկումները կարդում են պատրաստի ֆայլերը։
+
+def _dataset_cache_path(source_path):
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(DATASET_CACHE_DIR, name)
+
+
+def write_dataset_cache(frame, source_path):
+    """
+    Write a preprocessed frame to the dataset cache for source_path.
+
+    The files are written to a temporary directory and renamed into place,
+    so a concurrently starting worker never reads a half-written cache.
+    """
+    cache_path = _dataset_cache_path(source_path)
+    tmp_path = f"{cache_path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    columns = []
+    for name in frame.columns:
+        column = frame[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(tmp_path, f"{name}.codes.npy"), column.cat.codes.to_numpy())
+            columns.append({'name': name, 'kind': 'category',
+                            'categories': column.cat.categories.tolist(),
+                            'ordered': bool(column.cat.ordered)})
+        elif column.dtype == object:
+            # Missing values get code -1, which decodes to the trailing NaN
+            codes, uniques = pd.factorize(column)
+            np.save(os.path.join(tmp_path, f"{name}.codes.npy"), codes.astype(np.int32))
+            columns.append({'name': name, 'kind': 'string', 'categories': uniques.tolist()})
+        else:
+            np.save(os.path.join(tmp_path, f"{name}.npy"), column.to_numpy())
+            columns.append({'name': name, 'kind': 'numeric'})
+
+    meta = {
+        'format': DATASET_CACHE_FORMAT,
+        'source': source_fingerprint(source_path),
+        'n_rows': len(frame),
+        'columns': columns,
+        'attrs': {'all_genres': frame.attrs['all_genres'],
+                  'quality_report': frame.attrs.get('quality_report')},
+    }
+    with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    shutil.rmtree(cache_path, ignore_errors=True)
+    try:
+        os.rename(tmp_path, cache_path)
+    except OSError:
+        # Another worker finished first; its cache is equally valid
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def _read_dataset_cache_meta(source_path):
+    """Return the cache metadata if the cache matches the current source file, else None."""
+    meta_path = os.path.join(_dataset_cache_path(source_path), 'meta.json')
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('format') != DATASET_CACHE_FORMAT or not _source_matches(meta['source'], source_path):
+        return None
+    return meta
+
+
+def read_dataset_cache(source_path):
+    """
+    Load the preprocessed frame for source_path from the dataset cache.
+
+    Numeric columns are read-only memory maps of the cache files.
+
+    Returns:
+        DataFrame or None: The cached frame, or None if there is no valid cache
+    """
+    meta = _read_dataset_cache_meta(source_path)
+    if meta is None:
+        return None
+    cache_path = _dataset_cache_path(source_path)
+
+    data = {}
+    try:
+        for column in meta['columns']:
+            name = column['name']
+            if column['kind'] == 'numeric':
+                data[name] = np.load(os.path.join(cache_path, f"{name}.npy"), mmap_mode='r')
+                continue
+            codes = np.load(os.path.join(cache_path, f"{name}.codes.npy"), mmap_mode='r')
+            if column['kind'] == 'category':
+                data[name] = pd.Categorical.from_codes(codes, column['categories'],
+                                                       ordered=column['ordered'])
+            else:
+                values = np.empty(len(column['categories']) + 1, dtype=object)
+                values[:-1] = column['categories']
+                values[-1] = np.nan
+                data[name] = values[codes]
+    except (OSError, ValueError):
+        return None
+
+    frame = pd.DataFrame(data, copy=False)
+    frame.attrs.update(meta['attrs'])
+    frame.attrs['version'] = dataset_version(source_path)
+    frame.attrs['text_store'] = text_store_path(source_path)
+    return frame
+
+
+def load_dataset(path=DATA_FILE):
+    """
+    Load the preprocessed dataset, from the dataset cache when it is valid.
+
+    On a cache miss the CSV is preprocessed and the cache is (re)written.
+    """
+    if not USE_DATASET_CACHE:
+        return load_and_preprocess_data(path)
+    frame = read_dataset_cache(path)
+    if frame is None:
+        frame = load_and_preprocess_data(path)
+        try:
+            write_dataset_cache(frame, path)
+        except OSError as exc:
+            # A read-only deployment still works, it just preprocesses on every start
+            print(f"Warning: could not write dataset cache: {exc}", file=sys.stderr)
+    return frame
+
+# ============================================================================
+# GENRE INDEX
+# ============================================================================
+
+def normalize_genre_selection(selected_genre):
+    """
+    Normalize the genre dropdown value to a sorted tuple of genre names.
+
+    The dropdown holds a list of genres (a single genre name is accepted
+    too). No selection, like an empty tuple, means no genre filtering.
+    """
+    if selected_genre is None:
+        return ()
+    if isinstance(selected_genre, str):
+        selected_genre = [selected_genre]
+    return tuple(sorted(set(selected_genre)))
+
+
+def genre_bitmask(genres, genre_vocabulary=None):
+    """
+    Combine genre names into a single bitmask. Unknown genres are ignored.
+    """
+    genre_vocabulary = current_dataset().all_genres if genre_vocabulary is None else genre_vocabulary
+    positions = {genre: i for i, genre in enumerate(genre_vocabulary)}
+    mask = 0
+    for genre in genres:
+        if genre in positions:
+            mask |= 1 << positions[genre]
+    return np.int64(mask)
+
+
+def genre_match(genre_masks, selected_genres, genre_mode='any', genre_vocabulary=None):
+    """
+    Vectorized genre predicate over an array of Genre_Mask values.
+
+    Args:
+        genre_masks (ndarray): int64 genre bitmasks, one per movie
+        selected_genres (tuple): Genre names from normalize_genre_selection
+        genre_mode (str): 'any' keeps movies with at least one selected genre (OR),
+                          'all' keeps movies that have every selected genre (AND)
+
+    Returns:
+        ndarray: Boolean array, True for matching movies
+    """
+    wanted = genre_bitmask(selected_genres, genre_vocabulary)
+    if genre_mode == 'all' and len(selected_genres) > 0:
+        # A genre missing from the vocabulary can never be matched by every movie
+        if len(selected_genres) != bin(int(wanted)).count('1'):
+            return np.zeros(len(genre_masks), dtype=bool)
+        return (genre_masks & wanted) == wanted
+    return (genre_masks & wanted) != 0
+
+
+def count_genres(genre_masks, genre_vocabulary=None):
+    """
+    Count movies per genre with one vectorized popcount per genre bit.
+
+    Returns:
+        Series: Movie counts indexed by genre name
+    """
+    genre_vocabulary = current_dataset().all_genres if genre_vocabulary is None else genre_vocabulary
+    counts = [np.count_nonzero(genre_masks & np.int64(1 << i))
+              for i in range(len(genre_vocabulary))]
+    return pd.Series(counts, index=genre_vocabulary, dtype=np.int64)
+
+# ============================================================================
+# FILTER ENGINE
+# ============================================================================
+
+class FilterEngine:
+    """
+    Precomputed columnar indexes that resolve dashboard filters to row positions.
+
+    Rows are kept in Released_Year order, so a year range is a contiguous slice
+    located with two binary searches. A rating-sorted permutation does the same
+    for the minimum rating threshold. A query starts from whichever slice is
+    smaller and tests the remaining predicates on column arrays that were
+    gathered into that order up front, so no intermediate DataFrame is built.
+    """
+
+    def __init__(self, frame):
+        years = frame['Released_Year'].to_numpy()
+        ratings = frame['IMDB_Rating'].to_numpy()
+        genre_masks = frame['Genre_Mask'].to_numpy()
+        self.n_rows = len(frame)
+        self.genre_vocabulary = frame.attrs['all_genres']
+
+        # Year-sorted view: years_sorted[lo:hi] is a year range
+        self.year_order = np.argsort(years, kind='stable')
+        self.years_sorted = years[self.year_order]
+        self.ratings_by_year = ratings[self.year_order]
+        self.genres_by_year = genre_masks[self.year_order]
+
+        # Rating-sorted view: ratings_sorted[lo:] passes a minimum rating
+        self.rating_order = np.argsort(ratings, kind='stable')
+        self.ratings_sorted = ratings[self.rating_order]
+        self.years_by_rating = years[self.rating_order]
+        self.genres_by_rating = genre_masks[self.rating_order]
+
+    def year_bounds(self, year_min, year_max):
+        """Return the [lo, hi) slice of the year-sorted view for an inclusive year range."""
+        lo = np.searchsorted(self.years_sorted, year_min, side='left')
+        hi = np.searchsorted(self.years_sorted, year_max, side='right')
+        return lo, max(lo, hi)
+
+    def rating_bounds(self, min_rating):
+        """Return the [lo, n) slice of the rating-sorted view for a minimum rating."""
+        threshold = self.ratings_sorted.dtype.type(min_rating)
+        return np.searchsorted(self.ratings_sorted, threshold, side='left'), self.n_rows
+
+    def query(self, year_range, selected_genres=(), min_rating=None, genre_mode='any'):
+        """
+        Resolve a filter state to row positions.
+
+        Args:
+            year_range (list): Inclusive [min_year, max_year]
+            selected_genres (tuple): Genre names from normalize_genre_selection
+            min_rating (float): Minimum rating threshold, or None for no threshold
+            genre_mode (str): 'any' (OR) or 'all' (AND) for multiple genres
+
+        Returns:
+            ndarray: Sorted positional row indices of the matching movies
+        """
+        year_lo, year_hi = self.year_bounds(year_range[0], year_range[1])
+        if min_rating is None:
+            rating_lo, rating_hi = 0, self.n_rows
+        else:
+            rating_lo, rating_hi = self.rating_bounds(min_rating)
+
+        if year_hi - year_lo <= rating_hi - rating_lo:
+            # Drive from the year slice and test the rating threshold
+            rows = self.year_order[year_lo:year_hi]
+            keep = None
+            if rating_lo > 0:
+                threshold = self.ratings_sorted.dtype.type(min_rating)
+                keep = self.ratings_by_year[year_lo:year_hi] >= threshold
+            genre_masks = self.genres_by_year[year_lo:year_hi]
+        else:
+            # Drive from the rating slice and test the year range
+            rows = self.rating_order[rating_lo:rating_hi]
+            years = self.years_by_rating[rating_lo:rating_hi]
+            keep = (years >= year_range[0]) & (years <= year_range[1])
+            genre_masks = self.genres_by_rating[rating_lo:rating_hi]
+
+        if selected_genres:
+            matches = genre_match(genre_masks, selected_genres, genre_mode, self.genre_vocabulary)
+            keep = matches if keep is None else keep & matches
+
+        if keep is not None:
+            rows = rows[keep]
+        # Return rows in original order, as a boolean mask over the table would
+        return np.sort(rows)
+
+# ============================================================================
+# DATA CUBE
+# ============================================================================
+
+# Rating thresholds the cube can answer exactly: 0.0, 0.1, ..., 10.0
+# (the rating slider moves in steps of 0.1)
+RATING_BUCKET_STEP = 0.1
+RATING_BUCKETS = 101
+
+
+class DataCube:
+    """
+    Pre-aggregated sums and counts per (year, genre, rating bucket).
+
+    For every cell the cube stores the movie count and the sums of
+    IMDB_Rating, No_of_Votes and Gross. Genre slot i is all_genres[i] and the
+    last genre slot holds every movie (no genre filter). Along the rating
+    axis the cells are suffix sums, so cell b covers all movies rated at least
+    thresholds[b]. A query whose minimum rating is one of the thresholds and
+    whose genre selection is empty or a single genre is answered by summing a
+    few cells; anything else returns None and the caller scans rows instead.
+    """
+
+    STATS = ('count', 'rating', 'votes', 'gross')
+
+    def __init__(self, frame):
+        years = frame['Released_Year'].to_numpy().astype(np.int64)
+        ratings = frame['IMDB_Rating'].to_numpy()
+        genre_masks = frame['Genre_Mask'].to_numpy()
+        self.genre_vocabulary = frame.attrs['all_genres']
+        n_genres = len(self.genre_vocabulary)
+
+        # Thresholds use the rating dtype so they compare exactly like the filter does
+        self.thresholds = (np.arange(RATING_BUCKETS) / round(1 / RATING_BUCKET_STEP)).astype(ratings.dtype)
+        self.year_min = int(years.min()) if len(years) else 0
+        self.year_max = int(years.max()) if len(years) else -1
+        n_years = self.year_max - self.year_min + 1
+
+        buckets = np.clip(np.searchsorted(self.thresholds, ratings, side='right') - 1, 0, None)
+        cells = (years - self.year_min) * RATING_BUCKETS + buckets
+        values = (np.ones(len(frame)), widen_float32(ratings),
+                  frame['No_of_Votes'].to_numpy().astype(np.float64),
+                  frame['Gross'].to_numpy().astype(np.float64))
+
+        cube = np.zeros((n_years, n_genres + 1, RATING_BUCKETS, len(self.STATS)))
+        n_cells = n_years * RATING_BUCKETS
+        for slot in range(n_genres + 1):
+            if slot == n_genres:
+                selected = slice(None)
+            else:
+                selected = (genre_masks & np.int64(1 << slot)) != 0
+            for k, value in enumerate(values):
+                cube[:, slot, :, k] = np.bincount(cells[selected], weights=value[selected],
+                                                  minlength=n_cells).reshape(n_years, RATING_BUCKETS)
+        # ստեղ գումարում ենք վերջից, որպեսզի b բջիջը պարունակի b և ավելի բարձր գնահատականները
+        self.cube = np.cumsum(cube[:, :, ::-1], axis=2)[:, :, ::-1]
+
+    def rating_bucket(self, min_rating):
+        """Return the bucket whose threshold equals min_rating, or None if it falls between buckets."""
+        bucket = int(round(float(min_rating) / RATING_BUCKET_STEP))
+        if 0 <= bucket < RATING_BUCKETS and self.thresholds[bucket] == self.thresholds.dtype.type(min_rating):
+            return bucket
+        return None
+
+    def _genre_slot(self, genres):
+        if len(genres) == 0:
+            return len(self.genre_vocabulary)
+        if len(genres) == 1 and genres[0] in self.genre_vocabulary:
+            return self.genre_vocabulary.index(genres[0])
+        return None
+
+    def yearly(self, filter_state):
+        """
+        Per-year cells for a filter state.
+
+        Returns:
+            tuple or None: (years, stats) where stats has one row per year and
+            one column per STATS entry, or None if the cube cannot answer
+        """
+        bucket = self.rating_bucket(filter_state['min_rating'])
+        slot = self._genre_slot(filter_state['genres'])
+        if bucket is None or slot is None:
+            return None
+        year_lo = max(filter_state['year_range'][0], self.year_min)
+        year_hi = min(filter_state['year_range'][1], self.year_max)
+        if year_hi < year_lo:
+            return np.array([], dtype=np.int64), np.zeros((0, len(self.STATS)))
+        stats = self.cube[year_lo - self.year_min:year_hi - self.year_min + 1, slot, bucket]
+        return np.arange(year_lo, year_hi + 1), stats
+
+    def totals(self, filter_state):
+        """Summed (count, rating, votes, gross) for a filter state, or None."""
+        yearly = self.yearly(filter_state)
+        if yearly is None:
+            return None
+        return yearly[1].sum(axis=0)
+
+    def genre_counts(self, filter_state):
+        """Movies per genre for a filter state without a genre selection, or None."""
+        bucket = self.rating_bucket(filter_state['min_rating'])
+        if bucket is None or filter_state['genres']:
+            return None
+        year_lo = max(filter_state['year_range'][0], self.year_min) - self.year_min
+        year_hi = max(min(filter_state['year_range'][1], self.year_max) - self.year_min, year_lo - 1)
+        n_genres = len(self.genre_vocabulary)
+        counts = self.cube[year_lo:year_hi + 1, :n_genres, bucket, 0].sum(axis=0)
+        return pd.Series(np.rint(counts).astype(np.int64), index=self.genre_vocabulary)
+
+
+# ============================================================================
+# TOP-K INDEXES
+# ============================================================================
+
+class TopVotesIndex:
+    """
+    Movies ordered by number of votes within each release year, for top-K queries.
+
+    Rows are ordered by votes (descending), ties by row position, once over
+    the whole catalog and once within each release year. A top-K query walks an ordering from
+    the most voted movie, testing the predicates chunk by chunk until K
+    movies pass. A year range holding a large share of the catalog walks the
+    global ordering; a narrower one walks each of its years and k-way merges
+    the per-year lists.
+    """
+
+    # Year ranges holding at least this share of all movies walk the global ordering
+    GLOBAL_WALK_SHARE = 0.25
+
+    def __init__(self, frame):
+        years = frame['Released_Year'].to_numpy()
+        ratings = frame['IMDB_Rating'].to_numpy()
+        genre_masks = frame['Genre_Mask'].to_numpy()
+        votes = frame['No_of_Votes'].to_numpy().astype(np.int64)
+        self.votes = votes
+        self.n_rows = len(frame)
+        self.genre_vocabulary = frame.attrs['all_genres']
+
+        # Whole catalog, most voted first
+        self.order = np.lexsort((np.arange(len(frame)), -votes))
+        self.years_by_votes = years[self.order]
+        self.ratings_by_votes = ratings[self.order]
+        self.genres_by_votes = genre_masks[self.order]
+
+        # Year by year, most voted first within each year
+        self.year_order = np.lexsort((np.arange(len(frame)), -votes, years))
+        self.ratings_by_year = ratings[self.year_order]
+        self.genres_by_year = genre_masks[self.year_order]
+        # Year i of year_values occupies year_order[year_starts[i]:year_starts[i + 1]]
+        self.year_values, starts = np.unique(years[self.year_order], return_index=True)
+        self.year_starts = np.append(starts, len(frame))
+
+    def _walk(self, order, ratings, genre_masks, start, end, k, filter_state, years=None):
+        """Walk order[start:end] until k rows pass the filter state's predicates."""
+        threshold = ratings.dtype.type(filter_state['min_rating'])
+        genres = tuple(filter_state['genres'])
+        year_lo, year_hi = filter_state['year_range']
+        found = []
+        chunk = 4 * k
+        while start < end and len(found) < k:
+            stop = min(end, start + chunk)
+            keep = ratings[start:stop] >= threshold
+            if years is not None:
+                keep &= (years[start:stop] >= year_lo) & (years[start:stop] <= year_hi)
+            if genres:
+                keep &= genre_match(genre_masks[start:stop], genres, filter_state['genre_mode'],
+                                    self.genre_vocabulary)
+            found.extend(order[start:stop][keep][:k - len(found)].tolist())
+            start, chunk = stop, chunk * 2
+        return found
+
+    def top(self, filter_state, k):
+        """
+        Row positions of the k most voted movies that pass a filter state.
+
+        Returns:
+            ndarray: Up to k row positions, most voted first
+        """
+        first = np.searchsorted(self.year_values, filter_state['year_range'][0], side='left')
+        last = np.searchsorted(self.year_values, filter_state['year_range'][1], side='right')
+        if last <= first:
+            return np.array([], dtype=np.int64)
+        if self.year_starts[last] - self.year_starts[first] >= self.GLOBAL_WALK_SHARE * self.n_rows:
+            return np.array(self._walk(self.order, self.ratings_by_votes, self.genres_by_votes,
+                                       0, self.n_rows, k, filter_state, years=self.years_by_votes),
+                            dtype=np.int64)
+        per_year = [self._walk(self.year_order, self.ratings_by_year, self.genres_by_year,
+                               self.year_starts[i], self.year_starts[i + 1], k, filter_state)
+                    for i in range(first, last)]
+        merged = heapq.merge(*per_year, key=lambda row: (-self.votes[row], row))
+        return np.fromiter(itertools.islice(merged, k), dtype=np.int64)
+
+
+class DirectorStats:
+    """
+    Per-director sufficient statistics (movie count, rating sum) per year and rating bucket.
+
+    Groups are sorted by year, so a year range is a contiguous slice of them,
+    and a minimum rating that is one of the data cube's thresholds keeps the
+    groups at or above its bucket. Filters with a genre selection (or a
+    threshold between buckets) return None from totals() and are summed from
+    the filtered rows with totals_for_rows() instead.
+    """
+
+    def __init__(self, frame, cube):
+        codes, names = pd.factorize(frame['Director'], sort=True)
+        self.codes = codes
+        self.names = np.asarray(names, dtype=object)
+        self.ratings = widen_float32(frame['IMDB_Rating'].to_numpy())
+        self.cube = cube
+        n_directors = max(len(self.names), 1)
+
+        valid = codes >= 0
+        years = frame['Released_Year'].to_numpy().astype(np.int64)[valid]
+        buckets = np.clip(np.searchsorted(cube.thresholds, frame['IMDB_Rating'].to_numpy()[valid],
+                                          side='right') - 1, 0, None)
+        keys = ((years - cube.year_min) * RATING_BUCKETS + buckets) * n_directors + codes[valid]
+        keys, groups = np.unique(keys, return_inverse=True)
+        self.group_counts = np.bincount(groups, minlength=len(keys)).astype(np.float64)
+        self.group_sums = np.bincount(groups, weights=self.ratings[valid], minlength=len(keys))
+        self.group_directors = keys % n_directors
+        self.group_buckets = keys // n_directors % RATING_BUCKETS
+        self.group_years = keys // n_directors // RATING_BUCKETS + cube.year_min
+
+    def totals(self, filter_state):
+        """
+        Movie count and rating sum per director for a filter state without genres.
+
+        Returns:
+            tuple or None: (counts, sums), arrays indexed like names, or None
+            if the statistics cannot answer the filter
+        """
+        bucket = self.cube.rating_bucket(filter_state['min_rating'])
+        if bucket is None or filter_state['genres']:
+            return None
+        lo = np.searchsorted(self.group_years, filter_state['year_range'][0], side='left')
+        hi = max(lo, np.searchsorted(self.group_years, filter_state['year_range'][1], side='right'))
+        keep = self.group_buckets[lo:hi] >= bucket
+        directors = self.group_directors[lo:hi][keep]
+        return (np.bincount(directors, weights=self.group_counts[lo:hi][keep], minlength=len(self.names)),
+                np.bincount(directors, weights=self.group_sums[lo:hi][keep], minlength=len(self.names)))
+
+    def totals_for_rows(self, rows):
+        """Movie count and rating sum per director over some row positions."""
+        codes = self.codes[rows]
+        valid = codes >= 0
+        return (np.bincount(codes[valid], minlength=len(self.names)).astype(np.float64),
+                np.bincount(codes[valid], weights=self.ratings[rows][valid], minlength=len(self.names)))
+
+# ============================================================================
+# SEARCH INDEX
+# ============================================================================
+
+# The search box is answered from an inverted index built once per dataset
+# version: for every term of a field, the sorted row positions of the movies
+# that contain it (its posting list). Titles and overviews are split into
+# lowercased words; director and cast names are kept whole and matched
+# exactly, ignoring case. The posting lists of a field are stored back to back
+# (CSR layout) and terms are looked up by a 64-bit hash in a sorted array, so
+# the index is three .npy files per field that workers memory-map from the
+# dataset cache directory, like the dataset cache itself.
+# A query intersects the posting lists of its clauses, shortest first, by
+# binary search, and the result is intersected with the rows of the
+# year/genre/rating filters the same way.
+# այսինքն՝ բառերի որոնումը չի անցնում բոլոր տողերով, այլ կարդում է միայն պատրաստի ցուցակները։
+SEARCH_INDEX_FORMAT = 1
+
+# Fields a query clause can name (field:value or field:"two words"); plain
+# words search 'text'
+SEARCH_FIELDS = ('text', 'title', 'director', 'cast')
+SEARCH_FIELD_ALIASES = {'star': 'cast', 'stars': 'cast', 'overview': 'text'}
+# Fields whose values are whole names rather than words
+EXACT_SEARCH_FIELDS = ('director', 'cast')
+
+_SEARCH_WORD = re.compile(r'[^\W_]+')
+_SEARCH_CLAUSE = re.compile(r'(?:([A-Za-z]+):)?(?:"([^"]*)"?|(\S+))')
+
+
+def search_words(text):
+    """Lowercased words (runs of letters and digits) of a text, as indexed and queried."""
+    return _SEARCH_WORD.findall(text.casefold())
+
+
+def search_name(name):
+    """Normalized form of a director or star name for exact matching."""
+    return ' '.join(name.split()).casefold()
+
+
+def parse_search(query):
+    """
+    Parse a search box query into sorted, unique (field, term) clauses.
+
+    Plain words match titles and overviews ('text'); 'title:word' only
+    titles; 'director:"Christopher Nolan"' and 'star:"Tom Hanks"' match a
+    whole name. A quoted phrase without a field is searched as its words.
+
+    Returns:
+        list: [field, term] pairs (empty for an empty query)
+    """
+    clauses = set()
+    for match in _SEARCH_CLAUSE.finditer(query or ''):
+        field, quoted, word = match.groups()
+        value = quoted if quoted is not None else word
+        field = SEARCH_FIELD_ALIASES.get((field or 'text').lower(), (field or 'text').lower())
+        if field not in SEARCH_FIELDS:
+            # Not a field name: "matrix:reloaded" searches both words
+            field, value = 'text', match.group(0)
+        if field in EXACT_SEARCH_FIELDS:
+            name = search_name(value)
+            if name:
+                clauses.add((field, name))
+        else:
+            clauses.update((field, term) for term in search_words(value))
+    return [list(clause) for clause in sorted(clauses)]
+
+
+def search_term_hash(term):
+    """Stable 64-bit hash of a term (Python's hash() differs between processes)."""
+    return int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'little', signed=True)
+
+
+def intersect_sorted(a, b):
+    """Intersection of two sorted arrays of unique row positions, by binary search of the shorter in the longer."""
+    if len(a) > len(b):
+        a, b = b, a
+    if not len(a):
+        return np.asarray(a, dtype=np.int64)
+    found = np.searchsorted(b, a)
+    found[found == len(b)] = 0
+    return np.asarray(a[b[found] == a], dtype=np.int64)
+
+
+class _PostingsBuilder:
+    """
+    Collects the (term, row) pairs of one field, chunk by chunk.
+
+    Each distinct value of a chunk is analyzed once and its terms are
+    broadcast to the rows holding it, so repeated names cost one lookup.
+    The terms of a chunk are factorized together, so the vocabulary dict is
+    only consulted once per distinct term of the chunk.
+    """
+
+    def __init__(self, analyze):
+        self.analyze = analyze
+        self.term_ids = {}
+        self._terms = []
+        self._rows = []
+
+    def add(self, start, values):
+        """Add the values of rows start, start + 1, ... (non-strings have no terms)."""
+        # An object array: factorize no longer accepts plain lists
+        codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+        term_lists = [self.analyze(value) if isinstance(value, str) else [] for value in uniques]
+        lengths = np.fromiter(map(len, term_lists), dtype=np.int64, count=len(term_lists))
+        term_codes, chunk_terms = pd.factorize(
+            np.fromiter(itertools.chain.from_iterable(term_lists), dtype=object, count=int(lengths.sum())))
+        chunk_ids = np.fromiter((self.term_ids.setdefault(term, len(self.term_ids)) for term in chunk_terms),
+                                dtype=np.int64, count=len(chunk_terms))
+        # A word repeated within one value is indexed once for it
+        values_of_terms = np.repeat(np.arange(len(term_lists), dtype=np.int64), lengths)
+        pairs = np.unique(values_of_terms * max(len(chunk_terms), 1) + term_codes)
+        term_ids = chunk_ids[pairs % max(len(chunk_terms), 1)].astype(np.int32)
+        lengths = np.bincount(pairs // max(len(chunk_terms), 1), minlength=len(term_lists))
+        firsts = np.cumsum(lengths) - lengths
+        rows = np.flatnonzero(codes >= 0)
+        codes = codes[rows]
+        counts = lengths[codes]
+        # Output position p of a row's run maps to term_ids[firsts[code] + offset within the run]
+        run_starts = np.cumsum(counts) - counts
+        self._terms.append(term_ids[np.arange(counts.sum()) + np.repeat(firsts[codes] - run_starts, counts)])
+        self._rows.append(np.repeat((rows + start).astype(np.int32), counts))
+
+    def finish(self, n_rows, repeated_rows=False):
+        """
+        Build the field's (hashes, offsets, postings) arrays.
+
+        Args:
+            n_rows (int): Rows in the table
+            repeated_rows (bool): Whether several add() calls covered the same
+                rows (e.g. the four star columns), so pairs must be deduplicated
+        """
+        terms = np.concatenate(self._terms) if self._terms else np.zeros(0, dtype=np.int32)
+        rows = np.concatenate(self._rows) if self._rows else np.zeros(0, dtype=np.int32)
+        self._terms, self._rows = [], []
+        hashes = np.fromiter((search_term_hash(term) for term in self.term_ids), dtype=np.int64,
+                             count=len(self.term_ids))
+        # Renumber terms in hash order, so term i's postings are the i-th run
+        by_hash = np.argsort(hashes, kind='stable')
+        rank = np.empty(len(hashes), dtype=np.int64)
+        rank[by_hash] = np.arange(len(hashes))
+        terms = rank[terms]
+        if repeated_rows:
+            keys = np.unique(terms * max(n_rows, 1) + rows)
+            terms, rows = keys // max(n_rows, 1), keys % max(n_rows, 1)
+        else:
+            # Pairs were added in row order; a stable sort keeps each term's rows sorted
+            order = np.argsort(terms, kind='stable')
+            terms, rows = terms[order], rows[order]
+        offsets = np.zeros(len(hashes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(hashes)), out=offsets[1:])
+        row_type = np.int32 if n_rows < 2 ** 31 else np.int64
+        return hashes[by_hash], offsets, rows.astype(row_type)
+
+
+class SearchIndex:
+    """
+    Inverted index over the searchable fields of one dataset version.
+
+    Attributes:
+        fields (dict): Field -> (sorted term hashes, postings offsets, postings),
+            where the postings of the term with hash hashes[i] are
+            postings[offsets[i]:offsets[i + 1]]
+    """
+
+    SUFFIX = 'search'
+    FORMAT = SEARCH_INDEX_FORMAT
+    FILES = ('hashes', 'offsets', 'postings')
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    @classmethod
+    def build(cls, frame, text_store, chunksize=INGEST_CHUNK_ROWS):
+        """Index the titles, overviews, directors and stars of a preprocessed table."""
+        n_rows = len(frame)
+        builders = {field: _PostingsBuilder(search_words) for field in ('text', 'title')}
+        builders.update({field: _PostingsBuilder(lambda name: [search_name(name)] if name.strip() else [])
+                         for field in EXACT_SEARCH_FIELDS})
+        titles = frame['Series_Title'].to_numpy()
+        for start in range(0, n_rows, chunksize):
+            stop = min(n_rows, start + chunksize)
+            chunk_titles = titles[start:stop]
+            overviews = text_store.values('Overview', start, stop)
+            builders['title'].add(start, chunk_titles)
+            builders['text'].add(start, [f"{title if isinstance(title, str) else ''} {overview or ''}"
+                                         for title, overview in zip(chunk_titles, overviews)])
+        builders['director'].add(0, frame['Director'])
+        for column in ['Star1', 'Star2', 'Star3', 'Star4']:
+            builders['cast'].add(0, frame[column])
+        return cls({field: builder.finish(n_rows, repeated_rows=field == 'cast')
+                    for field, builder in builders.items()})
+
+    def save(self, directory):
+        """Write the index to a new directory (renamed into place by the caller)."""
+        os.makedirs(directory)
+        for field, arrays in self.fields.items():
+            for name, values in zip(self.FILES, arrays):
+                np.save(os.path.join(directory, f"{field}.{name}.npy"), values)
+
+    @classmethod
+    def load(cls, directory):
+        """Memory-map an index written by save()."""
+        return cls({field: tuple(np.load(os.path.join(directory, f"{field}.{name}.npy"), mmap_mode='r')
+                                 for name in cls.FILES)
+                    for field in SEARCH_FIELDS})
+
+    def postings(self, field, term):
+        """Sorted row positions of the movies whose field contains term."""
+        hashes, offsets, postings = self.fields[field]
+        key = search_term_hash(term)
+        i = int(np.searchsorted(hashes, key))
+        if i == len(hashes) or hashes[i] != key:
+            return postings[:0]
+        return postings[offsets[i]:offsets[i + 1]]
+
+    def query(self, clauses, within=None):
+        """
+        Row positions matching every [field, term] clause of parse_search().
+
+        Args:
+            clauses (list): [field, term] pairs
+            within (ndarray): Sorted row positions the result is restricted to
+                (e.g. the rows of the other filters), intersected in the same
+                shortest-first order as the posting lists
+
+        Returns:
+            ndarray: Sorted int64 row positions
+        """
+        lists = [self.postings(field, term) for field, term in clauses]
+        if within is not None:
+            lists.append(within)
+        lists.sort(key=len)
+        rows = np.asarray(lists[0], dtype=np.int64)
+        for postings in lists[1:]:
+            if not len(rows):
+                break
+            rows = intersect_sorted(rows, postings)
+        return rows
+
+
+def open_dataset_index(index_class, frame, source_path=DATA_FILE, *build_args):
+    """
+    Load an index of a dataset version from the cache directory, building it on a miss.
+
+    The index class provides build(frame, *build_args), save(directory) and
+    load(directory), and names its directory with its SUFFIX and FORMAT.
+    Indexes of versions that can no longer be queried are removed.
+    """
+    cache_path = _dataset_cache_path(source_path)
+    directory = f"{cache_path}.{frame.attrs['version']}-{index_class.FORMAT}.{index_class.SUFFIX}"
+    try:
+        return index_class.load(directory)
+    except (OSError, ValueError):
+        pass
+    index = index_class.build(frame, *build_args)
+    tmp_directory = f"{directory}.tmp-{os.getpid()}"
+    try:
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        index.save(tmp_directory)
+        os.rename(tmp_directory, directory)
+    except OSError:
+        # Read-only deployment, or another worker finished first: keep the index in memory
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        return index
+    for stale in sorted(glob.glob(f"{glob.escape(cache_path)}.*.{index_class.SUFFIX}"),
+                        key=os.path.getmtime)[:-DATASET_VERSIONS_KEPT]:
+        shutil.rmtree(stale, ignore_errors=True)
+    return index_class.load(directory)
+
+# ============================================================================
+# COLLABORATION GRAPH
+# ============================================================================
+
+# Director and Star1-Star4 link people to films. The graph is built once per
+# dataset version, with person ids in name order, as a few flat arrays:
+#   - film -> people: a (rows x 5) matrix of person ids,
+#   - person -> films: the sorted rows of every person, back to back (CSR),
+#   - film -> pairs: the ids of the pairs of people who share each film, for
+#     every pair (co-appearance edges) and for director/star pairs,
+#   - person -> people: the neighbours of every person and the edge joining
+#     them, back to back (CSR).
+# A people chart under some filters counts the edge ids of the filtered rows
+# with np.bincount, and the collaborators of one person intersect their films
+# with the filtered rows, so nothing joins the table with itself. Without
+# filters the counts over the whole catalog are read from the graph.
+# Like the search index, the arrays are written as .npy files next to the
+# dataset cache and memory-mapped by every worker.
+PEOPLE_GRAPH_FORMAT = 1
+
+PEOPLE_COLUMNS = ['Director', 'Star1', 'Star2', 'Star3', 'Star4']
+
+# Column pairs of PEOPLE_COLUMNS that share a film; the first four pair the director with a star
+PEOPLE_SLOT_PAIRS = list(itertools.combinations(range(len(PEOPLE_COLUMNS)), 2))
+DIRECTOR_STAR_SLOTS = len(PEOPLE_COLUMNS) - 1
+
+
+def _pair_ids(first, second, n_people):
+    """
+    Number the distinct (first, second) person pairs of two id matrices.
+
+    Pairs with a missing person or of a person with themselves get -1, and a
+    pair repeated within one row (a star listed twice) is kept once.
+
+    Returns:
+        tuple: (row x column pair ids as int32, (pairs x 2) person ids as int32)
+    """
+    valid = (first >= 0) & (second >= 0) & (first != second)
+    keys = first[valid].astype(np.int64) * max(n_people, 1) + second[valid]
+    keys, ids = np.unique(keys, return_inverse=True)
+    pair_ids = np.full(first.shape, -1, dtype=np.int32)
+    pair_ids[valid] = ids
+    pair_ids.sort(axis=1)
+    repeated = (pair_ids[:, 1:] == pair_ids[:, :-1]) & (pair_ids[:, 1:] >= 0)
+    pair_ids[:, 1:][repeated] = -1
+    people = np.stack([keys // max(n_people, 1), keys % max(n_people, 1)], axis=1).astype(np.int32)
+    return pair_ids, people
+
+
+def _csr_offsets(keys, n_keys):
+    """Offsets of the runs of sorted keys 0..n_keys-1."""
+    offsets = np.zeros(n_keys + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n_keys), out=offsets[1:])
+    return offsets
+
+
+class PeopleGraph:
+    """
+    Person-film and person-person adjacency of one dataset version.
+
+    Attributes:
+        names (ndarray): Person names, sorted; a person id indexes it
+        film_people (ndarray): (rows x 5) person ids of PEOPLE_COLUMNS, -1 if missing
+        film_offsets, person_films (ndarray): Sorted rows of each person (CSR)
+        film_edges (ndarray): (rows x 10) co-appearance edge ids of each film, -1 padded
+        edge_people (ndarray): (edges x 2) person ids of each edge, lower first
+        edge_films (ndarray): Films of each edge in the whole catalog
+        film_pairs (ndarray): (rows x 4) director/star pair ids of each film, -1 padded
+        pair_people (ndarray): (pairs x 2) director and star of each pair
+        pair_films, pair_rating_sums (ndarray): Films and rating sum of each pair in the whole catalog
+        neighbor_offsets, neighbors, neighbor_edges (ndarray): Neighbours of each
+            person and the edges to them (CSR)
+        is_star (ndarray): Whether each person is in a star column of some film
+    """
+
+    SUFFIX = 'people'
+    FORMAT = PEOPLE_GRAPH_FORMAT
+    ARRAYS = ('film_people', 'film_offsets', 'person_films', 'film_edges', 'edge_people', 'edge_films',
+              'film_pairs', 'pair_people', 'pair_films', 'pair_rating_sums',
+              'neighbor_offsets', 'neighbors', 'neighbor_edges', 'is_star')
+    NAMES_FILE = 'names.json'
+
+    def __init__(self, names, arrays):
+        self.names = names
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+        self.n_rows = len(self.film_people)
+
+    @classmethod
+    def build(cls, frame):
+        """Build the graph of a preprocessed table."""
+        columns = [pd.Categorical(frame[column]) for column in PEOPLE_COLUMNS]
+        # One vocabulary for directors and stars: the union of the columns' categories
+        names = pd.Index(np.concatenate([np.asarray(column.categories, dtype=object)
+                                         for column in columns])).unique().sort_values()
+        film_people = np.empty((len(frame), len(columns)), dtype=np.int32)
+        for position, column in enumerate(columns):
+            ids = names.get_indexer(column.categories).astype(np.int32)
+            codes = column.codes
+            film_people[:, position] = np.where(codes >= 0, ids[np.maximum(codes, 0)], -1)
+        names = np.asarray(names, dtype=object)
+        n_rows, n_people = film_people.shape[0], len(names)
+        row_type = np.int32 if n_rows < 2 ** 31 else np.int64
+
+        # person -> films; a person listed twice in one film is counted once
+        flat = film_people.ravel()
+        listed = np.flatnonzero(flat >= 0)
+        keys = np.unique(flat[listed].astype(np.int64) * max(n_rows, 1) + listed // len(columns))
+        film_offsets = _csr_offsets(keys // max(n_rows, 1), n_people)
+        person_films = (keys % max(n_rows, 1)).astype(row_type)
+
+        first = film_people[:, [a for a, _ in PEOPLE_SLOT_PAIRS]]
+        second = film_people[:, [b for _, b in PEOPLE_SLOT_PAIRS]]
+        film_edges, edge_people = _pair_ids(np.minimum(first, second), np.maximum(first, second), n_people)
+        film_pairs, pair_people = _pair_ids(first[:, :DIRECTOR_STAR_SLOTS], second[:, :DIRECTOR_STAR_SLOTS],
+                                            n_people)
+        edge_films = np.bincount(film_edges[film_edges >= 0], minlength=len(edge_people)).astype(np.int32)
+        ratings = np.broadcast_to(widen_float32(frame['IMDB_Rating'].to_numpy())[:, None], film_pairs.shape)
+        paired = film_pairs >= 0
+        pair_films = np.bincount(film_pairs[paired], minlength=len(pair_people)).astype(np.int32)
+        pair_rating_sums = np.bincount(film_pairs[paired], weights=ratings[paired], minlength=len(pair_people))
+
+        # person -> people, each edge listed from both of its ends
+        ends = np.concatenate([edge_people[:, 0], edge_people[:, 1]])
+        others = np.concatenate([edge_people[:, 1], edge_people[:, 0]])
+        order = np.argsort(ends, kind='stable')
+        edge_ids = np.arange(len(edge_people), dtype=np.int32)
+
+        is_star = np.zeros(n_people, dtype=bool)
+        stars = film_people[:, 1:]
+        is_star[stars[stars >= 0]] = True
+        return cls(names, {
+            'film_people': film_people,
+            'film_offsets': film_offsets,
+            'person_films': person_films,
+            'film_edges': film_edges,
+            'edge_people': edge_people,
+            'edge_films': edge_films,
+            'film_pairs': film_pairs,
+            'pair_people': pair_people,
+            'pair_films': pair_films,
+            'pair_rating_sums': pair_rating_sums,
+            'neighbor_offsets': _csr_offsets(ends, n_people),
+            'neighbors': others[order],
+            'neighbor_edges': np.concatenate([edge_ids, edge_ids])[order],
+            'is_star': is_star,
+        })
+
+    def save(self, directory):
+        """Write the graph to a new directory (renamed into place by the caller)."""
+        os.makedirs(directory)
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, self.NAMES_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self.names.tolist(), f)
+
+    @classmethod
+    def load(cls, directory):
+        """Memory-map a graph written by save()."""
+        with open(os.path.join(directory, cls.NAMES_FILE), encoding='utf-8') as f:
+            names = np.array(json.load(f), dtype=object)
+        return cls(names, {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+                           for name in cls.ARRAYS})
+
+    def person_id(self, name):
+        """Id of a person by name, or None."""
+        i = int(np.searchsorted(self.names, name)) if isinstance(name, str) else len(self.names)
+        return i if i < len(self.names) and self.names[i] == name else None
+
+    def _covers_catalog(self, rows):
+        # Filtered rows are unique positions, so as many as the table means all of them
+        return len(rows) == self.n_rows
+
+    def edge_counts(self, rows):
+        """Number of the given rows' films that each co-appearance edge shares."""
+        if self._covers_catalog(rows):
+            return self.edge_films
+        edges = self.film_edges[rows].ravel()
+        return np.bincount(edges[edges >= 0], minlength=len(self.edge_people))
+
+    def pair_totals(self, rows, ratings):
+        """
+        Films and rating sum of each director/star pair over some rows.
+
+        Args:
+            rows (ndarray): Row positions
+            ratings (ndarray): Rating of every row of the table
+        """
+        if self._covers_catalog(rows):
+            return self.pair_films, self.pair_rating_sums
+        pairs = self.film_pairs[rows]
+        paired = pairs >= 0
+        row_ratings = np.broadcast_to(ratings[rows][:, None], pairs.shape)
+        return (np.bincount(pairs[paired], minlength=len(self.pair_people)),
+                np.bincount(pairs[paired], weights=row_ratings[paired], minlength=len(self.pair_people)))
+
+    def degrees(self, rows):
+        """Number of distinct people each person shares at least one of the given rows' films with."""
+        if self._covers_catalog(rows):
+            return np.diff(self.neighbor_offsets)
+        active = self.edge_people[self.edge_counts(rows) > 0]
+        return np.bincount(active.ravel(), minlength=len(self.names))
+
+    def films_of(self, person, rows):
+        """Sorted rows among the given (sorted) rows that a person appears in."""
+        films = self.person_films[self.film_offsets[person]:self.film_offsets[person + 1]]
+        return np.asarray(films, dtype=np.int64) if self._covers_catalog(rows) else intersect_sorted(films, rows)
+
+    def collaborators(self, person, rows):
+        """
+        People who share some of the given rows' films with one person.
+
+        Returns:
+            tuple: (person ids, number of shared films), by person id
+        """
+        if self._covers_catalog(rows):
+            lo, hi = self.neighbor_offsets[person], self.neighbor_offsets[person + 1]
+            return np.asarray(self.neighbors[lo:hi]), self.edge_films[self.neighbor_edges[lo:hi]]
+        edges = self.film_edges[self.films_of(person, rows)].ravel()
+        edges = edges[edges >= 0]
+        edges, counts = np.unique(edges[(self.edge_people[edges] == person).any(axis=1)], return_counts=True)
+        return self.edge_people[edges].sum(axis=1, dtype=np.int64) - person, counts
+
+# ============================================================================
+# STRATIFIED SAMPLE
+# ============================================================================
+
+# On large catalogs a filter change is first answered from a fixed random
+# sample of the movies: the metric cards get an estimate with a 95%
+# confidence interval, and the rating histogram, the rating trend and the top
+# genres are drawn from the sample, while the exact results are computed in
+# the background (see APPROXIMATE VIEW). The sample is stratified by Decade
+# and main genre (the first genre listed): every stratum is sampled in
+# proportion to its size, with at least SAMPLE_MIN_PER_STRATUM movies, so a
+# narrow year range or a rare genre still has sampled movies. Each sampled
+# movie stands for N_h / n_h movies of its stratum h (N_h movies, n_h of them
+# sampled). The seed is fixed, so every worker draws the same sample.
+# Estimates of a filtered subset are stratified domain estimates:
+#   total   T = sum_h N_h * mean_h(y)
+#   Var(T)  = sum_h N_h^2 * (1 - n_h / N_h) * var_h(y) / n_h
+# where y is a movie's value (1 for the count) when it passes the filters and
+# 0 otherwise. The average rating is the ratio of two totals, with its
+# variance from the linearized values (rating - average) / count.
+# այսինքն՝ սլայդերը շարժելիս նախ տեսնում ենք գնահատականը, հետո՝ ճշգրիտ թվերը։
+
+# Catalogs with at least this many movies get the approximate view (0 disables it)
+APPROXIMATE_MIN_ROWS = int(os.environ.get('DASHBOARD_APPROXIMATE_MIN_ROWS', '250000'))
+# Movies in the sample
+SAMPLE_ROWS = int(os.environ.get('DASHBOARD_SAMPLE_ROWS', '50000'))
+SAMPLE_MIN_PER_STRATUM = 30
+SAMPLE_SEED = 0
+# Normal quantile of the 95% confidence intervals
+CONFIDENCE_Z = 1.96
+
+
+class StratifiedSample:
+    """
+    Fixed sample of a catalog, stratified by decade and main genre.
+
+    Attributes:
+        rows (ndarray): Sorted row positions of the sampled movies
+        strata (ndarray): Stratum of each sampled movie
+        stratum_sizes (ndarray): Movies per stratum in the catalog (N_h)
+        stratum_samples (ndarray): Sampled movies per stratum (n_h)
+        weights (ndarray): N_h / n_h of each sampled movie
+        years, ratings, votes, gross, genre_masks (ndarray): Column values of the sampled movies
+        genre_vocabulary (list): Genre vocabulary of the catalog
+    """
+
+    def __init__(self, frame, size=SAMPLE_ROWS, seed=SAMPLE_SEED):
+        self.genre_vocabulary = frame.attrs['all_genres']
+        genres = pd.Categorical(frame['Genre'])
+        positions = {genre: i for i, genre in enumerate(self.genre_vocabulary)}
+        main_genres = np.array([positions.get(str(value).split(',')[0].strip(), -1)
+                                for value in genres.categories] + [-1], dtype=np.int64)
+        keys = (frame['Decade'].to_numpy().astype(np.int64) * (len(self.genre_vocabulary) + 1)
+                + main_genres[genres.codes] + 1)
+        keys, strata = np.unique(keys, return_inverse=True)
+        sizes = np.bincount(strata, minlength=len(keys))
+        wanted = np.rint(sizes * min(1.0, size / max(len(frame), 1))).astype(np.int64)
+        samples = np.minimum(sizes, np.maximum(wanted, SAMPLE_MIN_PER_STRATUM))
+
+        # The first n_h movies of each stratum in a random order
+        order = np.lexsort((np.random.default_rng(seed).random(len(frame)), strata))
+        offsets = np.cumsum(sizes) - sizes
+        sorted_strata = strata[order]
+        chosen = np.arange(len(frame)) - offsets[sorted_strata] < samples[sorted_strata]
+        self.rows = np.sort(order[chosen])
+        self.strata = strata[self.rows]
+        self.stratum_sizes = sizes.astype(np.float64)
+        self.stratum_samples = samples.astype(np.float64)
+        self.weights = self.stratum_sizes[self.strata] / self.stratum_samples[self.strata]
+        self.years = frame['Released_Year'].to_numpy()[self.rows]
+        # Stored values for the threshold, as FilterEngine compares them
+        self.rating_keys = frame['IMDB_Rating'].to_numpy()[self.rows]
+        self.ratings = widen_float32(self.rating_keys)
+        self.votes = frame['No_of_Votes'].to_numpy()[self.rows].astype(np.float64)
+        self.gross = frame['Gross'].to_numpy()[self.rows].astype(np.float64)
+        self.genre_masks = frame['Genre_Mask'].to_numpy()[self.rows]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def matches(self, filter_state):
+        """Which sampled movies pass the year, genre and rating filters of a filter state."""
+        year_range = filter_state['year_range']
+        keep = ((self.years >= year_range[0]) & (self.years <= year_range[1])
+                & (self.rating_keys >= self.rating_keys.dtype.type(filter_state['min_rating'])))
+        if filter_state['genres']:
+            keep &= genre_match(self.genre_masks, tuple(filter_state['genres']), filter_state['genre_mode'],
+                                self.genre_vocabulary)
+        return keep
+
+    def _total(self, values):
+        """Estimated catalog total of per-sampled-movie values, and its variance."""
+        n = self.stratum_samples
+        sums = np.bincount(self.strata, weights=values, minlength=len(n))
+        squares = np.bincount(self.strata, weights=values * values, minlength=len(n))
+        means = sums / n
+        variances = np.where(n > 1, (squares - n * means * means) / np.maximum(n - 1, 1), 0.0)
+        sizes = self.stratum_sizes
+        return (float(np.dot(sizes, means)),
+                float(np.sum(sizes * sizes * (1 - n / sizes) * np.maximum(variances, 0) / n)))
+
+    def metric_estimates(self, filter_state):
+        """
+        Estimates of the metric cards' values for a filter state.
+
+        Returns:
+            tuple: ((estimate, half-width of the 95% confidence interval) for
+            the movie count, average rating, total votes and total gross revenue)
+        """
+        keep = self.matches(filter_state).astype(np.float64)
+        count, count_variance = self._total(keep)
+        rating_total, _ = self._total(keep * self.ratings)
+        votes, votes_variance = self._total(keep * self.votes)
+        gross, gross_variance = self._total(keep * self.gross)
+        if count > 0:
+            avg_rating = rating_total / count
+            _, rating_variance = self._total(keep * (self.ratings - avg_rating) / count)
+        else:
+            avg_rating, rating_variance = float('nan'), 0.0
+        return tuple((estimate, CONFIDENCE_Z * np.sqrt(variance)) for estimate, variance in (
+            (count, count_variance), (avg_rating, rating_variance),
+            (votes, votes_variance), (gross, gross_variance)))
+
+    def yearly(self, filter_state):
+        """Estimated average rating and movie count per year, like yearly_average()."""
+        keep = self.matches(filter_state)
+        years, positions = np.unique(self.years[keep], return_inverse=True)
+        weights = self.weights[keep]
+        counts = np.bincount(positions, weights=weights, minlength=len(years))
+        sums = np.bincount(positions, weights=weights * self.ratings[keep], minlength=len(years))
+        return pd.DataFrame({'Year': years.astype(np.int64), 'Average_Rating': sums / counts,
+                             'Movie_Count': np.rint(counts).astype(np.int64)})
+
+    def genre_counts(self, filter_state):
+        """Estimated number of movies per genre, like genre_totals()."""
+        keep = self.matches(filter_state)
+        bits = (self.genre_masks[keep, None].astype(np.int64)
+                >> np.arange(len(self.genre_vocabulary), dtype=np.int64)) & 1
+        return pd.Series(np.rint(self.weights[keep] @ bits).astype(np.int64), index=self.genre_vocabulary)
+
+    def rating_values(self, filter_state):
+        """Ratings of the sampled movies that pass the filters, and the movies each stands for."""
+        keep = self.matches(filter_state)
+        return self.ratings[keep], self.weights[keep]
+
+# ============================================================================
+# DATA SOURCES
+# ============================================================================
+
+# A data source answers the dashboard's queries for one dataset version: the
+# row positions matching a filter state and the aggregates behind the metric
+# cards and the grouped charts. 'pandas' answers them from the in-memory
+# indexes above. 'sqlite' and 'duckdb' push the filter down as a WHERE clause
+# and the aggregates as GROUP BYs into an embedded database built from the
+# same table, so the backends can be compared on identical filter workloads.
+# The table stays in memory either way, for the per-movie chart data.
+DATA_SOURCE = os.environ.get('DASHBOARD_DATA_SOURCE', 'pandas')
+
+# Open database connections per SQL data source, shared by the server's threads
+SQL_POOL_SIZE = int(os.environ.get('DASHBOARD_SQL_POOL_SIZE', '8'))
+SQL_DATABASE_FORMAT = 1
+
+
+class PandasSource:
+    """
+    Queries answered from the in-memory filter engine, data cube and top-K indexes.
+
+    The aggregates return None for filters the indexes cannot answer
+    exactly; callers then aggregate the filtered rows instead.
+    """
+
+    name = 'pandas'
+
+    def __init__(self, frame):
+        self.filter_engine = FilterEngine(frame)
+        self.data_cube = DataCube(frame)
+        self.top_votes_index = TopVotesIndex(frame)
+        self.director_stats = DirectorStats(frame, self.data_cube)
+        self.director_names = self.director_stats.names
+
+    def rows(self, filter_state):
+        """Sorted row positions of the movies matching a filter state."""
+        return self.filter_engine.query(filter_state['year_range'], tuple(filter_state['genres']),
+                                        filter_state['min_rating'], filter_state['genre_mode'])
+
+    def totals(self, filter_state):
+        """(movie count, rating sum, votes, gross) for a filter state, or None."""
+        return self.data_cube.totals(filter_state)
+
+    def yearly(self, filter_state):
+        """(years, [movie count, rating sum] per year) for a filter state, or None."""
+        return self.data_cube.yearly(filter_state)
+
+    def genre_counts(self, filter_state):
+        """Movie count per genre for a filter state, or None."""
+        return self.data_cube.genre_counts(filter_state)
+
+    def director_totals(self, filter_state):
+        """(movie counts, rating sums) indexed like director_names for a filter state, or None."""
+        return self.director_stats.totals(filter_state)
+
+    def director_totals_for_rows(self, rows):
+        """(movie counts, rating sums) indexed like director_names over some row positions."""
+        return self.director_stats.totals_for_rows(rows)
+
+    def top_votes(self, filter_state, k):
+        """Row positions of the k most voted matching movies, most voted first."""
+        return self.top_votes_index.top(filter_state, k)
+
+
+class ConnectionPool:
+    """
+    Database connections shared by the server's threads, at most `size` of them.
+
+    A thread borrows a connection for one query and gives it back, so no
+    connection is used by two threads at once. A forked process (e.g. a
+    figure pool worker) opens its own connections instead of the parent's.
+    """
+
+    def __init__(self, connect, size):
+        self._connect = connect
+        self.size = size
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, opening one if none is idle, for the duration of a with block."""
+        if self._pid != os.getpid():
+            self._reset()
+        with self._slots:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self._connect()
+            try:
+                yield connection
+            finally:
+                self._idle.put(connection)
+
+
+class SQLSource(abc.ABC):
+    """
+    Queries pushed down to an embedded SQL database.
+
+    The database holds a single 'movies' table with the filter and aggregate
+    columns of one dataset version, keyed by row position and stored in
+    release year order, so a year range is a contiguous range of the table
+    like in FilterEngine. It is written next to the dataset cache once per
+    version (to a temporary file renamed into place) and opened read-only
+    through a ConnectionPool. Subclasses create and open the database file
+    of their engine.
+    """
+
+    name = None
+    suffix = None
+
+    def __init__(self, frame, cache_path, pool_size=SQL_POOL_SIZE):
+        codes, names = pd.factorize(frame['Director'], sort=True)
+        self.director_names = np.asarray(names, dtype=object)
+        self.genre_vocabulary = frame.attrs['all_genres']
+        ratings = frame['IMDB_Rating'].to_numpy()
+        # For director averages over rows the database cannot select (search hits)
+        self.director_codes = codes
+        self.director_ratings = widen_float32(ratings)
+        # The rating threshold is compared at the stored precision, as FilterEngine does
+        self.rating_type = ratings.dtype.type
+        self.path = f"{cache_path}.{frame.attrs['version']}-{SQL_DATABASE_FORMAT}{self.suffix}"
+        if not os.path.exists(self.path):
+            years = frame['Released_Year'].to_numpy().astype(np.int64)
+            self._write(pd.DataFrame({
+                'row_id': np.arange(len(frame), dtype=np.int64),
+                'year': years,
+                # Widened values for the averages, stored values for the threshold
+                'rating': widen_float32(ratings),
+                'rating_key': ratings.astype(np.float64),
+                'votes': frame['No_of_Votes'].to_numpy().astype(np.int64),
+                'gross': frame['Gross'].to_numpy().astype(np.float64),
+                'genre_mask': frame['Genre_Mask'].to_numpy().astype(np.int64),
+                # -1 for movies without a director
+                'director': codes.astype(np.int64),
+            }).take(np.argsort(years, kind='stable')), f"{glob.escape(cache_path)}.*{self.suffix}")
+        self.pool = ConnectionPool(self.connect, pool_size)
+
+    def _write(self, table, pattern):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp-{os.getpid()}"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        self.create(tmp_path, table)
+        os.replace(tmp_path, self.path)
+        # Keep the databases of the versions that can still be queried
+        for stale in sorted(glob.glob(pattern), key=os.path.getmtime)[:-DATASET_VERSIONS_KEPT]:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+    @abc.abstractmethod
+    def create(self, path, table):
+        """Write the movies table (already in year order) to a new database file."""
+
+    @abc.abstractmethod
+    def connect(self):
+        """Open a read-only connection to the database."""
+
+    def execute(self, sql, params=()):
+        """Run a query on a pooled connection and return all result rows."""
+        with self.pool.connection() as connection:
+            return connection.execute(sql, params).fetchall()
+
+    def fetch_column(self, sql, params=()):
+        """Run a query and return its single column as an int64 array."""
+        with self.pool.connection() as connection:
+            return np.fromiter((value for value, in connection.execute(sql, params)), dtype=np.int64)
+
+    def _where(self, filter_state):
+        """WHERE clause and its parameters for a filter state."""
+        year_range = filter_state['year_range']
+        clauses = ['year BETWEEN ? AND ?', 'rating_key >= ?']
+        params = [int(year_range[0]), int(year_range[1]),
+                  float(self.rating_type(filter_state['min_rating']))]
+        genres = filter_state['genres']
+        if genres:
+            wanted = int(genre_bitmask(genres, self.genre_vocabulary))
+            if filter_state['genre_mode'] != 'all':
+                clauses.append('(genre_mask & ?) <> 0')
+                params.append(wanted)
+            elif len(genres) == bin(wanted).count('1'):
+                clauses.append('(genre_mask & ?) = ?')
+                params += [wanted, wanted]
+            else:
+                # A genre missing from the vocabulary can never be matched by every movie
+                clauses.append('1 = 0')
+        return ' AND '.join(clauses), params
+
+    def rows(self, filter_state):
+        """Sorted row positions of the movies matching a filter state."""
+        where, params = self._where(filter_state)
+        # Sorting the row ids here is cheaper than an ORDER BY against the year order
+        return np.sort(self.fetch_column(f"SELECT row_id FROM movies WHERE {where}", params))
+
+    def totals(self, filter_state):
+        """(movie count, rating sum, votes, gross) for a filter state."""
+        where, params = self._where(filter_state)
+        return tuple(self.execute(
+            "SELECT COUNT(*), COALESCE(SUM(rating), 0), COALESCE(SUM(votes), 0), "
+            f"COALESCE(SUM(gross), 0) FROM movies WHERE {where}", params)[0])
+
+    def yearly(self, filter_state):
+        """(years, [movie count, rating sum] per year) for a filter state."""
+        where, params = self._where(filter_state)
+        result = self.execute(f"SELECT year, COUNT(*), SUM(rating) FROM movies WHERE {where} "
+                              "GROUP BY year ORDER BY year", params)
+        years = np.array([row[0] for row in result], dtype=np.int64)
+        return years, np.array([row[1:] for row in result], dtype=np.float64).reshape(-1, 2)
+
+    def genre_counts(self, filter_state):
+        """Movie count per genre for a filter state, one bit test per genre in a single scan."""
+        where, params = self._where(filter_state)
+        columns = ', '.join(f"COALESCE(SUM((genre_mask >> {i}) & 1), 0)"
+                            for i in range(len(self.genre_vocabulary)))
+        counts = self.execute(f"SELECT {columns} FROM movies WHERE {where}", params)[0]
+        return pd.Series(np.asarray(counts, dtype=np.int64), index=self.genre_vocabulary)
+
+    def director_totals(self, filter_state):
+        """(movie counts, rating sums) indexed like director_names for a filter state."""
+        where, params = self._where(filter_state)
+        result = np.array(self.execute(f"SELECT director, COUNT(*), SUM(rating) FROM movies "
+                                       f"WHERE {where} AND director >= 0 GROUP BY director", params),
+                          dtype=np.float64).reshape(-1, 3)
+        directors = result[:, 0].astype(np.int64)
+        counts = np.zeros(len(self.director_names))
+        sums = np.zeros(len(self.director_names))
+        counts[directors] = result[:, 1]
+        sums[directors] = result[:, 2]
+        return counts, sums
+
+    def director_totals_for_rows(self, rows):
+        """(movie counts, rating sums) indexed like director_names over some row positions."""
+        codes = self.director_codes[rows]
+        valid = codes >= 0
+        return (np.bincount(codes[valid], minlength=len(self.director_names)).astype(np.float64),
+                np.bincount(codes[valid], weights=self.director_ratings[rows][valid],
+                            minlength=len(self.director_names)))
+
+    def top_votes(self, filter_state, k):
+        """Row positions of the k most voted matching movies, most voted first."""
+        where, params = self._where(filter_state)
+        return self.fetch_column(f"SELECT row_id FROM movies WHERE {where} "
+                                 "ORDER BY votes DESC, row_id LIMIT ?", params + [int(k)])
+
+
+class SQLiteSource(SQLSource):
+    """SQLSource on SQLite, with the table clustered on (year, row_id)."""
+
+    name = 'sqlite'
+    suffix = '.sqlite'
+
+    def create(self, path, table):
+        connection = sqlite3.connect(path)
+        try:
+            connection.execute("CREATE TABLE movies (row_id INTEGER, year INTEGER, rating REAL, "
+                               "rating_key REAL, votes INTEGER, gross REAL, genre_mask INTEGER, "
+                               "director INTEGER, PRIMARY KEY (year, row_id)) WITHOUT ROWID")
+            for start in range(0, len(table), INGEST_CHUNK_ROWS):
+                chunk = table.iloc[start:start + INGEST_CHUNK_ROWS]
+                connection.executemany("INSERT INTO movies VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                       zip(*(chunk[column].tolist() for column in chunk.columns)))
+            connection.execute("ANALYZE")
+            connection.commit()
+        finally:
+            connection.close()
+
+    def connect(self):
+        uri = f"file:{urllib.request.pathname2url(self.path)}?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+
+class DuckDBSource(SQLSource):
+    """SQLSource on DuckDB, whose columnar scans suit the aggregates over large catalogs."""
+
+    name = 'duckdb'
+    suffix = '.duckdb'
+
+    def create(self, path, table):
+        connection = duckdb.connect(path)
+        try:
+            connection.register('frame', table)
+            connection.execute("CREATE TABLE movies AS SELECT * FROM frame")
+        finally:
+            connection.close()
+
+    def connect(self):
+        return duckdb.connect(self.path, read_only=True)
+
+    def fetch_column(self, sql, params=()):
+        with self.pool.connection() as connection:
+            return next(iter(connection.execute(sql, params).fetchnumpy().values())).astype(np.int64)
+
+
+DATA_SOURCES = {'pandas': PandasSource, 'sqlite': SQLiteSource, 'duckdb': DuckDBSource}
+
+
+def make_data_source(name, frame, source_path=DATA_FILE):
+    """
+    Build the data source of one dataset version.
+
+    Args:
+        name (str): One of DATA_SOURCES
+        frame (DataFrame): Preprocessed table of the version
+        source_path (str): Dataset file the table was loaded from (names the database file)
+    """
+    if name not in DATA_SOURCES:
+        raise ValueError(f"Unknown data source {name!r}, expected one of {tuple(DATA_SOURCES)}")
+    if name == 'duckdb' and duckdb is None:
+        print("DuckDB data source needs the duckdb package; using SQLite instead", file=sys.stderr)
+        name = 'sqlite'
+    if name == 'pandas':
+        return PandasSource(frame)
+    return DATA_SOURCES[name](frame, _dataset_cache_path(source_path))
+
+# ============================================================================
+# DATASET VERSIONS
+# ============================================================================
+
+# The source file is refreshed in place (e.g. nightly). Everything derived
+# from one version of it -- the table, its text store, the filter indexes,
+# the cube, the top-K indexes, the search index and the collaboration graph --
+# is bundled in a Dataset. A new version is built next to the live one (see
+# DATASET RELOAD) and made current with a single reference assignment. Filter states name the version they were made
+# for, so a request that started before a swap finishes on the same data.
+
+# Dataset versions that filter states can still resolve to: the current one
+# and the one it replaced
+DATASET_VERSIONS_KEPT = 2
+
+
+class Dataset:
+    """
+    One version of the catalog together with the data source that queries it.
+
+    Attributes:
+        frame (DataFrame): Preprocessed table
+        version (str): dataset_version() of the file it was loaded from
+        all_genres (list): Genre vocabulary (bit i of Genre_Mask is all_genres[i])
+        text_store (TextStore): Overview and Poster_Link of every row
+        source (PandasSource or SQLSource): Filters and aggregates over the table
+        search_index (SearchIndex): Inverted index for the search box
+        people_graph (PeopleGraph): Director and star collaboration graph
+        sample (StratifiedSample): Sample for the approximate view, or None
+            below APPROXIMATE_MIN_ROWS movies
+        year_bounds (tuple): First and last release year in the catalog
+    """
+
+    def __init__(self, frame, text_store, source, search_index, people_graph):
+        self.frame = frame
+        self.version = frame.attrs['version']
+        self.all_genres = frame.attrs['all_genres']
+        self.text_store = text_store
+        self.source = source
+        self.search_index = search_index
+        self.people_graph = people_graph
+        self.sample = (StratifiedSample(frame)
+                       if 0 < APPROXIMATE_MIN_ROWS <= len(frame) and len(frame) > SAMPLE_ROWS else None)
+        years = frame['Released_Year'].to_numpy()
+        self.year_bounds = (int(years.min()), int(years.max()))
+
+    @classmethod
+    def load(cls, path=DATA_FILE, source=DATA_SOURCE):
+        """Load a dataset file (through the dataset cache) and build its data source and indexes."""
+        frame = load_dataset(path)
+        text_store = open_text_store(path, frame.attrs['text_store'])
+        return cls(frame, text_store, make_data_source(source, frame, path),
+                   open_dataset_index(SearchIndex, frame, path, text_store),
+                   open_dataset_index(PeopleGraph, frame, path))
+
+
+# Datasets by version, oldest first, and the one new filter states are made for
+_datasets = OrderedDict()
+_current_dataset = None
+
+
+def add_dataset(dataset):
+    """Make a dataset resolvable by its version, without making it current yet."""
+    _datasets[dataset.version] = dataset
+
+
+def activate_dataset(dataset):
+    """Make a dataset the current one and forget versions older than the one it replaces."""
+    global _current_dataset
+    add_dataset(dataset)
+    _current_dataset = dataset
+    while len(_datasets) > DATASET_VERSIONS_KEPT:
+        _datasets.popitem(last=False)
+
+
+def current_dataset():
+    """The dataset version new filter states are made for."""
+    return _current_dataset
+
+
+def dataset_for(filter_state):
+    """
+    The dataset a filter state was made for.
+
+    A state of a version that has been retired since (e.g. one kept by a
+    browser tab left open) is served from the current version instead.
+    """
+    return _datasets.get(filter_state.get('version'), _current_dataset)
+
+
+activate_dataset(Dataset.load())
+
+# ============================================================================
+# INITIALIZE DASH APP
+# ============================================================================
+
+class DashboardApp(dash.Dash):
+    """Dash app whose layout endpoint answers with the page cached for the current dataset version."""
+
+    def serve_layout(self):
+        """
+        Answer Dash's layout request with the serialized page of the current version.
+
+        Dash would serialize the layout again for every page load; this way a
+        burst of new sessions costs one static response each.
+        """
+        return flask.Response(_current_page()[2], mimetype='application/json')
+
+
+app = DashboardApp(__name__)
+app.title = "IMDB Movies Dashboard - Interactive Analytics"
+# WSGI entry point for multi-worker servers (gunicorn movie_dashboard:server)
+server = app.server
+
+# Define color scheme
+COLOR_PRIMARY = '#1f77b4'
+COLOR_SECONDARY = '#ff7f0e'
+COLOR_SUCCESS = '#2ca02c'
+COLOR_DANGER = '#d62728'
+COLOR_WARNING = '#ff9800'
+
+# այստեղ սահմանում ենք գույների պալիտրա՝ վիզուալիզացիաների համար։
+
+# Default filter values, shared by the layout and the reset button
+# No genre selected: movies of all genres
+DEFAULT_GENRE = []
+DEFAULT_GENRE_MODE = 'any'
+DEFAULT_MIN_RATING = 5
+
+# Range of the minimum rating slider
+MIN_RATING_RANGE = (5, 10)
+
+# ============================================================================
+# DEFINE APP LAYOUT
+# ============================================================================
+
+# սա իրենից ներկայացնում է Dash հավելվածի գլխավոր կառուցվածքը՝
+# որը բաղկացած է տարբեր բաժիններից՝ հեդեր, ֆիլտրեր, մետրիկներ, վիզուալիզացիաներ և ֆուտեր։
+
+# հեդերը պարունակում է հավելվածի վերնագիրը և նկարագրությունը, դա այն հատվածն է,
+# որը տեսնում է օգտատերը առաջինը։ օրինակ՝ վերնագիրը "IMDB Top 1000 Movies Dashboard" և նկարագրությունը
+# "Interactive analytics and visualization of IMDB's highest-rated films"- սա ցույց է տալիս, թե ինչ է անում հավելվածը։
+# 
+
+# կոդի կառուցվածքը հետևյալն է՝ app.layout = html.Div([ - այստեղ սկսվում է գլխավոր բաժինը։
+#  սա html.Div է, որը պարունակում է բոլոր ենթաբաժինները։
+# html.Div([]) - սա ենթաբաժին է, որը կարող է պարունակել այլ HTML տարրեր կամ Dash կոմպոնենտներ։
+#  օրինակ՝ հեդերը, ֆիլտրերը, մետրիկները և այլն։ այսինքն html.Div-ը օգտագործվում է տարբեր բաժիններ ստեղծելու համար։
+# լեյաութը էջի սկելետն է, որը սահմանում է, թե ինչպես են տարրերը դասավորված և ինչպես են դրանք փոխազդում իրար հետ, 
+# իսկ տարրեր ասելով՝ նկատի ունենք տարբեր վիզուալ կոմպոնենտներ, ինչպիսիք են գրաֆիկները, սլայդերները, կոճակները և այլն։
+
+
+def build_layout(dataset):
+    """
+    Build the page of a dataset version, with its default view already filled in.
+
+    The slider bounds and genre options come from the version, and the
+    metric cards, the filter state and every graph hold the (cached) default
+    view, so a new page needs no callback until a filter changes.
+    """
+    year_min, year_max = dataset.year_bounds
+    layout = html.Div([
+        # սա հիմնական բաժինն է, որը պարունակում է բոլոր ենթաբաժինները։
+        # Header Section
+        html.Div([
+        # սա այն հատվածն է, որը տեսնում է օգտատերը առաջինը։
+            html.Div([
+                # սա այն հատվածն է, որը պարունակում է հավելվածի վերնագիրը և նկարագրությունը։
+                html.H1("🎬 IMDB Top 1000 Movies Dashboard", 
+                       style={'margin': '0', 'color': 'white', 'fontSize': '2.5em'}),
+                html.P("Interactive analytics and visualization of IMDB's highest-rated films",
+                      style={'margin': '10px 0 0 0', 'color': 'rgba(255,255,255,0.8)', 'fontSize': '1.1em'})
+            ], style={'padding': '30px'})
+        ], style={
+            'backgroundColor': '#1a1a2e',
+            'marginBottom': '30px',
+            'boxShadow': '0 2px 4px rgba(0,0,0,0.1)'
+        }),
+        # այսեղ մենք ինչ արեցինք - ստեղծեցինք html.Div, որը պարունակում է հեդերի բաժինը։
+        # Main Container
+        html.Div([
+            # ====================================================================
+            # FILTER SECTION
+            # ====================================================================
+            html.Div([
+                html.H2("📊 Filter Options", style={'marginBottom': '20px', 'color': '#1a1a2e'}),
+            #  ստեղ մենք ստեղծեցինք ֆիլտրերի բաժինը՝ որը թույլ է տալիս օգտատերերին ֆիլտրել տվյալները ըստ տարբեր չափանիշների։
+
+                html.Div([
+                    # Search Box (applied on Enter or when the box loses focus)
+                    html.Div([
+                        html.Label("Search:", style={'fontWeight': 'bold'}),
+                        dcc.Input(
+                            id='search-box',
+                            type='search',
+                            value='',
+                            debounce=True,
+                            placeholder='Words of titles and plots, director:"Christopher Nolan", star:"Tom Hanks"',
+                            style={'width': '100%', 'padding': '8px', 'marginTop': '6px',
+                                   'boxSizing': 'border-box'}
+                        ),
+                    ], style={'marginBottom': '25px'}),
+
+                    # Year Range Slider
+                    html.Div([
+                        html.Label("Year Range:", style={'fontWeight': 'bold'}),
+                        dcc.RangeSlider(
+                            id='year-slider',
+                            min=year_min,
+                            max=year_max,
+                            step=1,
+                            value=[year_min, year_max],
+                            marks={str(year): str(year) for year in range(
+                                year_min, 
+                                year_max + 1, 
+                                10)},
+                            # The filters are applied on release; while dragging,
+                            # drag_value drives the client-side preview
+                            updatemode='mouseup',
+                            tooltip={"placement": "bottom", "always_visible": True}
+                        ),
+                    ], style={'marginBottom': '25px'}),
+                
+                    # Genre Dropdown
+                    html.Div([
+                        html.Label("Select Genres (Optional):", style={'fontWeight': 'bold'}),
+                        dcc.Dropdown(
+                            id='genre-dropdown',
+                            options=[{'label': genre, 'value': genre} for genre in dataset.all_genres],
+                            value=DEFAULT_GENRE,
+                            placeholder='All Genres',
+                            multi=True
+                        ),
+                        # How multiple selected genres are combined
+                        dcc.RadioItems(
+                            id='genre-match',
+                            options=[{'label': ' Any selected genre (OR)', 'value': 'any'},
+                                     {'label': ' All selected genres (AND)', 'value': 'all'}],
+                            value=DEFAULT_GENRE_MODE,
+                            inline=True,
+                            labelStyle={'marginRight': '20px'},
+                            style={'marginTop': '8px'}
+                        ),
+                    ], style={'marginBottom': '25px'}),
+                
+                    # Rating Threshold Slider
+                    html.Div([
+                        html.Label("Minimum IMDB Rating:", style={'fontWeight': 'bold'}),
+                        dcc.Slider(
+                            id='rating-slider',
+                            min=MIN_RATING_RANGE[0],
+                            max=MIN_RATING_RANGE[1],
+                            step=0.1,
+                            value=DEFAULT_MIN_RATING,
+                            marks={i: f'{i}.0' for i in range(5, 11)},
+                            updatemode='mouseup',
+                            tooltip={"placement": "bottom", "always_visible": True}
+                        ),
+                    ], style={'marginBottom': '25px'}),
+                
+                    # Reset Filters Button
+                    html.Button(
+                        '🔄 Reset Filters',
+                        id='reset-button',
+                        n_clicks=0,
+                        #   - սա կոճակ է, որը օգտագործվում է ֆիլտրերը վերականգնելու համար։  0-ն նշանակում է, որ սկզբում կոճակը չի սեղմված։
+                        style={
+                            'padding': '12px 24px',
+                            'backgroundColor': COLOR_PRIMARY,
+                            'color': 'white',
+                            'border': 'none',
+                            'borderRadius': '5px',
+                            'cursor': 'pointer',
+                            'fontSize': '1em',
+                            'marginTop': '10px'
+                        }
+                    ),
+                ], style={
+                    'backgroundColor': '#f5f5f5',
+                    'padding': '20px',
+                    'borderRadius': '8px',
+                    'marginBottom': '25px'
+                }),
+            
+                # Normalized filter state shared by the chart callbacks
+                # (the filtered row indices themselves stay on the server)
+                dcc.Store(id='filter-state'),
+                # Compact columns for the drag preview (empty for large catalogs)
+                dcc.Store(id='preview-columns', data=preview_columns(dataset)),
+                # Name of the person whose collaborators are shown (None: the most connected actor)
+                dcc.Store(id='selected-person'),
+                # Exact metrics of an approximate filter state, once computed (see APPROXIMATE VIEW)
+                dcc.Store(id='refined-state'),
+            ], style={
+                'backgroundColor': 'white',
+                'padding': '25px',
+                'borderRadius': '10px',
+                'boxShadow': '0 2px 8px rgba(0,0,0,0.1)',
+                'marginBottom': '30px'
+            }),
+        
+            # ====================================================================
+            # SUMMARY METRICS SECTION
+            # ====================================================================
+    # այս հատվածը ցույց է տալիս հիմնական մետրիկները՝ որոնք թարմացվում են ֆիլտրերի հիման վրա։սա գտնվում է 
+    # ֆիլտրերի տակ քանի որ այն կարևոր տեղեկատվություն է տալիս օգտատիրոջը։
+    # սրանք դեշբորդի ամենաարագ տեսանելի մետրիկներն են, որոնք օգնում են օգտատիրոջը արագ հասկանալ տվյալների
+    #  հիմնական միտումները։
+
+
+            html.Div([
+                html.Div([
+                    html.Div([
+                        html.H3("Total Movies", style={'color': '#666', 'fontSize': '0.9em', 'margin': '0'}),
+                        html.H2(id='metric-count', children='0', style={'margin': '10px 0 0 0', 'color': COLOR_PRIMARY})
+                    ], style={'backgroundColor': '#f9f9f9', 'padding': '20px', 'borderRadius': '8px', 'textAlign': 'center'}),
+                
+                    html.Div([
+                        html.H3("Average Rating", style={'color': '#666', 'fontSize': '0.9em', 'margin': '0'}),
+                        html.H2(id='metric-avg-rating', children='0.0', style={'margin': '10px 0 0 0', 'color': COLOR_SUCCESS})
+                    ], style={'backgroundColor': '#f9f9f9', 'padding': '20px', 'borderRadius': '8px', 'textAlign': 'center'}),
+                
+                    html.Div([
+                        html.H3("Total Votes", style={'color': '#666', 'fontSize': '0.9em', 'margin': '0'}),
+                        html.H2(id='metric-total-votes', children='0', style={'margin': '10px 0 0 0', 'color': COLOR_SECONDARY})
+                    ], style={'backgroundColor': '#f9f9f9', 'padding': '20px', 'borderRadius': '8px', 'textAlign': 'center'}),
+                
+                    html.Div([
+                        html.H3("Total Gross Revenue", style={'color': '#666', 'fontSize': '0.9em', 'margin': '0'}),
+                        html.H2(id='metric-gross', children='$0', style={'margin': '10px 0 0 0', 'color': COLOR_WARNING})
+                    ], style={'backgroundColor': '#f9f9f9', 'padding': '20px', 'borderRadius': '8px', 'textAlign': 'center'}),
+                ], style={
+                    'display': 'grid',
+                    'gridTemplateColumns': 'repeat(auto-fit, minmax(200px, 1fr))',
+                    'gap': '15px',
+                    'marginBottom': '30px'
+                }),
+            ]),
+        
+            # ====================================================================
+            # VISUALIZATIONS SECTION
+            # ====================================================================
+            html.Div([
+                # Row 1: Two main visualizations
+                html.Div([
+                    # Visualization 1: Rating vs Votes Scatter Plot
+                    html.Div([
+                        dcc.Graph(
+                            id='scatter-rating-votes',
+                            style={'height': '400px'}
+                        )
+                    ], style={
+                        'width': '48%',
+                        'display': 'inline-block',
+                        'marginRight': '2%',
+                        'backgroundColor': 'white',
+                        'padding': '15px',
+                        'borderRadius': '10px',
+                        'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
+                    }),
+                
+                    # Visualization 2: Rating Distribution Histogram
+                    html.Div([
+                        dcc.Graph(
+                            id='histogram-ratings',
+                            style={'height': '400px'}
+                        )
+                    ], style={
+                        'width': '48%',
+                        'display': 'inline-block',
+                        'backgroundColor': 'white',
+                        'padding': '15px',
+                        'borderRadius': '10px',
+                        'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
+                    }),
+                ], style={'marginBottom': '30px', 'display': 'flex', 'gap': '15px'}),
+            
+                # Row 2: Time series and genre analysis
+                html.Div([
+                    # Visualization 3: Average Rating Over Years (Time Series)
+                    html.Div([
+                        dcc.Graph(
+                            id='line-rating-trend',
+                            style={'height': '400px'}
+                        )
+                    ], style={
+                        'width': '48%',
+                        'display': 'inline-block',
+                        'marginRight': '2%',
+                        'backgroundColor': 'white',
+                        'padding': '15px',
+                        'borderRadius': '10px',
+                        'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
+                    }),
+                
+                    # Visualization 4: Top Genres Bar Chart
+                    html.Div([
+                        dcc.Graph(
+                            id='bar-top-genres',
+                            style={'height': '400px'}
+                        )
+                    ], style={
+                        'width': '48%',
+                        'display': 'inline-block',
+                        'backgroundColor': 'white',
+                        'padding': '15px',
+                        'borderRadius': '10px',
+                        'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
+                    }),
+                ], style={'marginBottom': '30px', 'display': 'flex', 'gap': '15px'}),
+            
+                # Row 3: Top directors and revenue analysis
+                html.Div([
+                    # Visualization 5: Top Directors by Average Rating
+                    html.Div([
+                        dcc.Graph(
+                            id='bar-top-directors',
+                            style={'height': '400px'}
+                        )
+                    ], style={
+                        'width': '48%',
+                        'display': 'inline-block',
+                        'marginRight': '2%',
+                        'backgroundColor': 'white',
+                        'padding': '15px',
+                        'borderRadius': '10px',
+                        'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
+                    }),
+                
+                    # Visualization 6: Rating vs Revenue Scatter
+                    html.Div([
+                        dcc.Graph(
+                            id='scatter-rating-revenue',
+                            style={'height': '400px'}
+                        )
+                    ], style={
+                        'width': '48%',
+                        'display': 'inline-block',
+                        'backgroundColor': 'white',
+                        'padding': '15px',
+                        'borderRadius': '10px',
+                        'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
+                    }),
+                ], style={'marginBottom': '30px', 'display': 'flex', 'gap': '15px'}),
+            
+                # Row 4: Top 30 Popular Films
+                html.Div([
+                    html.Div([
+                        dcc.Graph(
+                            id='bar-top-30-films',
+                            style={'height': '600px'}
+                        )
+                    ], style={
+                        'width': '100%',
+                        'backgroundColor': 'white',
+                        'padding': '15px',
+                        'borderRadius': '10px',
+                        'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
+                    }),
+                ], style={'marginBottom': '30px'}),
+            
+                # Row 5: People - collaborations and director/star pairs (from the collaboration graph)
+                html.Div([
+                    # Visualization 8: Most Frequent Collaborations
+                    html.Div([
+                        dcc.Graph(
+                            id='bar-top-collaborations',
+                            style={'height': '400px'}
+                        )
+                    ], style={
+                        'width': '48%',
+                        'display': 'inline-block',
+                        'marginRight': '2%',
+                        'backgroundColor': 'white',
+                        'padding': '15px',
+                        'borderRadius': '10px',
+                        'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
+                    }),
+                
+                    # Visualization 10: Top Director & Star Pairs
+                    html.Div([
+                        dcc.Graph(
+                            id='bar-director-star-pairs',
+                            style={'height': '400px'}
+                        )
+                    ], style={
+                        'width': '48%',
+                        'display': 'inline-block',
+                        'backgroundColor': 'white',
+                        'padding': '15px',
+                        'borderRadius': '10px',
+                        'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
+                    }),
+                ], style={'marginBottom': '30px', 'display': 'flex', 'gap': '15px'}),
+            
+                # Row 6: Most connected actors and the collaborators of the selected person
+                html.Div([
+                    # Visualization 9: Most Connected Actors
+                    html.Div([
+                        dcc.Graph(
+                            id='bar-connected-actors',
+                            style={'height': '400px'}
+                        )
+                    ], style={
+                        'width': '48%',
+                        'display': 'inline-block',
+                        'marginRight': '2%',
+                        'backgroundColor': 'white',
+                        'padding': '15px',
+                        'borderRadius': '10px',
+                        'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
+                    }),
+                
+                    # Visualization 11: Collaborators of one person
+                    html.Div([
+                        dcc.Graph(
+                            id='bar-person-collaborators',
+                            style={'height': '400px'}
+                        )
+                    ], style={
+                        'width': '48%',
+                        'display': 'inline-block',
+                        'backgroundColor': 'white',
+                        'padding': '15px',
+                        'borderRadius': '10px',
+                        'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
+                    }),
+                ], style={'marginBottom': '30px', 'display': 'flex', 'gap': '15px'}),
+            
+                # Row 7: Film details (overview and poster are read from the text store on click)
+                html.Div([
+                    html.Div([
+                        html.H3("🎞️ Film Details", style={'margin': '0 0 15px 0', 'color': '#1a1a2e'}),
+                        html.Div(
+                            id='movie-detail',
+                            children=html.P("Click a film in the Rating vs Popularity plot or the "
+                                            "Top 30 chart to see its details.",
+                                            style={'color': '#666', 'margin': '0'})
+                        ),
+                    ], style={
+                        'width': '100%',
+                        'backgroundColor': 'white',
+                        'padding': '25px',
+                        'borderRadius': '10px',
+                        'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
+                    }),
+                ], style={'marginBottom': '30px'}),
+            ], style={
+                'padding': '0'
+            }),
+        
+        ], style={'maxWidth': '1400px', 'margin': '0 auto', 'padding': '0 20px'}),
+    
+        # Footer
+        html.Div([
+            html.P("Data Source: IMDB Top 1000 Movies | Last Updated: February 2026 | "
+                   "Dashboard built with Dash, Plotly, and Pandas",
+                  style={'margin': '0', 'color': 'rgba(255,255,255,0.7)', 'fontSize': '0.9em'})
+        ], style={
+            'backgroundColor': '#1a1a2e',
+            'padding': '20px',
+            'textAlign': 'center',
+            'marginTop': '40px',
+            'color': 'white'
+        })
+    ], style={'backgroundColor': '#f0f2f5', 'minHeight': '100vh'})
+
+    filter_state = default_filter_state(dataset)
+    metrics = cached_metrics(filter_state)
+    filter_state['count'] = metrics[0]
+    layout['filter-state'].data = filter_state
+    for card_id, value in zip(METRIC_CARD_IDS, metrics):
+        layout[card_id].children = value
+    for graph_id in FIGURE_BUILDERS:
+        layout[graph_id].figure = chart_figure(graph_id, filter_state)
+    layout['bar-person-collaborators'].figure = person_figure(filter_state)
+    return layout
+
+
+# Metric cards in the order of compute_metrics' values
+METRIC_CARD_IDS = ['metric-count', 'metric-avg-rating', 'metric-total-votes', 'metric-gross']
+
+# Page of the current dataset version, as components and as JSON, built once per version
+_served_layout = (None, None, None)
+# Held while a page is built, so concurrent first requests build it once
+_served_layout_lock = threading.Lock()
+
+
+def _current_page():
+    global _served_layout
+    dataset = current_dataset()
+    page = _served_layout
+    if page[0] != dataset.version:
+        with _served_layout_lock:
+            # Another request may have built it while this one waited
+            if _served_layout[0] != dataset.version:
+                layout = build_layout(dataset)
+                _served_layout = (dataset.version, layout, pio.json.to_json_plotly(layout))
+            page = _served_layout
+    return page
+
+
+def serve_layout():
+    """
+    The page for a new visitor.
+
+    The page is built once per dataset version, so a reloaded dataset shows
+    up on the next page load without restarting the server.
+    """
+    return _current_page()[1]
+
+# ============================================================================
+# SHARED RESULT STORE
+# ============================================================================
+
+# Behind a load balancer every worker process has its own result cache, so the
+# same filter state would be computed once per worker. With a shared result
+# store, serialized figures, metrics and filtered row indices are published
+# under a hash of their key (which includes the dataset version) and reused by
+# the other workers. Computations are coalesced: concurrent requests for one
+# key within a process wait for a single computation (SingleFlight), and
+# across processes the store's per-key lock lets one worker compute while the
+# others wait and then read its result.
+# այսինքն՝ նույն ֆիլտրի արդյունքը հաշվվում է մեկ անգամ, նույնիսկ եթե հարցումները գալիս են տարբեր պրոցեսներից։
+
+# 'none' (per-process caches only), 'disk' or 'redis'
+RESULT_STORE = os.environ.get('DASHBOARD_RESULT_STORE', 'none')
+RESULT_STORE_DIR = os.environ.get('DASHBOARD_RESULT_STORE_DIR', os.path.join(DATASET_CACHE_DIR, 'results'))
+RESULT_STORE_MAX_BYTES = int(float(os.environ.get('DASHBOARD_RESULT_STORE_MB', '1024')) * 1024 * 1024)
+REDIS_URL = os.environ.get('DASHBOARD_REDIS_URL', 'redis://localhost:6379/0')
+# Seconds a result is kept in Redis
+RESULT_STORE_TTL = int(os.environ.get('DASHBOARD_RESULT_STORE_TTL', '3600'))
+# Longest wait for another worker's computation before computing it anyway
+RESULT_STORE_LOCK_SECONDS = 60
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent computations of the same key within a process.
+
+    The first caller for a key computes it; callers arriving while it runs
+    wait and get the same result (or exception).
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, compute):
+        """Return compute(), or the result of the call for key that is already running."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+        try:
+            result = compute()
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class DiskResultStore:
+    """
+    Result store in a directory shared by the worker processes of one host.
+
+    Each result is one file, written to a temporary name and renamed into
+    place. The directory is kept under max_bytes by deleting the least
+    recently used files (reads refresh a file's modification time).
+
+    Keys are locked with fcntl locks, which the kernel releases if the
+    holding worker dies, on one of LOCK_SHARDS lock files chosen by the key's
+    leading hex digits. Lock files are never deleted: a worker waiting on a
+    deleted file would no longer exclude one that creates it again.
+    """
+
+    # Puts between two checks of the directory size
+    PRUNE_EVERY = 32
+    # Leading hex digits of a key that pick its lock file (16**3 lock files)
+    LOCK_SHARD_DIGITS = 3
+    # Seconds between two attempts while another worker holds a key's lock
+    POLL_INTERVAL = 0.02
+
+    def __init__(self, directory, max_bytes):
+        self.lock_directory = os.path.join(directory, 'locks')
+        os.makedirs(self.lock_directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._puts = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.bin')
+
+    def _lock_path(self, key):
+        return os.path.join(self.lock_directory, key[:self.LOCK_SHARD_DIGITS] + '.lock')
+
+    def get(self, key):
+        """Return the bytes stored for key, or None."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                payload = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return payload
+
+    def put(self, key, payload):
+        """Store bytes for key."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=key, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, self._path(key))
+        self._puts += 1
+        if self._puts % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    @contextmanager
+    def lock(self, key):
+        """
+        Hold the cross-process lock of a key.
+
+        As with RedisResultStore, a worker stops waiting once the key's result
+        appears or after RESULT_STORE_LOCK_SECONDS, and then goes on without
+        the lock.
+        """
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_path(key), 'a') as f:
+            deadline = time.monotonic() + RESULT_STORE_LOCK_SECONDS
+            acquired = self._try_lock(f)
+            while not acquired and time.monotonic() < deadline:
+                if os.path.exists(self._path(key)):
+                    break
+                time.sleep(self.POLL_INTERVAL)
+                acquired = self._try_lock(f)
+            try:
+                yield
+            finally:
+                if acquired:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _try_lock(f):
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    def prune(self):
+        """Delete the least recently used results until the directory is within max_bytes."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.bin'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Delete every stored result (the lock files stay)."""
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+class RedisResultStore:
+    """
+    Result store in Redis, shared by workers on any number of hosts.
+
+    Results expire after ttl seconds. The per-key lock is a SET NX key with
+    an expiry, so a crashed worker cannot hold it forever; a worker that
+    does not get the lock waits until the result appears or the lock is
+    released, then reads it (or computes it itself).
+
+    Args:
+        client: redis.Redis or any object with the same get/set/delete/scan_iter
+            methods (e.g. fakeredis in tests)
+        prefix (str): Namespace of the keys
+        ttl (int): Seconds results are kept
+    """
+
+    # Seconds between two checks while waiting for another worker's result
+    POLL_INTERVAL = 0.02
+
+    def __init__(self, client, prefix='dashboard:result:', ttl=RESULT_STORE_TTL):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def put(self, key, payload):
+        self.client.set(self.prefix + key, payload, ex=self.ttl)
+
+    @contextmanager
+    def lock(self, key):
+        lock_key = f"{self.prefix}{key}:lock"
+        token = f"{os.getpid()}-{threading.get_ident()}-{time.monotonic_ns()}".encode()
+        deadline = time.monotonic() + RESULT_STORE_LOCK_SECONDS
+        acquired = self.client.set(lock_key, token, nx=True, ex=RESULT_STORE_LOCK_SECONDS)
+        while not acquired and time.monotonic() < deadline:
+            if self.client.get(self.prefix + key) is not None:
+                break
+            time.sleep(self.POLL_INTERVAL)
+            acquired = self.client.set(lock_key, token, nx=True, ex=RESULT_STORE_LOCK_SECONDS)
+        try:
+            yield
+        finally:
+            if acquired and self.client.get(lock_key) == token:
+                self.client.delete(lock_key)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+
+def make_result_store(name=RESULT_STORE):
+    """
+    Create the shared result store selected by DASHBOARD_RESULT_STORE.
+
+    Returns:
+        DiskResultStore, RedisResultStore or None: None for 'none'
+    """
+    if name == 'none':
+        return None
+    if name == 'redis':
+        if redis is not None:
+            return RedisResultStore(redis.Redis.from_url(REDIS_URL))
+        print("Result store 'redis' needs `pip install redis`; using 'disk' instead", file=sys.stderr)
+        name = 'disk'
+    if name != 'disk':
+        raise ValueError(f"Unknown result store {name!r}, expected 'none', 'disk' or 'redis'")
+    try:
+        return DiskResultStore(RESULT_STORE_DIR, RESULT_STORE_MAX_BYTES)
+    except OSError as exc:
+        print(f"Warning: could not create result store: {exc}", file=sys.stderr)
+        return None
+
+
+result_store = make_result_store()
+single_flight = SingleFlight()
+
+
+def result_store_key(key):
+    """Store key (hex digest) of a result key such as (graph id, filter state key)."""
+    return hashlib.sha256(json.dumps(key).encode('utf-8')).hexdigest()
+
+
+def fetch_shared(key, decode=bytes.decode):
+    """Return the decoded result published for key, or None (also without a store)."""
+    if result_store is None:
+        return None
+    payload = result_store.get(result_store_key(key))
+    return None if payload is None else decode(payload)
+
+
+def publish_shared(key, value, encode=str.encode):
+    """Publish a computed result for the other workers (no-op without a store)."""
+    if result_store is not None:
+        result_store.put(result_store_key(key), encode(value))
+
+
+def shared_compute(key, compute, encode=str.encode, decode=bytes.decode):
+    """
+    Compute a result at most once across concurrent requests and worker processes.
+
+    Concurrent callers in this process are coalesced by single_flight. The
+    caller that computes takes the store's lock for the key, so a worker
+    that waited on another one reads the published result instead of
+    computing it again.
+
+    Args:
+        key: JSON-serializable result key (includes the dataset version)
+        compute: Function returning the result
+        encode/decode: Conversion between the result and the stored bytes
+    """
+    def compute_once():
+        if result_store is None:
+            return compute()
+        store_key = result_store_key(key)
+        with result_store.lock(store_key):
+            payload = result_store.get(store_key)
+            if payload is not None:
+                return decode(payload)
+            value = compute()
+            result_store.put(store_key, encode(value))
+            return value
+
+    return single_flight.do(key, compute_once)
+
+# ============================================================================
+# RESULT CACHE
+# ============================================================================
+
+# Memory budget for cached callback outputs (serialized figures and metrics)
+RESULT_CACHE_MAX_BYTES = int(float(os.environ.get('DASHBOARD_RESULT_CACHE_MB', '256')) * 1024 * 1024)
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of serialized callback outputs.
+
+    Entries are JSON strings and the cache is bounded by their total size in
+    bytes rather than by entry count, since one figure can be a few KB or
+    tens of MB depending on the filter. Pinned entries (the default view that
+    the reset button returns to) are never evicted. Entries are tagged with
+    the dataset version they were computed from, so a new version can be
+    warmed up next to the live one; the entries of a version, pinned ones
+    included, are dropped when it is retired (see retain_versions).
+
+    A miss is looked up in the shared result store before it is computed, and
+    computed results are published there (see SHARED RESULT STORE).
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._pinned = set()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def retain_versions(self, versions):
+        """Drop every entry of a dataset version not in versions, pinned ones included."""
+        versions = set(versions)
+        with self._lock:
+            for key in [key for key, version in self._versions.items() if version not in versions]:
+                self._bytes -= len(self._entries.pop(key))
+                self._pinned.discard(key)
+                del self._versions[key]
+
+    def clear(self):
+        """Drop every entry, pinned ones included (counters are kept)."""
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._entries.clear()
+        self._versions.clear()
+        self._pinned.clear()
+        self._bytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key, version=None):
+        """Return the cached payload for key (from the shared store on a local miss), or None."""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return payload
+        payload = self.load_shared(key, version)
+        if payload is None:
+            with self._lock:
+                self.misses += 1
+        return payload
+
+    def load_shared(self, key, version=None):
+        """Copy a result published by another worker into this cache. Returns it, or None."""
+        payload = fetch_shared(key)
+        if payload is not None:
+            self.put(key, payload, version=version)
+            with self._lock:
+                self.shared_hits += 1
+        return payload
+
+    def put(self, key, payload, pinned=False, publish=False, version=None):
+        """
+        Store a payload, evicting least recently used unpinned entries to stay in budget.
+
+        With publish=True the payload is also published to the shared result store.
+        version is the dataset version it was computed from (None: never retired).
+        """
+        if publish:
+            publish_shared(key, payload)
+        size = len(payload)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+                self._versions.pop(key, None)
+            if pinned:
+                self._pinned.add(key)
+            elif size > self.max_bytes:
+                # Larger than the whole budget: not worth evicting everything for
+                return
+            self._entries[key] = payload
+            if version is not None:
+                self._versions[key] = version
+            self._bytes += size
+            for old_key in list(self._entries):
+                if self._bytes <= self.max_bytes:
+                    break
+                if old_key in self._pinned:
+                    continue
+                self._bytes -= len(self._entries.pop(old_key))
+                self._versions.pop(old_key, None)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute, pinned=False, version=None):
+        """
+        Return the cached payload for key, computing and storing it on a miss.
+
+        Concurrent misses for one key are computed once (see shared_compute).
+        """
+        payload = self.get(key, version)
+        if payload is None:
+            payload = shared_compute(key, compute)
+            self.put(key, payload, pinned=pinned, version=version)
+        elif pinned and key not in self._pinned:
+            # Loaded from the shared store as a regular entry
+            self.put(key, payload, pinned=True, version=version)
+        return payload
+
+    def stats(self):
+        """Counters for sizing the cache."""
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'versions': sorted(set(self._versions.values())),
+                'entries': len(self._entries),
+                'pinned_entries': len(self._pinned),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'coalesced': single_flight.coalesced,
+                'shared_store': type(result_store).__name__ if result_store is not None else None,
+            }
+
+
+result_cache = ResultCache(RESULT_CACHE_MAX_BYTES)
+
+
+@app.server.route('/cache-stats')
+def cache_stats():
+    """Result cache hit/miss/eviction counters as JSON."""
+    return result_cache.stats()
+
+
+@app.server.route('/data-quality')
+def data_quality():
+    """Data-quality report of the current dataset version as JSON."""
+    return {'version': current_dataset().version,
+            **(current_dataset().frame.attrs.get('quality_report') or {})}
+
+# ============================================================================
+# INSTRUMENTATION
+# ============================================================================
+
+# Upper bounds (seconds) of the latency histogram buckets
+STAGE_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# When set, every Dash callback request is profiled with cProfile and the
+# stats are written to this directory (one .prof file per request)
+PROFILE_DIR = os.environ.get('DASHBOARD_PROFILE_DIR')
+
+
+class StageTimings:
+    """
+    In-process latency histograms, one per callback stage.
+
+    Stages are 'filter' (index query), 'metrics', 'callback' (the whole
+    filter callback) and, per graph, 'figure:<graph id>' (building the
+    figure) and 'serialize:<graph id>' (converting it to JSON).
+    """
+
+    def __init__(self, buckets=STAGE_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        """Record one duration for a stage."""
+        position = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = {'buckets': [0] * (len(self.buckets) + 1),
+                                                   'sum': 0.0, 'count': 0}
+            histogram['buckets'][position] += 1
+            histogram['sum'] += seconds
+            histogram['count'] += 1
+
+    @contextmanager
+    def time(self, stage):
+        """Context manager that records how long its block takes."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def snapshot(self):
+        """Copy of the histograms: {stage: {'buckets': [...], 'sum': float, 'count': int}}."""
+        with self._lock:
+            return {stage: {'buckets': list(histogram['buckets']),
+                            'sum': histogram['sum'], 'count': histogram['count']}
+                    for stage, histogram in self._stages.items()}
+
+
+stage_timings = StageTimings()
+
+
+def prometheus_metrics():
+    """Stage histograms and result cache counters in the Prometheus text format."""
+    lines = ['# HELP dashboard_stage_seconds Time spent in each stage of the dashboard callbacks.',
+             '# TYPE dashboard_stage_seconds histogram']
+    for stage, histogram in sorted(stage_timings.snapshot().items()):
+        cumulative = 0
+        for upper, count in zip(stage_timings.buckets + (float('inf'),), histogram['buckets']):
+            cumulative += count
+            le = '+Inf' if upper == float('inf') else repr(upper)
+            lines.append(f'dashboard_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+        lines.append(f'dashboard_stage_seconds_sum{{stage="{stage}"}} {histogram["sum"]!r}')
+        lines.append(f'dashboard_stage_seconds_count{{stage="{stage}"}} {histogram["count"]}')
+
+    cache = result_cache.stats()
+    for name, kind, value, description in [
+            ('hits_total', 'counter', cache['hits'], 'Result cache lookups that were served from the cache.'),
+            ('shared_hits_total', 'counter', cache['shared_hits'],
+             'Result cache lookups that were served from the shared result store.'),
+            ('misses_total', 'counter', cache['misses'], 'Result cache lookups that had to be computed.'),
+            ('coalesced_total', 'counter', cache['coalesced'],
+             'Computations that waited for an identical one already running in this process.'),
+            ('evictions_total', 'counter', cache['evictions'], 'Entries evicted to stay within the byte budget.'),
+            ('entries', 'gauge', cache['entries'], 'Entries currently in the result cache.'),
+            ('bytes', 'gauge', cache['bytes'], 'Bytes of serialized results currently cached.'),
+            ('max_bytes', 'gauge', cache['max_bytes'], 'Byte budget of the result cache.')]:
+        lines.append(f'# HELP dashboard_result_cache_{name} {description}')
+        lines.append(f'# TYPE dashboard_result_cache_{name} {kind}')
+        lines.append(f'dashboard_result_cache_{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+@app.server.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint."""
+    return prometheus_metrics(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+if PROFILE_DIR:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    _profile_sequence = itertools.count()
+
+    @app.server.before_request
+    def start_request_profile():
+        if flask.request.path.endswith('/_dash-update-component'):
+            flask.g.profiler = cProfile.Profile()
+            flask.g.profiler.enable()
+
+    @app.server.after_request
+    def dump_request_profile(response):
+        profiler = flask.g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            body = flask.request.get_json(silent=True) or {}
+            output = re.sub(r'[^A-Za-z0-9]+', '_', str(body.get('output', 'callback')))[:80]
+            profiler.dump_stats(os.path.join(
+                PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{next(_profile_sequence):06d}-{output}.prof"))
+        return response
+
+# ============================================================================
+# CALLBACKS - INTERACTIVE UPDATES
+# ============================================================================
+
+# The filter callback resolves the controls to a compact filter state and
+# stores it in the 'filter-state' dcc.Store. The matching row indices stay on
+# the server, keyed by that state, and each chart has its own callback that
+# reads them. The browser draws every chart as soon as its response arrives,
+# and the chart requests are served in parallel by the threaded server.
+# սա նշանակում է, որ ամեն գրաֆիկ ունի իր առանձին callback-ը։
+
+# Number of filtered row-index arrays kept on the server
+FILTERED_INDEX_CACHE_SIZE = 64
+
+# Row indices by (dataset version, filter state key)
+_filtered_index_cache = OrderedDict()
+_filtered_index_lock = threading.Lock()
+
+
+def _triggered_id():
+    """Return the id of the component that triggered the current callback, if any."""
+    try:
+        return dash.callback_context.triggered_id
+    except MissingCallbackContextException:
+        # Called directly (e.g. from a script), not from a Dash request
+        return None
+
+
+def make_filter_state(year_range, selected_genre, min_rating, genre_mode='any', dataset=None, search=''):
+    """
+    Normalize the filter controls into a JSON-serializable filter state.
+
+    Equivalent control values (e.g. genre order, a genre mode that does not
+    matter for a single genre, search words in another order or case) give
+    the same state and the same 'key'. The state is made for one dataset
+    version (the current one by default).
+    """
+    genres = normalize_genre_selection(selected_genre)
+    if len(genres) < 2:
+        genre_mode = DEFAULT_GENRE_MODE
+    state = {
+        'year_range': [int(year_range[0]), int(year_range[1])],
+        'genres': list(genres),
+        'genre_mode': genre_mode,
+        'min_rating': round(float(min_rating), 6),
+        'search': parse_search(search),
+        'version': (dataset or current_dataset()).version,
+    }
+    return _with_key(state)
+
+
+def _with_key(state):
+    state['key'] = json.dumps(state, sort_keys=True)
+    return state
+
+
+def _without_search(filter_state):
+    """The same filter state without its search clauses."""
+    state = {name: value for name, value in filter_state.items() if name not in ('key', 'count', 'approximate')}
+    state['search'] = []
+    return _with_key(state)
+
+
+def _encode_rows(rows):
+    return np.asarray(rows, dtype=np.int64).tobytes()
+
+
+def _decode_rows(payload):
+    return np.frombuffer(payload, dtype=np.int64)
+
+
+def filtered_rows(filter_state):
+    """
+    Return the row indices for a filter state, from the server-side cache when possible.
+
+    A state produced by another worker process is read from the shared result
+    store, or recomputed from its values.
+    """
+    key = filter_state['key']
+    with _filtered_index_lock:
+        rows = _filtered_index_cache.get((filter_state['version'], key))
+        if rows is not None:
+            _filtered_index_cache.move_to_end((filter_state['version'], key))
+            return rows
+
+    def compute():
+        if filter_state['search']:
+            # Search hits that also pass the (cached) year/genre/rating filters
+            base_rows = filtered_rows(_without_search(filter_state))
+            with stage_timings.time('search'):
+                return dataset_for(filter_state).search_index.query(filter_state['search'], within=base_rows)
+        with stage_timings.time('filter'):
+            return dataset_for(filter_state).source.rows(filter_state)
+
+    rows = fetch_shared(('rows', key), decode=_decode_rows)
+    if rows is None:
+        rows = shared_compute(('rows', key), compute, encode=_encode_rows, decode=_decode_rows)
+    remember_rows(filter_state, rows)
+    return rows
+
+
+def remember_rows(filter_state, rows):
+    """Store the row indices of a filter state in the server-side cache."""
+    key = (filter_state['version'], filter_state['key'])
+    with _filtered_index_lock:
+        _filtered_index_cache[key] = rows
+        _filtered_index_cache.move_to_end(key)
+        while len(_filtered_index_cache) > FILTERED_INDEX_CACHE_SIZE:
+            _filtered_index_cache.popitem(last=False)
+
+
+def clear_caches():
+    """Empty the result cache, the filtered index cache and the shared store (used by the benchmarks)."""
+    result_cache.clear()
+    with _filtered_index_lock:
+        _filtered_index_cache.clear()
+    if result_store is not None:
+        result_store.clear()
+
+
+def filtered_frame(filter_state, columns=None):
+    """Gather the filtered rows of the table (or of some of its columns) for a filter state."""
+    return frame_rows(dataset_for(filter_state), filtered_rows(filter_state), columns)
+
+
+def frame_rows(dataset, rows, columns=None):
+    """
+    Gather rows of a dataset's table (or of some of its columns) by position.
+
+    float32 columns are widened back to float64 so charts show the original values.
+    """
+    if columns is None:
+        frame = dataset.frame.take(rows)
+    else:
+        # Column by column: frame[columns] would first copy every selected column in full
+        frame = pd.DataFrame({column: dataset.frame[column].take(rows) for column in columns})
+    for column in frame.columns[frame.dtypes == np.float32]:
+        frame[column] = widen_float32(frame[column].to_numpy())
+    return frame
+
+
+def default_filter_state(dataset=None):
+    """Filter state of the initial view, which the reset button returns to."""
+    dataset = dataset or current_dataset()
+    return make_filter_state(list(dataset.year_bounds), DEFAULT_GENRE, DEFAULT_MIN_RATING,
+                             DEFAULT_GENRE_MODE, dataset)
+
+
+# Rating sums and averages are kept in millionths. A sum accumulated in
+# another order (the data cube's partial sums, a SQL SUM, the filtered rows)
+# differs from the others only in its last bits, so rounding it first gives
+# the same average on every path. The metric card rounds that average half
+# up to two decimals (an average of exactly 8.075 is shown as 8.08), like the
+# drag preview in the browser.
+RATING_MICROS = 10 ** 6
+
+
+def average_rating(rating_sum, count):
+    """Average of count ratings from their sum, to the nearest millionth (nan without movies)."""
+    if not count:
+        return float('nan')
+    micros = round(rating_sum * RATING_MICROS)
+    # Integer division, rounding half up like the drag preview
+    return (2 * micros + count) // (2 * count) / RATING_MICROS
+
+
+def format_average_rating(avg_rating):
+    """An average rating as shown on the metric card: two decimals, rounded half up."""
+    if not math.isfinite(avg_rating):
+        return f"{avg_rating:.2f}"
+    hundredths = (round(avg_rating * RATING_MICROS) + RATING_MICROS // 200) // (RATING_MICROS // 100)
+    return f"{hundredths / 100:.2f}"
+
+
+def metric_totals(filter_state):
+    """
+    Movie count, average rating, total votes and total gross revenue for a filter state.
+
+    Totals come from the data source when it can answer the filter, otherwise
+    (or when the filter includes a search) from the filtered rows. Either
+    way the average is computed from the rating sum by average_rating().
+
+    Returns:
+        tuple: (movie count, average rating or nan without movies, total votes, total gross revenue)
     """
-    Load the IMDB dataset and perform necessary data cleaning and preprocessing.
-    
-    Processing steps:
-    1. Load CSV file
-    2. Handle missing values
-    3. Parse runtime (remove ' min' suffix and convert to numeric)
-    4. Clean Gross revenue (remove commas)
-    5. Create additional feature columns
-    6. Extract genre list for filtering
-    
+    dataset = dataset_for(filter_state)
+    totals = dataset.source.totals(filter_state) if not filter_state['search'] else None
+    if totals is None:
+        rows = filtered_rows(filter_state)
+        frame = dataset.frame
+        totals = (len(rows), widen_float32(frame['IMDB_Rating'].to_numpy()[rows]).sum(),
+                  frame['No_of_Votes'].to_numpy()[rows].sum(), frame['Gross'].to_numpy()[rows].sum())
+    count, rating_sum, total_votes, total_gross = totals
+    metric_count = int(round(count))
+    return metric_count, average_rating(rating_sum, metric_count), int(round(total_votes)), float(total_gross)
+
+
+def compute_metrics(filter_state):
+    """
+    Compute the four summary metric card values for a filter state.
+
     Returns:
-        DataFrame: Cleaned and preprocessed movie data
+        tuple: (movie count, average rating, total votes, total gross revenue) as display values
     """
-    
-    df = pd.read_csv('imdb_top_1000.csv')
-    # pd.to_numeric - սա պանդասի ֆունկցիա է, որն օգտագործվում է տվյալ սյունը թվային փոխակերպելու համար։
+    metric_count, avg_rating, total_votes, total_gross = metric_totals(filter_state)
+    # սա ֆիլտրերից հետև մնացած ֆիլմերի քանակն է, որը ցույց է տալիս, թե քանի ֆիլմ է համապատասխանում ընտրված ֆիլտրերին։
+    metric_avg_rating = format_average_rating(avg_rating)
+    metric_total_votes = f"{total_votes:,}"
+    metric_gross = f"${total_gross/1e9:.2f}B" if total_gross > 0 else "$0"
+    return metric_count, metric_avg_rating, metric_total_votes, metric_gross
 
-    # Convert Released_Year to numeric, fill NaN with the median year
-    # errors='coerce' նշանակում է՝ եթե տվյալը չի կարող փոխակերպվել թվային արժեքի, ապա այն կվերածվի NaN:
-    df['Released_Year'] = pd.to_numeric(df['Released_Year'], errors='coerce')
-    df['Released_Year'].fillna(df['Released_Year'].median(), inplace=True)
-    df['Released_Year'] = df['Released_Year'].astype(int) 
-    # այստեղ փոխում ենք ամբողջ թվի
-    
-    # Parse runtime: remove ' min' and convert to integer
-    df['Runtime_Minutes'] = df['Runtime'].str.replace(' min', '').astype(int)
-    # այստեղ ֆիլմի րոպեները ևս թվային արժեքի ենք վերափոխում , որպեսզի հետագայում վիզուալիզացիայում օգտագործենք։
-    
-    # Clean Gross revenue: remove commas and convert to numeric
-    df['Gross'] = pd.to_numeric(df['Gross'].str.replace(',', ''), errors='coerce')
-    
-    # Create a numerical decade column for analysis
-    df['Decade'] = (df['Released_Year'] // 10 * 10).astype(int)
-    
-    # Split genres into lists (comma-separated in original data)
-    df['Genre_List'] = df['Genre'].str.split(', ')
-    # այստեղ ժանրերը պատճենում ենք որպես ցուցակ, որպեսզի հետագայում ֆիլտրելիս օգտագործենք։
-    
-    # Ensure Meta_score is numeric (handle missing values)
-    df['Meta_score'] = pd.to_numeric(df['Meta_score'], errors='coerce')
-    # մետա սկորը դա ֆիլմի որակի լրացուցիչ գնահատական է։ այստեղ այն նույնպես թվային արժեքի ենք վերափոխում։
-    # մետա սկորը ցույց է տալիս թե ֆիլմը որքանով է համապատասխանում քննադատների կարծիքներին հաշված IMDB գնահատականից։
-    
-    # Create rating categories (4 bins = 3 labels)
-    df['Rating_Category'] = pd.cut(df['IMDB_Rating'], 
-                                    bins=[0, 7, 8, 9, 10.1], 
-                                    labels=['Low (<7)', 'Good (7-8)', 'Very Good (8-9)', 
-                                           'Excellent (9+)'])
-    # այստեղ ստեղծում ենք ֆիլմերի գնահատականների կատեգորիաներ՝ ըստ IMDB գնահատականի։
-    
-    # Calculate revenue per vote (proxy for financial impact)
-    df['Revenue_Per_Vote'] = df['Gross'] / df['No_of_Votes']
-    df['Revenue_Per_Vote'] = df['Revenue_Per_Vote'].fillna(0)
-    # այստեղ ստեղծում ենք նոր սյուն՝ որը ցույց է տալիս յուրաքանչյուր քվեի դիմաց եկամուտը։
-    # այսինքն՝ որքան գումար է բերել ֆիլմը յուրաքանչյուր քվեի դիմաց։
-    # քանի որ ֆիլմերի եկամուտը կարող է բացակայել,
-    # այդ դեպքում այն լցնում ենք 0-ով։ սա պարզապես, որպեսզի հասկաանանք կապը քվեի և եկամուտի միջև։
-    
-    # Handle missing values
-    df['Gross'].fillna(0, inplace=True)
-    df['Meta_score'].fillna(df['Meta_score'].mean(), inplace=True)
-    # այստեղ լրացնում ենք բաց թողնված արժեքները՝ եկամուտը 0-ով, իսկ մետա սկորը՝ միջին արժեքով։
-    
-    return df
 
-# Load the data
-df = load_and_preprocess_data()
+def yearly_average(filter_state):
+    """
+    Average rating and movie count per year for a filter state.
 
-# Get unique genres for dropdown filter
-all_genres = sorted(list(set([genre for genres in df['Genre_List'] for genre in genres])))
-# այստեղ ստեղծում ենք ժանրերի ամբողջական ցուցակը՝ ֆիլտրի համար։
-# դա անում ենք այսպես՝ վերցնում ենք յուրաքանչյուր ֆիլմի ժանրերի ցուցակը,
-# այնուհետև բոլոր ժանրերը դնում ենք մեկ ընդհանուր ցուցակի մեջ և վերցնում
-#  միայն եզակի արժեքները՝ օգտագործելով set()։
+    Returns:
+        DataFrame: Columns Year, Average_Rating and Movie_Count, for years with movies
+    """
+    yearly = dataset_for(filter_state).source.yearly(filter_state) if not filter_state['search'] else None
+    if yearly is not None:
+        years, stats = yearly
+        has_movies = stats[:, 0] > 0
+        counts = stats[has_movies, 0]
+        return pd.DataFrame({'Year': years[has_movies],
+                             'Average_Rating': stats[has_movies, 1] / counts,
+                             'Movie_Count': np.rint(counts).astype(np.int64)})
 
-# ============================================================================
-# INITIALIZE DASH APP
-# ============================================================================
+    filtered_df = filtered_frame(filter_state)
+    yearly_avg = filtered_df.groupby('Released_Year').agg({
+        'IMDB_Rating': 'mean',
+        'Series_Title': 'count'
+    }).reset_index()
+    # groupby-ից հետո Released_Year-ը դառնում է index։ reset_index-ը դարձնում է սովորական սյունակ։
+    yearly_avg.columns = ['Year', 'Average_Rating', 'Movie_Count']
+    return yearly_avg
 
-app = dash.Dash(__name__)
-app.title = "IMDB Movies Dashboard - Interactive Analytics"
 
-# Define color scheme
-COLOR_PRIMARY = '#1f77b4'
-COLOR_SECONDARY = '#ff7f0e'
-COLOR_SUCCESS = '#2ca02c'
-COLOR_DANGER = '#d62728'
-COLOR_WARNING = '#ff9800'
+def genre_totals(filter_state):
+    """Number of movies per genre for a filter state, from the data source when possible."""
+    dataset = dataset_for(filter_state)
+    counts = dataset.source.genre_counts(filter_state) if not filter_state['search'] else None
+    if counts is None:
+        counts = count_genres(dataset.frame['Genre_Mask'].to_numpy()[filtered_rows(filter_state)],
+                              dataset.all_genres)
+    return counts
 
-# այստեղ սահմանում ենք գույների պալիտրա՝ վիզուալիզացիաների համար։
 
-# ============================================================================
-# DEFINE APP LAYOUT
-# ============================================================================
+def rank_genres(counts):
+    """
+    Genres with movies, most common first.
 
-# սա իրենից ներկայացնում է Dash հավելվածի գլխավոր կառուցվածքը՝
-# որը բաղկացած է տարբեր բաժիններից՝ հեդեր, ֆիլտրեր, մետրիկներ, վիզուալիզացիաներ և ֆուտեր։
+    Genres with the same count are listed in alphabetical order (the order of
+    the genre vocabulary that counts are indexed by).
 
-# հեդերը պարունակում է հավելվածի վերնագիրը և նկարագրությունը, դա այն հատվածն է,
-# որը տեսնում է օգտատերը առաջինը։ օրինակ՝ վերնագիրը "IMDB Top 1000 Movies Dashboard" և նկարագրությունը
-# "Interactive analytics and visualization of IMDB's highest-rated films"- սա ցույց է տալիս, թե ինչ է անում հավելվածը։
-# 
+    Returns:
+        Series: Movie counts indexed by genre name
+    """
+    counts = counts[counts > 0]
+    return counts.sort_values(ascending=False, kind='stable')
 
-# կոդի կառուցվածքը հետևյալն է՝ app.layout = html.Div([ - այստեղ սկսվում է գլխավոր բաժինը։
-#  սա html.Div է, որը պարունակում է բոլոր ենթաբաժինները։
-# html.Div([]) - սա ենթաբաժին է, որը կարող է պարունակել այլ HTML տարրեր կամ Dash կոմպոնենտներ։
-#  օրինակ՝ հեդերը, ֆիլտրերը, մետրիկները և այլն։ այսինքն html.Div-ը օգտագործվում է տարբեր բաժիններ ստեղծելու համար։
-# լեյաութը էջի սկելետն է, որը սահմանում է, թե ինչպես են տարրերը դասավորված և ինչպես են դրանք փոխազդում իրար հետ, 
-# իսկ տարրեր ասելով՝ նկատի ունենք տարբեր վիզուալ կոմպոնենտներ, ինչպիսիք են գրաֆիկները, սլայդերները, կոճակները և այլն։
 
-app.layout = html.Div([
-    # սա հիմնական բաժինն է, որը պարունակում է բոլոր ենթաբաժինները։
-    # Header Section
-    html.Div([
-    # սա այն հատվածն է, որը տեսնում է օգտատերը առաջինը։
-        html.Div([
-            # սա այն հատվածն է, որը պարունակում է հավելվածի վերնագիրը և նկարագրությունը։
-            html.H1("🎬 IMDB Top 1000 Movies Dashboard", 
-                   style={'margin': '0', 'color': 'white', 'fontSize': '2.5em'}),
-            html.P("Interactive analytics and visualization of IMDB's highest-rated films",
-                  style={'margin': '10px 0 0 0', 'color': 'rgba(255,255,255,0.8)', 'fontSize': '1.1em'})
-        ], style={'padding': '30px'})
-    ], style={
-        'backgroundColor': '#1a1a2e',
-        'marginBottom': '30px',
-        'boxShadow': '0 2px 4px rgba(0,0,0,0.1)'
-    }),
-    # այսեղ մենք ինչ արեցինք - ստեղծեցինք html.Div, որը պարունակում է հեդերի բաժինը։
-    # Main Container
-    html.Div([
-        # ====================================================================
-        # FILTER SECTION
-        # ====================================================================
-        html.Div([
-            html.H2("📊 Filter Options", style={'marginBottom': '20px', 'color': '#1a1a2e'}),
-        #  ստեղ մենք ստեղծեցինք ֆիլտրերի բաժինը՝ որը թույլ է տալիս օգտատերերին ֆիլտրել տվյալները ըստ տարբեր չափանիշների։
+def top_voted_rows(filter_state, k):
+    """Row positions of the k most voted movies of a filter state, most voted first."""
+    dataset = dataset_for(filter_state)
+    if filter_state['search']:
+        # Search hits are few: sort them (votes descending, ties by position)
+        rows = filtered_rows(filter_state)
+        votes = dataset.frame['No_of_Votes'].to_numpy()[rows].astype(np.int64)
+        return rows[np.lexsort((rows, -votes))[:k]]
+    # Read from the per-year votes ordering instead of sorting the filtered rows
+    return dataset.source.top_votes(filter_state, k)
 
-            html.Div([
-                # Year Range Slider
-                html.Div([
-                    html.Label("Year Range:", style={'fontWeight': 'bold'}),
-                    dcc.RangeSlider(
-                        id='year-slider',
-                        min=df['Released_Year'].min(),
-                        max=df['Released_Year'].max(),
-                        step=1,
-                        value=[df['Released_Year'].min(), df['Released_Year'].max()],
-                        marks={str(year): str(year) for year in range(
-                            df['Released_Year'].min(), 
-                            df['Released_Year'].max() + 1, 
-                            10)},
-                        tooltip={"placement": "bottom", "always_visible": True}
-                    ),
-                ], style={'marginBottom': '25px'}),
-                
-                # Genre Dropdown
-                html.Div([
-                    html.Label("Select Genre (Optional):", style={'fontWeight': 'bold'}),
-                    dcc.Dropdown(
-                        id='genre-dropdown',
-                        options=[{'label': 'All Genres', 'value': 'all'}] + 
-                                [{'label': genre, 'value': genre} for genre in all_genres],
-                        value='all'
-                    ),
-                ], style={'marginBottom': '25px'}),
-                
-                # Rating Threshold Slider
-                html.Div([
-                    html.Label("Minimum IMDB Rating:", style={'fontWeight': 'bold'}),
-                    dcc.Slider(
-                        id='rating-slider',
-                        min=5,
-                        max=10,
-                        step=0.1,
-                        value=5,
-                        marks={i: f'{i}.0' for i in range(5, 11)},
-                        tooltip={"placement": "bottom", "always_visible": True}
-                    ),
-                ], style={'marginBottom': '25px'}),
-                
-                # Reset Filters Button
-                html.Button(
-                    '🔄 Reset Filters',
-                    id='reset-button',
-                    n_clicks=0,
-                    #   - սա կոճակ է, որը օգտագործվում է ֆիլտրերը վերականգնելու համար։  0-ն նշանակում է, որ սկզբում կոճակը չի սեղմված։
-                    style={
-                        'padding': '12px 24px',
-                        'backgroundColor': COLOR_PRIMARY,
-                        'color': 'white',
-                        'border': 'none',
-                        'borderRadius': '5px',
-                        'cursor': 'pointer',
-                        'fontSize': '1em',
-                        'marginTop': '10px'
-                    }
-                ),
-            ], style={
-                'backgroundColor': '#f5f5f5',
-                'padding': '20px',
-                'borderRadius': '8px',
-                'marginBottom': '25px'
-            }),
-        ], style={
-            'backgroundColor': 'white',
-            'padding': '25px',
-            'borderRadius': '10px',
-            'boxShadow': '0 2px 8px rgba(0,0,0,0.1)',
-            'marginBottom': '30px'
-        }),
-        
-        # ====================================================================
-        # SUMMARY METRICS SECTION
-        # ====================================================================
-# այս հատվածը ցույց է տալիս հիմնական մետրիկները՝ որոնք թարմացվում են ֆիլտրերի հիման վրա։սա գտնվում է 
-# ֆիլտրերի տակ քանի որ այն կարևոր տեղեկատվություն է տալիս օգտատիրոջը։
-# սրանք դեշբորդի ամենաարագ տեսանելի մետրիկներն են, որոնք օգնում են օգտատիրոջը արագ հասկանալ տվյալների
-#  հիմնական միտումները։
 
+def director_averages(filter_state):
+    """
+    Average rating and movie count per director for a filter state.
 
-        html.Div([
-            html.Div([
-                html.Div([
-                    html.H3("Total Movies", style={'color': '#666', 'fontSize': '0.9em', 'margin': '0'}),
-                    html.H2(id='metric-count', children='0', style={'margin': '10px 0 0 0', 'color': COLOR_PRIMARY})
-                ], style={'backgroundColor': '#f9f9f9', 'padding': '20px', 'borderRadius': '8px', 'textAlign': 'center'}),
-                
-                html.Div([
-                    html.H3("Average Rating", style={'color': '#666', 'fontSize': '0.9em', 'margin': '0'}),
-                    html.H2(id='metric-avg-rating', children='0.0', style={'margin': '10px 0 0 0', 'color': COLOR_SUCCESS})
-                ], style={'backgroundColor': '#f9f9f9', 'padding': '20px', 'borderRadius': '8px', 'textAlign': 'center'}),
-                
-                html.Div([
-                    html.H3("Total Votes", style={'color': '#666', 'fontSize': '0.9em', 'margin': '0'}),
-                    html.H2(id='metric-total-votes', children='0', style={'margin': '10px 0 0 0', 'color': COLOR_SECONDARY})
-                ], style={'backgroundColor': '#f9f9f9', 'padding': '20px', 'borderRadius': '8px', 'textAlign': 'center'}),
-                
-                html.Div([
-                    html.H3("Total Gross Revenue", style={'color': '#666', 'fontSize': '0.9em', 'margin': '0'}),
-                    html.H2(id='metric-gross', children='$0', style={'margin': '10px 0 0 0', 'color': COLOR_WARNING})
-                ], style={'backgroundColor': '#f9f9f9', 'padding': '20px', 'borderRadius': '8px', 'textAlign': 'center'}),
-            ], style={
-                'display': 'grid',
-                'gridTemplateColumns': 'repeat(auto-fit, minmax(200px, 1fr))',
-                'gap': '15px',
-                'marginBottom': '30px'
-            }),
-        ]),
-        
-        # ====================================================================
-        # VISUALIZATIONS SECTION
-        # ====================================================================
-        html.Div([
-            # Row 1: Two main visualizations
-            html.Div([
-                # Visualization 1: Rating vs Votes Scatter Plot
-                html.Div([
-                    dcc.Graph(
-                        id='scatter-rating-votes',
-                        style={'height': '400px'}
-                    )
-                ], style={
-                    'width': '48%',
-                    'display': 'inline-block',
-                    'marginRight': '2%',
-                    'backgroundColor': 'white',
-                    'padding': '15px',
-                    'borderRadius': '10px',
-                    'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
-                }),
-                
-                # Visualization 2: Rating Distribution Histogram
-                html.Div([
-                    dcc.Graph(
-                        id='histogram-ratings',
-                        style={'height': '400px'}
-                    )
-                ], style={
-                    'width': '48%',
-                    'display': 'inline-block',
-                    'backgroundColor': 'white',
-                    'padding': '15px',
-                    'borderRadius': '10px',
-                    'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
-                }),
-            ], style={'marginBottom': '30px', 'display': 'flex', 'gap': '15px'}),
-            
-            # Row 2: Time series and genre analysis
-            html.Div([
-                # Visualization 3: Average Rating Over Years (Time Series)
-                html.Div([
-                    dcc.Graph(
-                        id='line-rating-trend',
-                        style={'height': '400px'}
-                    )
-                ], style={
-                    'width': '48%',
-                    'display': 'inline-block',
-                    'marginRight': '2%',
-                    'backgroundColor': 'white',
-                    'padding': '15px',
-                    'borderRadius': '10px',
-                    'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
-                }),
-                
-                # Visualization 4: Top Genres Bar Chart
-                html.Div([
-                    dcc.Graph(
-                        id='bar-top-genres',
-                        style={'height': '400px'}
-                    )
-                ], style={
-                    'width': '48%',
-                    'display': 'inline-block',
-                    'backgroundColor': 'white',
-                    'padding': '15px',
-                    'borderRadius': '10px',
-                    'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
-                }),
-            ], style={'marginBottom': '30px', 'display': 'flex', 'gap': '15px'}),
-            
-            # Row 3: Top directors and revenue analysis
-            html.Div([
-                # Visualization 5: Top Directors by Average Rating
-                html.Div([
-                    dcc.Graph(
-                        id='bar-top-directors',
-                        style={'height': '400px'}
-                    )
-                ], style={
-                    'width': '48%',
-                    'display': 'inline-block',
-                    'marginRight': '2%',
-                    'backgroundColor': 'white',
-                    'padding': '15px',
-                    'borderRadius': '10px',
-                    'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
-                }),
-                
-                # Visualization 6: Rating vs Revenue Scatter
-                html.Div([
-                    dcc.Graph(
-                        id='scatter-rating-revenue',
-                        style={'height': '400px'}
-                    )
-                ], style={
-                    'width': '48%',
-                    'display': 'inline-block',
-                    'backgroundColor': 'white',
-                    'padding': '15px',
-                    'borderRadius': '10px',
-                    'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
-                }),
-            ], style={'marginBottom': '30px', 'display': 'flex', 'gap': '15px'}),
-            
-            # Row 4: Top 30 Popular Films
-            html.Div([
-                html.Div([
-                    dcc.Graph(
-                        id='bar-top-30-films',
-                        style={'height': '600px'}
-                    )
-                ], style={
-                    'width': '100%',
-                    'backgroundColor': 'white',
-                    'padding': '15px',
-                    'borderRadius': '10px',
-                    'boxShadow': '0 2px 8px rgba(0,0,0,0.1)'
-                }),
-            ], style={'marginBottom': '30px'}),
-        ], style={
-            'padding': '0'
-        }),
-        
-    ], style={'maxWidth': '1400px', 'margin': '0 auto', 'padding': '0 20px'}),
-    
-    # Footer
-    html.Div([
-        html.P("Data Source: IMDB Top 1000 Movies | Last Updated: February 2026 | "
-               "Dashboard built with Dash, Plotly, and Pandas",
-              style={'margin': '0', 'color': 'rgba(255,255,255,0.7)', 'fontSize': '0.9em'})
-    ], style={
-        'backgroundColor': '#1a1a2e',
-        'padding': '20px',
-        'textAlign': 'center',
-        'marginTop': '40px',
-        'color': 'white'
-    })
-], style={'backgroundColor': '#f0f2f5', 'minHeight': '100vh'})
+    Returns:
+        DataFrame: Columns Director, Avg_Rating and Movie_Count, for directors with movies
+    """
+    source = dataset_for(filter_state).source
+    totals = source.director_totals(filter_state) if not filter_state['search'] else None
+    if totals is None:
+        totals = source.director_totals_for_rows(filtered_rows(filter_state))
+    counts, sums = totals
+    has_movies = counts > 0
+    return pd.DataFrame({'Director': source.director_names[has_movies],
+                         # Rounded so equal averages tie exactly whatever the summation order
+                         'Avg_Rating': np.round(sums[has_movies] / counts[has_movies], 12),
+                         'Movie_Count': np.rint(counts[has_movies]).astype(np.int64)})
 
-# ============================================================================
-# CALLBACKS - INTERACTIVE UPDATES
-# ============================================================================
 
 @app.callback(
-        # սա callback ֆունկցիա է, որը թարմացնում է վիզուալիզացիաները և մետրիկները՝ այսինքն ,
+        # սա callback ֆունկցիա է, որը թարմացնում է ֆիլտրի վիճակը և մետրիկները՝ այսինքն ,
         #   երբ օգտատերը փոխում է ֆիլտրերը, այս ֆունկցիան կանչվում 
-        # է և թարմացնում է բոլոր գրաֆիկները և մետրիկները՝ ըստ նոր ֆիլտրերի։
+        # է և հաշվում է, թե որ ֆիլմերն են համապատասխանում նոր ֆիլտրերին։
         # ֆիլտրերը են՝ տարիների սլայդերը, ժանրերի դրոփդաունը, գնահատականի սլայդերը և վերականգման կոճակը։
-    # OUTPUTS: All visualizations and metrics
-    [Output('scatter-rating-votes', 'figure'),
-     Output('histogram-ratings', 'figure'),
-     Output('line-rating-trend', 'figure'),
-     Output('bar-top-genres', 'figure'),
-     Output('bar-top-directors', 'figure'),
-     Output('scatter-rating-revenue', 'figure'),
-     Output('bar-top-30-films', 'figure'),
+    # OUTPUTS: Filter state for the chart callbacks, and the metrics
+    [Output('filter-state', 'data'),
      Output('metric-count', 'children'),
      Output('metric-avg-rating', 'children'),
      Output('metric-total-votes', 'children'),
      Output('metric-gross', 'children'),
 
-    #  այստեղ մենք ասում ենք ՝ որ այս ֆունկցիան պետք է թարմացնի բոլոր վիզուալիզացիաները և մետրիկները։
+    #  այստեղ մենք ասում ենք ՝ որ այս ֆունկցիան պետք է թարմացնի ֆիլտրի վիճակը և մետրիկները։
      # Store for reset button
      Output('year-slider', 'value'),
      Output('genre-dropdown', 'value'),
-     Output('rating-slider', 'value')],
+     Output('genre-match', 'value'),
+     Output('rating-slider', 'value'),
+     Output('search-box', 'value')],
     #  այստեղ ասում ենք նաև, որ վերականգման կոճակի սեղմման դեպքում պետք է վերականգնել ֆիլտրերի արժեքները։
     
     # INPUTS: All filter controls
     [Input('year-slider', 'value'),
      Input('genre-dropdown', 'value'),
      Input('rating-slider', 'value'),
-     Input('reset-button', 'n_clicks')],
+     Input('reset-button', 'n_clicks'),
+     Input('genre-match', 'value'),
+     Input('search-box', 'value')],
     #  այստեղ ասում ենք, որ այս ֆունկցիան պետք է արձագանքի այս ֆիլտրերի փոփոխություններին։
     
-    # PREVENT_INITIAL_CALL: Don't run on page load
-    prevent_initial_call=False
-    # այստեղ մենք ասում ենք, որ այս ֆունկցիան պետք է աշխատի նաև էջի առաջին բեռնումի ժամանակ։
+    # PREVENT_INITIAL_CALL: Don't run on page load (the page comes with the default view)
+    prevent_initial_call=True
+    # էջը բեռնվում է արդեն լրացված սկզբնական տեսքով, ուստի առաջին կանչը պետք չէ։
 )
-def update_dashboard(year_range, selected_genre, min_rating, reset_clicks):
+def update_dashboard(year_range, selected_genre, min_rating, reset_clicks, genre_mode='any', search=''):
     """
-    Main callback function that updates all dashboard visualizations and metrics.
+    Main callback function that applies the filters and updates the summary metrics.
     
     This function is triggered whenever any filter is changed:
     1. Year range slider
     2. Genre dropdown
     3. Rating threshold slider
     4. Reset button
+    5. Search box
     
-    It filters the data based on user inputs and creates all 6 visualizations,
-    along with updated summary metrics.
+    It resolves the filters once, keeps the matching row indices on the server
+    and publishes the filter state; each visualization is then rebuilt by its
+    own callback from that state. On large catalogs the metrics are first
+    estimated from the stratified sample (see APPROXIMATE VIEW).
     
     Args:
         year_range (list): Min and max years selected [min_year, max_year]
-        selected_genre (str): Selected genre or 'all' for no filtering
+        selected_genre (list): Selected genres, empty for no filtering
         min_rating (float): Minimum rating threshold
         reset_clicks (int): Number of times reset button was clicked
+        genre_mode (str): 'any' (OR) or 'all' (AND) for multiple selected genres
+        search (str): Search box query (see parse_search)
     
     Returns:
-        tuple: Contains all updated figures and metrics
+        tuple: Filter state, updated metrics and the (possibly reset) filter values
     """
+    started = time.perf_counter()
     
     # Check if reset button was clicked (using callback context)
-    from dash import callback_context
-    if callback_context.triggered and callback_context.triggered[0]['prop_id'] == 'reset-button.n_clicks':
+    if _triggered_id() == 'reset-button':
         # Reset all filters to default values
-        year_range = [df['Released_Year'].min(), df['Released_Year'].max()]
-        selected_genre = 'all'
-        min_rating = 5
+        year_range = list(current_dataset().year_bounds)
+        selected_genre = list(DEFAULT_GENRE)
+        min_rating = DEFAULT_MIN_RATING
+        genre_mode = DEFAULT_GENRE_MODE
+        search = ''
     
     # ====================================================================
     # DATA FILTERING
     # ====================================================================
     
-    # Filter by year range
-    filtered_df = df[(df['Released_Year'] >= year_range[0]) & 
-                     (df['Released_Year'] <= year_range[1])]
-    
-    # Filter by genre (if not 'all')
-    if selected_genre != 'all':
-        filtered_df = filtered_df[filtered_df['Genre_List'].apply(lambda x: selected_genre in x)]
-    
-    # Filter by minimum rating
-    filtered_df = filtered_df[filtered_df['IMDB_Rating'] >= min_rating]
+    # Resolve year range, genres (if any selected), minimum rating and search to row positions
+    filter_state = make_filter_state(year_range, selected_genre, min_rating, genre_mode, search=search)
     
     # ====================================================================
-    # VISUALIZATION 1: SCATTER PLOT - Rating vs Number of Votes
+    # SUMMARY METRICS
     # ====================================================================
+    
+    if approximate_view(filter_state):
+        # Estimates with confidence intervals now; refine_view() swaps in the exact values
+        (metric_count, metric_avg_rating, metric_total_votes, metric_gross), estimated_count = \
+            approximate_metrics(filter_state)
+        filter_state['count'] = estimated_count
+        filter_state['approximate'] = True
+        refine_in_background(filter_state)
+    else:
+        metric_count, metric_avg_rating, metric_total_votes, metric_gross = cached_metrics(filter_state)
+        filter_state['count'] = metric_count
+    stage_timings.observe('callback', time.perf_counter() - started)
+    prefetch_figures(filter_state)
+    
+    return (
+        filter_state,
+        metric_count,
+        metric_avg_rating,
+        metric_total_votes,
+        metric_gross,
+        year_range,
+        selected_genre,
+        genre_mode,
+        min_rating,
+        search
+    )
+
+# ============================================================================
+# CLIENT-SIDE DRAG PREVIEW
+# ============================================================================
+
+# The sliders apply their filters on release (updatemode='mouseup'). While a
+# slider is being dragged, a clientside callback filters compact copies of
+# the year, rating, votes, gross and genre columns in the browser and
+# updates the metric cards and the rating histogram on every step, without
+# a server round trip. The other charts wait for the release. The columns
+# are shipped once per page load, so the preview is only offered for
+# catalogs up to this many movies (0 disables it).
+PREVIEW_MAX_ROWS = int(os.environ.get('DASHBOARD_PREVIEW_MAX_ROWS', '50000'))
+
+
+def preview_columns(dataset):
+    """
+    Compact columns of a dataset for the drag preview.
+
+    Returns:
+        dict or None: Column lists and the genre vocabulary, or None when the
+        catalog is too large to ship, or has more genres than the 32-bit
+        JavaScript bitwise operators can test
+    """
+    frame = dataset.frame
+    if not 0 < len(frame) <= PREVIEW_MAX_ROWS or len(dataset.all_genres) > 31:
+        return None
+    return {
+        'genres': list(dataset.all_genres),
+        'year': frame['Released_Year'].to_numpy().tolist(),
+        'rating': widen_float32(frame['IMDB_Rating'].to_numpy()).tolist(),
+        'votes': frame['No_of_Votes'].to_numpy().tolist(),
+        'gross': np.rint(frame['Gross'].to_numpy()).tolist(),
+        'genre_mask': frame['Genre_Mask'].to_numpy().tolist(),
+    }
+
+
+# Same filters and number formats as make_filter_state and compute_metrics;
+# the histogram is a copy of the current figure with new x values. While a
+# search is applied the preview is skipped and the release updates the view.
+PREVIEW_CALLBACK_JS = """
+function (yearDrag, ratingDrag, yearValue, ratingValue, selectedGenre, genreMode, columns, histogram, filterState) {
+    var noUpdate = window.dash_clientside.no_update;
+    // Search hits are only known to the server
+    if (!columns || (filterState && filterState.search && filterState.search.length)) {
+        return [noUpdate, noUpdate, noUpdate, noUpdate, noUpdate];
+    }
+    var trigger = (window.dash_clientside.callback_context.triggered[0] || {}).prop_id || '';
+    var years = trigger.indexOf('year-slider.') === 0 && yearDrag ? yearDrag : yearValue;
+    var minRating = trigger.indexOf('rating-slider.') === 0 && ratingDrag != null ? ratingDrag : ratingValue;
+
+    var genres = (selectedGenre == null ? [] : [].concat(selectedGenre)).filter(function (genre, i, all) {
+        return all.indexOf(genre) === i;
+    });
+    var matchAll = genreMode === 'all' && genres.length > 1;
+    var wanted = 0, known = 0;
+    genres.forEach(function (genre) {
+        var bit = columns.genres.indexOf(genre);
+        if (bit >= 0) {
+            wanted |= 1 << bit;
+            known += 1;
+        }
+    });
+
+    var ratings = [], ratingSum = 0, votes = 0, gross = 0;
+    // A genre missing from the vocabulary can never be matched by every movie
+    var n = matchAll && known !== genres.length ? 0 : columns.year.length;
+    for (var i = 0; i < n; i++) {
+        if (columns.year[i] < years[0] || columns.year[i] > years[1] || columns.rating[i] < minRating) {
+            continue;
+        }
+        if (genres.length) {
+            var matched = columns.genre_mask[i] & wanted;
+            if (matchAll ? matched !== wanted : matched === 0) {
+                continue;
+            }
+        }
+        ratings.push(columns.rating[i]);
+        ratingSum += columns.rating[i];
+        votes += columns.votes[i];
+        gross += columns.gross[i];
+    }
+
+    var count = ratings.length;
+    // Average in millionths of the rounded sum, shown rounded half up (see average_rating)
+    var micros = Math.floor((2 * Math.round(ratingSum * 1e6) + count) / (2 * count));
+    var figure = noUpdate;
+    if (histogram && histogram.data && histogram.data.length) {
+        var trace = Object.assign({}, histogram.data[0], {x: ratings});
+        // Exact counts, also when the current figure is a weighted sample (see APPROXIMATE VIEW)
+        delete trace.y;
+        delete trace.histfunc;
+        figure = Object.assign({}, histogram, {data: [trace].concat(histogram.data.slice(1))});
+    }
+    return [
+        count,
+        count ? (Math.floor((micros + 5000) / 10000) / 100).toFixed(2) : 'nan',
+        Math.round(votes).toLocaleString('en-US'),
+        gross > 0 ? '$' + (gross / 1e9).toFixed(2) + 'B' : '$0',
+        figure
+    ];
+}
+"""
+
+app.clientside_callback(
+    PREVIEW_CALLBACK_JS,
+    [Output('metric-count', 'children', allow_duplicate=True),
+     Output('metric-avg-rating', 'children', allow_duplicate=True),
+     Output('metric-total-votes', 'children', allow_duplicate=True),
+     Output('metric-gross', 'children', allow_duplicate=True),
+     Output('histogram-ratings', 'figure', allow_duplicate=True)],
+    [Input('year-slider', 'drag_value'),
+     Input('rating-slider', 'drag_value')],
+    [State('year-slider', 'value'),
+     State('rating-slider', 'value'),
+     State('genre-dropdown', 'value'),
+     State('genre-match', 'value'),
+     State('preview-columns', 'data'),
+     State('histogram-ratings', 'figure'),
+     State('filter-state', 'data')],
+    prevent_initial_call=True
+)
+
+# ============================================================================
+# APPROXIMATE VIEW
+# ============================================================================
+
+# On catalogs with a stratified sample (see STRATIFIED SAMPLE), a filter
+# state whose exact metrics are not cached yet is marked approximate:
+#   1. update_dashboard shows the sample's estimates with 95% confidence
+#      intervals on the metric cards, and the rating histogram, rating trend
+#      and top genres charts are drawn from the sample;
+#   2. the exact metrics and figures are computed right away on a background
+#      thread (and by the figure pool, if any);
+#   3. refine_view() waits for the exact metrics and stores them in
+#      'refined-state', which puts them on the cards and makes the charts
+#      swap in their exact figures.
+# A refinement that arrives after the filters have changed again is dropped,
+# so the cards never show values of older filters.
+# սա նշանակում է, որ մեծ կատալոգներում սլայդերը չի սպասում ճշգրիտ հաշվարկին։
+
+# Graphs drawn from the sample while the exact figure is computed
+APPROXIMATE_GRAPHS = ['histogram-ratings', 'line-rating-trend', 'bar-top-genres']
+
+# Background threads computing the exact results of approximate filter states
+REFINE_WORKERS = 2
+
+_refine_executor = ThreadPoolExecutor(REFINE_WORKERS, thread_name_prefix='refine')
+
+
+def approximate_view(filter_state):
+    """Whether a filter state is first shown from the sample (exact metrics not cached anywhere yet)."""
+    if dataset_for(filter_state).sample is None or filter_state['search']:
+        return False
+    key = ('metrics', filter_state['key'])
+    return key not in result_cache and result_cache.load_shared(key, filter_state['version']) is None
+
+
+def approximate_title(title, approximate):
+    """Chart title, marked while the chart is drawn from the sample."""
+    return f"{title} (Estimated from a Sample)" if approximate else title
+
+
+def approximate_metrics(filter_state):
+    """
+    Metric card values estimated from the sample, with 95% confidence intervals.
+
+    Returns:
+        tuple: (display values like compute_metrics' with a '± half-width', estimated movie count)
+    """
+    with stage_timings.time('approximate'):
+        estimates = dataset_for(filter_state).sample.metric_estimates(filter_state)
+    (count, count_error), (avg_rating, rating_error), (votes, votes_error), (gross, gross_error) = estimates
+    return (f"{int(round(count)):,} ± {int(round(count_error)):,}",
+            f"{avg_rating:.2f} ± {rating_error:.2f}",
+            f"{int(round(votes)):,} ± {int(round(votes_error)):,}",
+            f"${gross/1e9:.2f}B ± {gross_error/1e9:.2f}B" if gross > 0 else "$0"), int(round(count))
+
+
+def approximate_figure(graph_id, filter_state):
+    """Figure of an APPROXIMATE_GRAPHS graph drawn from the sample."""
+    with stage_timings.time(f'approximate:{graph_id}'):
+        return FIGURE_BUILDERS[graph_id](filter_state, approximate=True)
+
+
+def refine_in_background(filter_state):
+    """Start computing the exact metrics and figures of an approximate filter state."""
+    def refine():
+        cached_metrics(filter_state)
+        for graph_id in APPROXIMATE_GRAPHS:
+            chart_figure(graph_id, filter_state)
+
+    _refine_executor.submit(refine)
+
+
+@app.callback(
+    Output('refined-state', 'data'),
+    Input('filter-state', 'data'),
+    prevent_initial_call=True
+)
+def refine_view(filter_state):
+    """Exact metrics of an approximate filter state, once the background computation has them."""
+    if not filter_state or not filter_state.get('approximate'):
+        raise PreventUpdate
+    # Joins the computation started by refine_in_background() (see SingleFlight)
+    return {'key': filter_state['key'], 'metrics': list(cached_metrics(filter_state))}
+
+
+# Puts refined metrics on the cards, unless the filters have changed since
+APPLY_REFINED_METRICS_JS = """
+function (refined, filterState) {
+    var noUpdate = window.dash_clientside.no_update;
+    if (!refined || !filterState || refined.key !== filterState.key) {
+        return [noUpdate, noUpdate, noUpdate, noUpdate];
+    }
+    return refined.metrics;
+}
+"""
+
+app.clientside_callback(
+    APPLY_REFINED_METRICS_JS,
+    [Output('metric-count', 'children', allow_duplicate=True),
+     Output('metric-avg-rating', 'children', allow_duplicate=True),
+     Output('metric-total-votes', 'children', allow_duplicate=True),
+     Output('metric-gross', 'children', allow_duplicate=True)],
+    Input('refined-state', 'data'),
+    State('filter-state', 'data'),
+    prevent_initial_call=True
+)
+
+# ============================================================================
+# VISUALIZATIONS
+# ============================================================================
+
+# Scatter plots switch to WebGL (Scattergl) above this many points, and to a
+# server-side density heatmap above the second threshold. Zooming into a
+# density heatmap re-renders the zoomed window as points (with hover details)
+# once it holds few enough movies.
+SCATTERGL_THRESHOLD = int(os.environ.get('DASHBOARD_SCATTERGL_THRESHOLD', '5000'))
+DENSITY_THRESHOLD = int(os.environ.get('DASHBOARD_DENSITY_THRESHOLD', '200000'))
+DENSITY_BINS = 80
+
+# Figures are built as plain Plotly JSON dicts straight from NumPy arrays, in
+# exactly the form plotly.express / graph_objects would produce, but without
+# their per-call validation and template merging. The template and the
+# color scales are converted to JSON form once, here.
+FIGURE_TEMPLATE = pio.templates[pio.templates.default].to_plotly_json()
+COLOR_SCALES = {
+    name: [[i / (len(colors) - 1), color] for i, color in enumerate(colors)]
+    for name, colors in (('Viridis', px.colors.sequential.Viridis),
+                         ('Plasma', px.colors.sequential.Plasma),
+                         ('Blues', px.colors.sequential.Blues),
+                         ('Greens', px.colors.sequential.Greens))
+}
+# Marker size (pixels) of the largest point in a size-scaled scatter plot, as in px.scatter
+SCATTER_SIZE_MAX = 20
+
+
+def figure_layout(title, x_title, y_title, **layout):
+    """Layout dict with the default template, a title and axis titles, plus any other settings."""
+    return {'template': FIGURE_TEMPLATE,
+            'title': {'text': title},
+            'xaxis': {'title': {'text': x_title}},
+            'yaxis': {'title': {'text': y_title}},
+            **layout}
+
+
+def express_layout(title, x_title, y_title, color_title, colorscale, **layout):
+    """Layout of a single-trace px chart colored by a continuous column."""
+    fig_layout = figure_layout(title, x_title, y_title, **layout)
+    fig_layout['xaxis'].update(anchor='y', domain=[0.0, 1.0])
+    fig_layout['yaxis'].update(anchor='x', domain=[0.0, 1.0])
+    fig_layout['coloraxis'] = {'colorbar': {'title': {'text': color_title}},
+                               'colorscale': COLOR_SCALES[colorscale]}
+    return fig_layout
+
+
+def express_scatter(x, y, color, size, customdata, hovertemplate):
+    """Trace of px.scatter with continuous color and marker size (WebGL above SCATTERGL_THRESHOLD points)."""
+    webgl = len(x) > SCATTERGL_THRESHOLD
+    trace = {
+        'type': 'scattergl' if webgl else 'scatter',
+        'mode': 'markers',
+        'x': x,
+        'y': y,
+        'customdata': customdata,
+        'hovertemplate': hovertemplate,
+        'marker': {'color': color, 'coloraxis': 'coloraxis', 'size': size, 'sizemode': 'area',
+                   'sizeref': float(size.max()) / SCATTER_SIZE_MAX ** 2 if len(size) else None,
+                   'symbol': 'circle'},
+        'legendgroup': '', 'name': '', 'showlegend': False,
+        'xaxis': 'x', 'yaxis': 'y',
+    }
+    if not webgl:
+        trace['orientation'] = 'v'
+    return trace
+
+
+def express_bar(x, y, hovertemplate, customdata=None):
+    """Trace of a horizontal px.bar colored by its own values."""
+    trace = {
+        'type': 'bar',
+        'orientation': 'h',
+        'x': x,
+        'y': y,
+        'hovertemplate': hovertemplate,
+        'marker': {'color': x, 'coloraxis': 'coloraxis', 'pattern': {'shape': ''}},
+        'alignmentgroup': 'True', 'offsetgroup': '', 'legendgroup': '', 'name': '',
+        'showlegend': False, 'textposition': 'auto',
+        'xaxis': 'x', 'yaxis': 'y',
+    }
+    if customdata is not None:
+        trace['customdata'] = customdata
+    return trace
+
+
+def _customdata(*columns):
+    """Stack per-point hover columns into the (points x columns) customdata array."""
+    customdata = np.empty((len(columns[0]), len(columns)), dtype=object)
+    for position, values in enumerate(columns):
+        customdata[:, position] = values
+    return customdata
+
+
+def parse_zoom(relayout_data, log_y=False):
+    """
+    Read the visible axis ranges from a graph's relayoutData.
+
+    Args:
+        relayout_data (dict): relayoutData of the graph
+        log_y (bool): Whether the y axis is logarithmic (its ranges are log10 values)
+
+    Returns:
+        dict or None: {'x': (lo, hi), 'y': (lo, hi)} in data units with only the
+        zoomed axes present, {} when the view was reset, or None when the event
+        did not change the axes (e.g. autosize)
+    """
+    if not relayout_data:
+        return None
+    view = {}
+    for axis in ('x', 'y'):
+        if f'{axis}axis.range[0]' in relayout_data:
+            lo = relayout_data[f'{axis}axis.range[0]']
+            hi = relayout_data[f'{axis}axis.range[1]']
+        elif f'{axis}axis.range' in relayout_data:
+            lo, hi = relayout_data[f'{axis}axis.range']
+        else:
+            continue
+        if axis == 'y' and log_y:
+            lo, hi = 10 ** lo, 10 ** hi
+        view[axis] = (min(lo, hi), max(lo, hi))
+    if view:
+        return view
+    if any(key.endswith('autorange') for key in relayout_data):
+        return {}
+    return None
+
+
+def _rows_in_view(frame, x_column, y_column, view):
+    """Keep the rows of frame that fall inside a zoomed view."""
+    if not view:
+        return frame
+    keep = np.ones(len(frame), dtype=bool)
+    for axis, column in (('x', x_column), ('y', y_column)):
+        if axis in view:
+            values = frame[column].to_numpy()
+            keep &= (values >= view[axis][0]) & (values <= view[axis][1])
+    return frame[keep]
+
+
+def build_density_figure(x, y, view, title, x_title, y_title, log_y=False):
+    """
+    Server-side 2D histogram of a scatter plot that has too many points to send.
+
+    Only the bin counts reach the browser. A logarithmic y axis is binned in log space.
+    """
+    x_range = view.get('x') if view else None
+    y_range = view.get('y') if view else None
+    if len(x) == 0:
+        x_range, y_range = x_range or (0, 1), y_range or (1, 10)
+    x_range = x_range or (float(np.min(x)), float(np.max(x)))
+    y_range = y_range or (float(np.min(y)), float(np.max(y)))
+    x_edges = np.linspace(x_range[0], x_range[1], DENSITY_BINS + 1)
+    if log_y:
+        y_edges = np.logspace(np.log10(y_range[0]), np.log10(y_range[1]), DENSITY_BINS + 1)
+    else:
+        y_edges = np.linspace(y_range[0], y_range[1], DENSITY_BINS + 1)
+    counts, _, _ = np.histogram2d(x, y, bins=[x_edges, y_edges])
+    counts[counts == 0] = np.nan
+
+    layout = figure_layout(f'{title} - density of {len(x):,} movies (zoom in for details)', x_title, y_title,
+                           font=dict(size=10), margin=dict(l=50, r=50, t=50, b=50))
+    if log_y:
+        layout['yaxis']['type'] = 'log'
+    return {'data': [{
+        'type': 'heatmap',
+        'z': counts.T,
+        'x': x_edges,
+        'y': y_edges,
+        'colorscale': COLOR_SCALES['Viridis'],
+        'colorbar': {'title': {'text': 'Movies'}},
+        'hovertemplate': f'{x_title}: %{{x}}<br>{y_title}: %{{y}}<br>Movies: %{{z}}<extra></extra>'
+    }], 'layout': layout}
+
+
+def _apply_view(fig, view, log_y=False):
+    """Keep a zoomed graph at the zoomed ranges after it is re-rendered."""
+    if view and 'x' in view:
+        fig['layout']['xaxis']['range'] = list(view['x'])
+    if view and 'y' in view:
+        fig['layout']['yaxis']['range'] = list(np.log10(view['y'])) if log_y else list(view['y'])
+    return fig
+
+
+def build_scatter_votes(filter_state, view=None):
+    """Visualization 1: scatter plot of rating vs number of votes."""
     # Purpose: Shows the relationship between movie quality (rating) and popularity (votes)
     # Insight: High-rated movies tend to receive more votes, showing correlation between quality and interest
     
-    fig_scatter_votes = px.scatter(
-        filtered_df,
-        x='No_of_Votes',
-        y='IMDB_Rating',
-        hover_data=['Series_Title', 'Released_Year', 'Director'],
-        color='Released_Year',
-        size='Runtime_Minutes',
-        labels={'No_of_Votes': 'Number of Votes', 'IMDB_Rating': 'Rating'},
-        title='Rating vs Popularity (Votes)',
-        color_continuous_scale='Viridis'
-    )
-    fig_scatter_votes.update_layout(
+    filtered_df = filtered_frame(filter_state, ['No_of_Votes', 'IMDB_Rating', 'Runtime_Minutes',
+                                                'Series_Title', 'Released_Year', 'Director'])
+    filtered_df = _rows_in_view(filtered_df, 'No_of_Votes', 'IMDB_Rating', view)
+    
+    if len(filtered_df) > DENSITY_THRESHOLD:
+        fig_scatter_votes = build_density_figure(
+            filtered_df['No_of_Votes'].to_numpy(), filtered_df['IMDB_Rating'].to_numpy(), view,
+            'Rating vs Popularity (Votes)', 'Number of Votes', 'Rating')
+        return _apply_view(fig_scatter_votes, view)
+    
+    years = filtered_df['Released_Year'].to_numpy()
+    fig_scatter_votes = {'data': [express_scatter(
+        filtered_df['No_of_Votes'].to_numpy(),
+        filtered_df['IMDB_Rating'].to_numpy(),
+        color=years,
+        size=filtered_df['Runtime_Minutes'].to_numpy(),
+        customdata=_customdata(filtered_df.index.to_numpy(), filtered_df['Series_Title'].to_numpy(),
+                               years, filtered_df['Director'].to_numpy()),
+        hovertemplate='Number of Votes=%{x}<br>Rating=%{y}<br>Runtime_Minutes=%{marker.size}<br>'
+                      'Series_Title=%{customdata[1]}<br>Released_Year=%{marker.color}<br>'
+                      'Director=%{customdata[3]}<extra></extra>'
+    )], 'layout': express_layout(
+        'Rating vs Popularity (Votes)', 'Number of Votes', 'Rating', 'Released_Year', 'Viridis',
+        legend=dict(tracegroupgap=0, itemsizing='constant'),
         hovermode='closest',
         font=dict(size=10),
         margin=dict(l=50, r=50, t=50, b=50)
-    )
-    
-    # ====================================================================
-    # VISUALIZATION 2: HISTOGRAM - Rating Distribution
-    # ====================================================================
+    )}
+    return _apply_view(fig_scatter_votes, view)
+
+
+def build_rating_histogram(filter_state, approximate=False):
+    """Visualization 2: histogram of the rating distribution (from the sample if approximate)."""
     # Purpose: Shows the distribution of movie ratings across the dataset
     # Insight: Helps understand if ratings are skewed towards higher values (quality bias in top 1000)
     
-    fig_histogram = go.Figure()
-    fig_histogram.add_trace(go.Histogram(
-        x=filtered_df['IMDB_Rating'],
-        nbinsx=20,
-        name='Movies',
-        marker=dict(color=COLOR_PRIMARY, line=dict(color='white', width=1))
-    ))
-    fig_histogram.update_layout(
-        title='Distribution of IMDB Ratings',
-        xaxis_title='IMDB Rating',
-        yaxis_title='Number of Movies',
+    if approximate:
+        # Each bar sums the movies that the sampled ones stand for
+        ratings, weights = dataset_for(filter_state).sample.rating_values(filter_state)
+        values = {'x': ratings, 'y': weights, 'histfunc': 'sum'}
+    else:
+        filtered_df = filtered_frame(filter_state, ['IMDB_Rating'])
+        values = {'x': filtered_df['IMDB_Rating'].to_numpy()}
+    
+    return {'data': [{
+        'type': 'histogram',
+        **values,
+        'nbinsx': 20,
+        'name': 'Movies',
+        'marker': dict(color=COLOR_PRIMARY, line=dict(color='white', width=1))
+    }], 'layout': figure_layout(
+        approximate_title('Distribution of IMDB Ratings', approximate), 'IMDB Rating', 'Number of Movies',
         showlegend=False,
         font=dict(size=10),
         margin=dict(l=50, r=50, t=50, b=50)
-    )
-    
-    # ====================================================================
-    # VISUALIZATION 3: LINE CHART - Rating Trend Over Time
-    # ====================================================================
+    )}
+
+
+def build_rating_trend(filter_state, approximate=False):
+    """Visualization 3: line chart of the average rating per year (from the sample if approximate)."""
     # Purpose: Shows how average movie ratings have changed over decades
     # Insight: Identifies whether movie quality has improved or declined over time
     
-    yearly_avg = filtered_df.groupby('Released_Year').agg({
-        'IMDB_Rating': 'mean',
-        'Series_Title': 'count'
-    }).reset_index()
-    # groupby-ից հետո Released_Year-ը դառնում է index։ reset_index-ը դարձնում է սովորական սյունակ։
-    yearly_avg.columns = ['Year', 'Average_Rating', 'Movie_Count']
+    if approximate:
+        yearly_avg = dataset_for(filter_state).sample.yearly(filter_state)
+    else:
+        yearly_avg = yearly_average(filter_state)
     
-    fig_line = go.Figure()
-    fig_line.add_trace(go.Scatter(
-        x=yearly_avg['Year'],
-        y=yearly_avg['Average_Rating'],
-        mode='lines+markers',
-        name='Average Rating',
-        line=dict(color=COLOR_SUCCESS, width=3),
-        marker=dict(size=8),
-        fill='tozeroy',
-        fillcolor='rgba(44, 160, 44, 0.2)'
-    ))
-    fig_line.update_layout(
-        title='Average Movie Rating Over Time',
-        xaxis_title='Year',
-        yaxis_title='Average Rating',
+    return {'data': [{
+        'type': 'scatter',
+        'x': yearly_avg['Year'].to_numpy(),
+        'y': yearly_avg['Average_Rating'].to_numpy(),
+        'mode': 'lines+markers',
+        'name': 'Average Rating',
+        'line': dict(color=COLOR_SUCCESS, width=3),
+        'marker': dict(size=8),
+        'fill': 'tozeroy',
+        'fillcolor': 'rgba(44, 160, 44, 0.2)'
+    }], 'layout': figure_layout(
+        approximate_title('Average Movie Rating Over Time', approximate), 'Year', 'Average Rating',
         font=dict(size=10),
         margin=dict(l=50, r=50, t=50, b=50),
         hovermode='x unified'
-    )
-    
-    # ====================================================================
-    # VISUALIZATION 4: BAR CHART - Top Genres
-    # ====================================================================
+    )}
+
+
+def build_top_genres(filter_state, approximate=False):
+    """Visualization 4: bar chart of the ten most common genres (estimated from the sample if approximate)."""
     # Purpose: Shows which genres are most common in the top-rated movies
     # Insight: Identifies dominant genres that define high-quality cinema
     
-    genre_counts = {}
-    for genres in filtered_df['Genre_List']:
-        for genre in genres:
-            genre_counts[genre] = genre_counts.get(genre, 0) + 1
+    if approximate:
+        genre_counts = dataset_for(filter_state).sample.genre_counts(filter_state)
+    else:
+        genre_counts = genre_totals(filter_state)
+    genre_counts = rank_genres(genre_counts)
     
     genre_df = pd.DataFrame(
-        list(genre_counts.items()),
-        columns=['Genre', 'Count']
-    ).sort_values('Count', ascending=False).head(10)
-    
-    fig_genres = px.bar(
-        genre_df,
-        x='Count',
-        y='Genre',
-        orientation='h',
-        title='Top 10 Genres in Top-Rated Movies',
-        labels={'Count': 'Number of Movies', 'Genre': 'Genre'},
-        color='Count',
-        color_continuous_scale='Blues'
-    )
-    fig_genres.update_layout(
+        {'Genre': genre_counts.index, 'Count': genre_counts.values}
+    ).head(10)
+    
+    return {'data': [express_bar(
+        genre_df['Count'].to_numpy(),
+        genre_df['Genre'].to_numpy(),
+        hovertemplate='Number of Movies=%{marker.color}<br>Genre=%{y}<extra></extra>'
+    )], 'layout': express_layout(
+        approximate_title('Top 10 Genres in Top-Rated Movies', approximate), 'Number of Movies', 'Genre',
+        'Number of Movies', 'Blues',
+        legend=dict(tracegroupgap=0),
+        barmode='relative',
         font=dict(size=10),
         margin=dict(l=150, r=50, t=50, b=50),
         showlegend=False
-    )
-    
-    # ====================================================================
-    # VISUALIZATION 5: BAR CHART - Top Directors by Average Rating
-    # ====================================================================
+    )}
+
+
+def build_top_directors(filter_state):
+    """Visualization 5: bar chart of the top directors by average rating."""
     # Purpose: Shows which directors consistently produce high-rated films
     # Insight: Identifies master filmmakers with best track records
     
-    director_stats = filtered_df.groupby('Director').agg({
-        'IMDB_Rating': 'mean',
-        'Series_Title': 'count'
-    }).reset_index()
-    director_stats.columns = ['Director', 'Avg_Rating', 'Movie_Count']
+    director_avg = director_averages(filter_state)
     
     # Only show directors with at least 2 movies in filtered set
-    director_stats = director_stats[director_stats['Movie_Count'] >= 2]
-    director_stats = director_stats.sort_values('Avg_Rating', ascending=False).head(10)
-    
-    fig_directors = px.bar(
-        director_stats,
-        x='Avg_Rating',
-        y='Director',
-        orientation='h',
-        title='Top Directors by Average Rating (Min 2 Films)',
-        labels={'Avg_Rating': 'Average Rating', 'Director': 'Director'},
-        color='Avg_Rating',
-        color_continuous_scale='Greens'
-    )
-    fig_directors.update_layout(
+    director_avg = director_avg[director_avg['Movie_Count'] >= 2]
+    director_avg = director_avg.sort_values('Avg_Rating', ascending=False, kind='stable').head(10)
+    
+    return {'data': [express_bar(
+        director_avg['Avg_Rating'].to_numpy(),
+        director_avg['Director'].to_numpy(),
+        hovertemplate='Average Rating=%{marker.color}<br>Director=%{y}<extra></extra>'
+    )], 'layout': express_layout(
+        'Top Directors by Average Rating (Min 2 Films)', 'Average Rating', 'Director', 'Average Rating', 'Greens',
+        legend=dict(tracegroupgap=0),
+        barmode='relative',
         font=dict(size=10),
         margin=dict(l=150, r=50, t=50, b=50),
         showlegend=False
-    )
-    
-    # ====================================================================
-    # VISUALIZATION 6: SCATTER PLOT - Rating vs Box Office Revenue
-    # ====================================================================
+    )}
+
+
+def build_rating_revenue(filter_state, view=None):
+    """Visualization 6: scatter plot of rating vs box office revenue."""
     # Purpose: Shows whether critical acclaim (rating) correlates with financial success
     # Insight: Explores the relationship between critical ratings and commercial performance
     
+    filtered_df = filtered_frame(filter_state, ['IMDB_Rating', 'Gross', 'No_of_Votes',
+                                                'Series_Title', 'Released_Year'])
+    
     # Filter out movies with zero gross revenue for cleaner visualization
     revenue_df = filtered_df[filtered_df['Gross'] > 0]
+    revenue_df = _rows_in_view(revenue_df, 'IMDB_Rating', 'Gross', view)
     
-    fig_revenue = px.scatter(
-        revenue_df,
-        x='IMDB_Rating',
-        y='Gross',
-        hover_data=['Series_Title', 'Released_Year'],
-        color='Released_Year',
-        size='No_of_Votes',
-        title='Rating vs Box Office Revenue',
-        labels={'IMDB_Rating': 'IMDB Rating', 'Gross': 'Box Office Revenue ($)'},
-        color_continuous_scale='Plasma'
-    )
-    fig_revenue.update_yaxes(type='log')
-    fig_revenue.update_layout(
+    if len(revenue_df) > DENSITY_THRESHOLD:
+        fig_revenue = build_density_figure(
+            revenue_df['IMDB_Rating'].to_numpy(), revenue_df['Gross'].to_numpy(), view,
+            'Rating vs Box Office Revenue', 'IMDB Rating', 'Box Office Revenue ($)', log_y=True)
+        return _apply_view(fig_revenue, view, log_y=True)
+    
+    years = revenue_df['Released_Year'].to_numpy()
+    fig_revenue = {'data': [express_scatter(
+        revenue_df['IMDB_Rating'].to_numpy(),
+        revenue_df['Gross'].to_numpy(),
+        color=years,
+        size=revenue_df['No_of_Votes'].to_numpy(),
+        customdata=_customdata(revenue_df['Series_Title'].to_numpy(), years),
+        hovertemplate='IMDB Rating=%{x}<br>Box Office Revenue ($)=%{y}<br>No_of_Votes=%{marker.size}<br>'
+                      'Series_Title=%{customdata[0]}<br>Released_Year=%{marker.color}<extra></extra>'
+    )], 'layout': express_layout(
+        'Rating vs Box Office Revenue', 'IMDB Rating', 'Box Office Revenue ($)', 'Released_Year', 'Plasma',
+        legend=dict(tracegroupgap=0, itemsizing='constant'),
         hovermode='closest',
         font=dict(size=10),
         margin=dict(l=50, r=50, t=50, b=50)
-    )
-    
-    # ====================================================================
-    # VISUALIZATION 7: HORIZONTAL BAR CHART - Top 30 Most Popular Films
-    # ====================================================================
+    )}
+    fig_revenue['layout']['yaxis']['type'] = 'log'
+    return _apply_view(fig_revenue, view, log_y=True)
+
+
+def build_top_30_films(filter_state):
+    """Visualization 7: horizontal bar chart of the 30 most voted films."""
     # Purpose: Shows the most popular films by number of votes
     # Insight: Identifies which films have captured audience interest the most
     
-    top_30_films = filtered_df.nlargest(30, 'No_of_Votes')[['Series_Title', 'No_of_Votes', 'IMDB_Rating']]
+    dataset = dataset_for(filter_state)
+    top_30_films = frame_rows(dataset, top_voted_rows(filter_state, 30),
+                              ['Series_Title', 'No_of_Votes', 'IMDB_Rating'])
     top_30_films = top_30_films.sort_values('No_of_Votes', ascending=True)
     
-    fig_top_30 = go.Figure()
-    fig_top_30.add_trace(go.Bar(
-        y=top_30_films['Series_Title'],
-        x=top_30_films['No_of_Votes'],
-        orientation='h',
-        marker=dict(
-            color=top_30_films['IMDB_Rating'],
-            colorscale='Viridis',
-            colorbar=dict(title="Rating"),
+    return {'data': [{
+        'type': 'bar',
+        'y': top_30_films['Series_Title'].to_numpy(),
+        'x': top_30_films['No_of_Votes'].to_numpy(),
+        'orientation': 'h',
+        'marker': dict(
+            color=top_30_films['IMDB_Rating'].to_numpy(),
+            colorscale=COLOR_SCALES['Viridis'],
+            colorbar=dict(title=dict(text="Rating")),
             line=dict(color='white', width=1)
         ),
-        text=top_30_films['No_of_Votes'].apply(lambda x: f'{int(x):,}'),
-        textposition='outside',
-        hovertemplate='<b>%{y}</b><br>Votes: %{x:,}<extra></extra>'
-    ))
-    
-    fig_top_30.update_layout(
-        title='Top 30 Most Popular Films (by Number of Votes)',
-        xaxis_title='Number of Votes',
-        yaxis_title='Film Title',
+        'text': [f'{int(x):,}' for x in top_30_films['No_of_Votes']],
+        'textposition': 'outside',
+        'customdata': top_30_films.index.to_numpy(),
+        'hovertemplate': '<b>%{y}</b><br>Votes: %{x:,}<extra></extra>'
+    }], 'layout': figure_layout(
+        'Top 30 Most Popular Films (by Number of Votes)', 'Number of Votes', 'Film Title',
         height=600,
         margin=dict(l=300, r=100, t=60, b=50),
         font=dict(size=10),
         showlegend=False,
         hovermode='closest'
+    )}
+
+
+def top_positions(values, k):
+    """Positions of the k largest positive values, largest first and ties in position order."""
+    candidates = np.flatnonzero(values > 0)
+    if len(candidates) > k:
+        kth = np.partition(values[candidates], -k)[-k]
+        candidates = candidates[values[candidates] >= kth]
+    return candidates[np.lexsort((candidates, -values[candidates]))][:k]
+
+
+def _people_bar_layout(title, x_title, y_title, colorscale):
+    return express_layout(
+        title, x_title, y_title, x_title, colorscale,
+        legend=dict(tracegroupgap=0),
+        barmode='relative',
+        font=dict(size=10),
+        margin=dict(l=250, r=50, t=50, b=50),
+        showlegend=False
     )
+
+
+def build_top_collaborations(filter_state):
+    """Visualization 8: bar chart of the pairs of people who made the most films together."""
+    # Purpose: Shows the director/star and co-star partnerships that recur most often
+    # Insight: Reveals the working relationships behind the filtered films
     
-    # ====================================================================
-    # SUMMARY METRICS
-    # ====================================================================
+    graph = dataset_for(filter_state).people_graph
+    counts = graph.edge_counts(filtered_rows(filter_state))
+    top = top_positions(counts, 10)
+    pairs = graph.names[graph.edge_people[top]].reshape(-1, 2)
     
-    metric_count = len(filtered_df)  
-    # սա ֆիլտրերից հետև մնացած ֆիլմերի քանակն է, որը ցույց է տալիս, թե քանի ֆիլմ է համապատասխանում ընտրված ֆիլտրերին։
-    metric_avg_rating = f"{filtered_df['IMDB_Rating'].mean():.2f}"
-    metric_total_votes = f"{int(filtered_df['No_of_Votes'].sum()):,}"
-    metric_gross = f"${filtered_df['Gross'].sum()/1e9:.2f}B" if filtered_df['Gross'].sum() > 0 else "$0"
+    return {'data': [express_bar(
+        counts[top],
+        np.array([f"{first} & {second}" for first, second in pairs], dtype=object),
+        hovertemplate='Films Together=%{marker.color}<br>Pair=%{y}<extra></extra>'
+    )], 'layout': _people_bar_layout('Most Frequent Collaborations', 'Films Together', 'Pair', 'Plasma')}
+
+
+def build_connected_actors(filter_state):
+    """Visualization 9: bar chart of the stars with the most distinct collaborators."""
+    # Purpose: Shows which actors connect the most people (co-stars and directors)
+    # Insight: Identifies the hubs of the collaboration network
     
-    return (
-        fig_scatter_votes,
-        fig_histogram,
-        fig_line,
-        fig_genres,
-        fig_directors,
-        fig_revenue,
-        fig_top_30,
-        metric_count,
-        metric_avg_rating,
-        metric_total_votes,
-        metric_gross,
-        year_range,
-        selected_genre,
-        min_rating
-    )
+    graph = dataset_for(filter_state).people_graph
+    degrees = np.where(graph.is_star, graph.degrees(filtered_rows(filter_state)), 0)
+    top = top_positions(degrees, 10)
+    
+    return {'data': [express_bar(
+        degrees[top],
+        graph.names[top],
+        hovertemplate='Collaborators=%{marker.color}<br>Actor=%{y}<extra></extra>'
+    )], 'layout': _people_bar_layout('Most Connected Actors (Click to See Collaborators)',
+                                     'Collaborators', 'Actor', 'Viridis')}
+
+
+def build_director_star_pairs(filter_state):
+    """Visualization 10: bar chart of the director/star pairs with the best average rating."""
+    # Purpose: Shows which director and actor combinations produce the best films
+    # Insight: Identifies partnerships that are better than either person alone
+    
+    dataset = dataset_for(filter_state)
+    graph = dataset.people_graph
+    counts, sums = graph.pair_totals(filtered_rows(filter_state),
+                                     widen_float32(dataset.frame['IMDB_Rating'].to_numpy()))
+    # Only show pairs with at least 2 movies in filtered set
+    repeated = counts >= 2
+    # Rounded so equal averages tie exactly whatever the summation order
+    averages = np.where(repeated, np.round(sums / np.maximum(counts, 1), 12), 0)
+    top = top_positions(averages, 10)
+    pairs = graph.names[graph.pair_people[top]].reshape(-1, 2)
+    
+    return {'data': [express_bar(
+        averages[top],
+        np.array([f"{director} & {star}" for director, star in pairs], dtype=object),
+        customdata=counts[top],
+        hovertemplate='Average Rating=%{marker.color}<br>Director & Star=%{y}<br>'
+                      'Films=%{customdata}<extra></extra>'
+    )], 'layout': _people_bar_layout('Top Director & Star Pairs by Average Rating (Min 2 Films)',
+                                     'Average Rating', 'Director & Star', 'Greens')}
+
+
+# Each graph in the layout and the function that builds its figure
+FIGURE_BUILDERS = {
+    'scatter-rating-votes': build_scatter_votes,
+    'histogram-ratings': build_rating_histogram,
+    'line-rating-trend': build_rating_trend,
+    'bar-top-genres': build_top_genres,
+    'bar-top-directors': build_top_directors,
+    'scatter-rating-revenue': build_rating_revenue,
+    'bar-top-30-films': build_top_30_films,
+    'bar-top-collaborations': build_top_collaborations,
+    'bar-connected-actors': build_connected_actors,
+    'bar-director-star-pairs': build_director_star_pairs,
+}
+
+
+def _is_default_state(filter_state):
+    return filter_state['key'] == default_filter_state(dataset_for(filter_state))['key']
+
+
+def cached_metrics(filter_state):
+    """Summary metrics for a filter state, served from the result cache when possible."""
+    def compute():
+        with stage_timings.time('metrics'):
+            return json.dumps(compute_metrics(filter_state))
+
+    payload = result_cache.get_or_compute(('metrics', filter_state['key']), compute,
+                                          pinned=_is_default_state(filter_state), version=filter_state['version'])
+    return tuple(json.loads(payload))
+
+
+def build_figure(graph_id, filter_state, view=None):
+    """Build one graph's figure, recording the time under 'figure:<graph id>'."""
+    with stage_timings.time(f'figure:{graph_id}'):
+        if view is None:
+            return FIGURE_BUILDERS[graph_id](filter_state)
+        return FIGURE_BUILDERS[graph_id](filter_state, view=view)
+
+
+def serialize_figure(graph_id, filter_state):
+    """Build one graph's figure and return it as a Plotly JSON string."""
+    fig = build_figure(graph_id, filter_state)
+    with stage_timings.time(f'serialize:{graph_id}'):
+        return pio.to_json(fig, validate=False)
+
+
+def _serialize_figure_with_rows(graph_id, filter_state, rows):
+    """Process pool entry point: reuse the parent's row indices instead of filtering again."""
+    remember_rows(filter_state, rows)
+    return serialize_figure(graph_id, filter_state)
+
+
+def _init_figure_worker():
+    # Workers are forked from a running server, where another thread may hold
+    # one of these locks at that moment; give the worker fresh ones
+    global _filtered_index_lock
+    _filtered_index_lock = threading.Lock()
+    stage_timings._lock = threading.Lock()
+
+
+# How figures are built once a filter state is known: 'serial' (each chart
+# callback builds its own figure), 'thread' or 'process' (all figures of a
+# new filter state are built concurrently on a pool while the browser's chart
+# requests are on their way)
+FIGURE_POOL_MODES = ('serial', 'thread', 'process')
+FIGURE_POOL_MODE = os.environ.get('DASHBOARD_FIGURE_POOL', 'serial')
+FIGURE_POOL_WORKERS = int(os.environ.get('DASHBOARD_FIGURE_WORKERS', '0')) or None
+
+
+class FigurePool:
+    """
+    Builds and serializes figures serially or on a thread or process pool.
+
+    Process workers are forked from the loaded app, so they share the dataset
+    copy-on-write; each job sends only the filter state and the filtered row
+    indices, and gets back the figure JSON. Stage timings recorded inside a
+    process worker stay in that worker.
+    """
+
+    def __init__(self, mode='serial', workers=None):
+        if mode not in FIGURE_POOL_MODES:
+            raise ValueError(f"Unknown figure pool mode {mode!r}, expected one of {FIGURE_POOL_MODES}")
+        if mode == 'process' and 'fork' not in multiprocessing.get_all_start_methods():
+            print("Process figure pool needs fork(); using threads instead", file=sys.stderr)
+            mode = 'thread'
+        self.mode = mode
+        self.workers = workers or min(len(FIGURE_BUILDERS), os.cpu_count() or 1)
+        if mode == 'thread':
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='figure')
+        elif mode == 'process':
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('fork'),
+                                                 initializer=_init_figure_worker)
+        else:
+            self._executor = None
+
+    def submit(self, graph_id, filter_state):
+        """
+        Start building one figure.
+
+        Returns:
+            Future: Resolves to the figure JSON string (already resolved in serial mode)
+        """
+        if self.mode == 'thread':
+            return self._executor.submit(serialize_figure, graph_id, filter_state)
+        if self.mode == 'process':
+            return self._executor.submit(_serialize_figure_with_rows, graph_id, filter_state,
+                                         filtered_rows(filter_state))
+        future = Future()
+        try:
+            future.set_result(serialize_figure(graph_id, filter_state))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def build_all(self, filter_state, graph_ids=None):
+        """
+        Build several figures for one filter state (all graphs by default).
+
+        Returns:
+            dict: Figure JSON string per graph id
+        """
+        futures = {graph_id: self.submit(graph_id, filter_state)
+                   for graph_id in (graph_ids or FIGURE_BUILDERS)}
+        return {graph_id: future.result() for graph_id, future in futures.items()}
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+
+figure_pool = FigurePool(FIGURE_POOL_MODE, FIGURE_POOL_WORKERS)
+
+# Figures being built on the pool, by result cache key
+_pending_figures = {}
+_pending_figures_lock = threading.Lock()
+
+
+def prefetch_figures(filter_state):
+    """Start building every figure of a filter state that is not cached yet (pool modes only)."""
+    if figure_pool.mode == 'serial':
+        return
+    pinned = _is_default_state(filter_state)
+    for graph_id in FIGURE_BUILDERS:
+        key = (graph_id, filter_state['key'])
+        with _pending_figures_lock:
+            if key in _pending_figures or key in result_cache or \
+                    result_cache.load_shared(key, filter_state['version']):
+                continue
+            future = figure_pool.submit(graph_id, filter_state)
+            _pending_figures[key] = future
+
+        def store(done, key=key):
+            if done.exception() is None:
+                result_cache.put(key, done.result(), pinned=pinned, publish=True, version=filter_state['version'])
+            with _pending_figures_lock:
+                _pending_figures.pop(key, None)
+
+        future.add_done_callback(store)
+
+
+def chart_figure(graph_id, filter_state):
+    """
+    Figure for one graph and filter state, served from the result cache when possible.
+
+    A figure that is already being built on the figure pool is waited for
+    instead of being built a second time.
+
+    Returns:
+        dict: The figure in Plotly JSON form
+    """
+    key = (graph_id, filter_state['key'])
+    with _pending_figures_lock:
+        future = _pending_figures.get(key)
+    if future is not None:
+        return json.loads(future.result())
+    payload = result_cache.get_or_compute(key, lambda: serialize_figure(graph_id, filter_state),
+                                          pinned=_is_default_state(filter_state), version=filter_state['version'])
+    return json.loads(payload)
+
+
+def warm_result_cache(dataset=None, pool=None):
+    """
+    Compute and pin the default view, so the first page load and reset are cache hits.
+
+    Figures already published by another worker are read from the shared store.
+    """
+    filter_state = default_filter_state(dataset)
+    cached_metrics(filter_state)
+    missing = []
+    for graph_id in FIGURE_BUILDERS:
+        payload = fetch_shared((graph_id, filter_state['key']))
+        if payload is None:
+            missing.append(graph_id)
+        else:
+            result_cache.put((graph_id, filter_state['key']), payload, pinned=True, version=filter_state['version'])
+    if missing:
+        for graph_id, payload in (pool or figure_pool).build_all(filter_state, missing).items():
+            result_cache.put((graph_id, filter_state['key']), payload, pinned=True, publish=True,
+                             version=filter_state['version'])
+
+
+# Graphs whose layout never depends on the filters (apart from the title), and
+# the trace fields that do. The page starts with their default figure and
+# their callbacks send only these fields and the title (as a dash.Patch)
+# instead of the whole figure with its layout, colorbar and template.
+PATCHED_GRAPHS = {
+    # y and histfunc only in the approximate view, where sampled ratings are weighted
+    'histogram-ratings': ['x', 'y', 'histfunc'],
+    'line-rating-trend': ['x', 'y'],
+    'bar-top-30-films': ['x', 'y', 'text', 'customdata', 'marker.color'],
+}
+
+
+def chart_patch(graph_id, figure):
+    """
+    Patch that turns the figure on the page into a new figure of a patched graph.
+
+    Only the filter-dependent trace fields and the title are sent; fields
+    that the new trace does not have are removed.
+    """
+    trace = figure['data'][0]
+    patch = Patch()
+    for path in PATCHED_GRAPHS[graph_id]:
+        *parents, field = path.split('.')
+        source, target = trace, patch['data'][0]
+        for parent in parents:
+            source, target = source.get(parent, {}), target[parent]
+        if field in source:
+            target[field] = source[field]
+        else:
+            del target[field]
+    patch['layout']['title']['text'] = figure['layout']['title']['text']
+    return patch
+
+
+# Scatter plots that re-render the zoomed window on the server, and whether
+# their y axis is logarithmic
+ZOOMABLE_GRAPHS = {
+    'scatter-rating-votes': False,
+    'scatter-rating-revenue': True,
+}
+
+
+def register_chart_callback(graph_id):
+    """Register a callback that rebuilds one graph whenever the filter state changes."""
+
+    @app.callback(Output(graph_id, 'figure'), Input('filter-state', 'data'), prevent_initial_call=True)
+    def update_chart(filter_state):
+        if not filter_state:
+            raise PreventUpdate
+        if graph_id in PATCHED_GRAPHS:
+            return chart_patch(graph_id, chart_figure(graph_id, filter_state))
+        return chart_figure(graph_id, filter_state)
+
+    update_chart.__name__ = f"update_{graph_id.replace('-', '_')}"
+    return update_chart
+
+
+def register_approximate_chart_callback(graph_id):
+    """
+    Register the callback of a graph with an approximate view.
+
+    A new approximate filter state is drawn from the sample, unless the exact
+    figure is already cached, and the exact figure replaces it once
+    refine_view() reports that the exact results are ready.
+    """
+
+    @app.callback(Output(graph_id, 'figure'),
+                  Input('filter-state', 'data'),
+                  Input('refined-state', 'data'),
+                  prevent_initial_call=True)
+    def update_chart(filter_state, refined):
+        if not filter_state:
+            raise PreventUpdate
+        if _triggered_id() == 'refined-state':
+            if not refined or refined['key'] != filter_state['key']:
+                # Refinement of filters that have changed since
+                raise PreventUpdate
+            figure = chart_figure(graph_id, filter_state)
+        elif filter_state.get('approximate') and (graph_id, filter_state['key']) not in result_cache:
+            figure = approximate_figure(graph_id, filter_state)
+        else:
+            figure = chart_figure(graph_id, filter_state)
+        return chart_patch(graph_id, figure) if graph_id in PATCHED_GRAPHS else figure
+
+    update_chart.__name__ = f"update_{graph_id.replace('-', '_')}"
+    return update_chart
+
+
+def register_zoomable_chart_callback(graph_id, log_y):
+    """
+    Register the callback of a scatter plot that also reacts to zooming.
+
+    A new filter state always renders the full (cached) view. A zoom renders
+    only the movies inside the zoomed window, so a density heatmap turns into
+    individual points with hover details once few enough movies are visible.
+    """
+
+    @app.callback(Output(graph_id, 'figure'),
+                  Input('filter-state', 'data'),
+                  Input(graph_id, 'relayoutData'),
+                  prevent_initial_call=True)
+    def update_chart(filter_state, relayout_data):
+        if not filter_state:
+            raise PreventUpdate
+        if _triggered_id() != graph_id:
+            return chart_figure(graph_id, filter_state)
+        view = parse_zoom(relayout_data, log_y=log_y)
+        if view is None:
+            raise PreventUpdate
+        if not view:
+            return chart_figure(graph_id, filter_state)
+        if filter_state.get('count', 0) <= DENSITY_THRESHOLD:
+            # Every point is already in the browser, which zooms on its own
+            raise PreventUpdate
+        return build_figure(graph_id, filter_state, view=view)
+
+    update_chart.__name__ = f"update_{graph_id.replace('-', '_')}"
+    return update_chart
+
+
+for _graph_id in FIGURE_BUILDERS:
+    if _graph_id in ZOOMABLE_GRAPHS:
+        register_zoomable_chart_callback(_graph_id, ZOOMABLE_GRAPHS[_graph_id])
+    elif _graph_id in APPROXIMATE_GRAPHS:
+        register_approximate_chart_callback(_graph_id)
+    else:
+        register_chart_callback(_graph_id)
+
+# ============================================================================
+# COLLABORATORS OF A PERSON
+# ============================================================================
+
+# Clicking a name in the most connected actors, top directors or collaborators
+# chart shows that person's collaborators under the current filters, so the
+# collaboration graph can be walked one person at a time.
+
+# Graphs whose bars are labeled with a person's name
+PERSON_GRAPHS = ['bar-connected-actors', 'bar-top-directors', 'bar-person-collaborators']
+
+# Collaborators shown for one person
+PERSON_COLLABORATORS_SHOWN = 15
+
+
+def build_person_collaborators(filter_state, person=None):
+    """
+    Visualization 11: bar chart of the people one person made the most filtered films with.
+
+    Args:
+        filter_state (dict): Filter state from make_filter_state
+        person (str): Person name, or None (or a name not in the catalog) for
+            the most connected actor under the filters
+    """
+    graph = dataset_for(filter_state).people_graph
+    rows = filtered_rows(filter_state)
+    person_id = graph.person_id(person)
+    if person_id is None:
+        top = top_positions(np.where(graph.is_star, graph.degrees(rows), 0), 1)
+        person_id = int(top[0]) if len(top) else None
+    if person_id is None:
+        people, counts, title = np.array([], dtype=object), np.array([], dtype=np.int64), 'Collaborators'
+    else:
+        ids, counts = graph.collaborators(person_id, rows)
+        order = np.lexsort((ids, -counts))[:PERSON_COLLABORATORS_SHOWN]
+        people, counts = graph.names[ids[order]], counts[order]
+        title = f"Collaborators of {graph.names[person_id]} ({len(graph.films_of(person_id, rows))} Films)"
+    
+    return {'data': [express_bar(
+        counts,
+        people,
+        hovertemplate='Films Together=%{marker.color}<br>Collaborator=%{y}<extra></extra>'
+    )], 'layout': _people_bar_layout(title, 'Films Together', 'Collaborator', 'Blues')}
+
+
+def person_figure(filter_state, person=None):
+    """Collaborators figure of a person and filter state, served from the result cache when possible."""
+    def compute():
+        with stage_timings.time('figure:bar-person-collaborators'):
+            fig = build_person_collaborators(filter_state, person)
+        return pio.to_json(fig, validate=False)
+
+    payload = result_cache.get_or_compute(('bar-person-collaborators', person, filter_state['key']), compute,
+                                          pinned=person is None and _is_default_state(filter_state),
+                                          version=filter_state['version'])
+    return json.loads(payload)
+
+
+@app.callback(
+    Output('selected-person', 'data'),
+    [Input(graph_id, 'clickData') for graph_id in PERSON_GRAPHS],
+    prevent_initial_call=True
+)
+def select_person(*clicks):
+    """Remember the person clicked in one of the people charts."""
+    click_data = dict(zip(PERSON_GRAPHS, clicks)).get(_triggered_id())
+    if not click_data or not click_data.get('points'):
+        raise PreventUpdate
+    name = click_data['points'][0].get('y')
+    if not isinstance(name, str):
+        raise PreventUpdate
+    return name
+
+
+@app.callback(
+    Output('bar-person-collaborators', 'figure'),
+    Input('filter-state', 'data'),
+    Input('selected-person', 'data'),
+    prevent_initial_call=True
+)
+def update_person_collaborators(filter_state, person):
+    """Rebuild the collaborators chart for new filters or a newly selected person."""
+    if not filter_state:
+        raise PreventUpdate
+    return person_figure(filter_state, person)
+
+# Jobs cannot be sent to worker processes while this module is still being
+# imported (pickling them needs the import lock), so build serially then
+warm_result_cache(pool=FigurePool('serial') if figure_pool.mode == 'process' else None)
+
+app.layout = serve_layout
+
+# ============================================================================
+# DATASET RELOAD
+# ============================================================================
+
+# Seconds between checks of the source file for a new version (0 disables
+# reloading). The watcher is started by the first request a server process
+# handles, so importing the module never starts a thread.
+RELOAD_INTERVAL = float(os.environ.get('DASHBOARD_RELOAD_INTERVAL', '30'))
+
+_reload_lock = threading.Lock()
+
+
+def retire_dataset_versions(versions):
+    """Drop the cached results and row indices of every dataset version not in versions."""
+    result_cache.retain_versions(versions)
+    with _filtered_index_lock:
+        for key in [key for key in _filtered_index_cache if key[0] not in versions]:
+            del _filtered_index_cache[key]
+
+
+def reload_dataset(path=DATA_FILE):
+    """
+    Load the current contents of the source file and make them the current dataset.
+
+    The new version is preprocessed, indexed and its default view cached on
+    the calling thread before it is swapped in. Its results are cached next
+    to those of the live version, so requests keep being served from the
+    previous version (and its cached results) meanwhile. Once the new version
+    is current, only the versions that can no longer be resolved lose their
+    cached results.
+
+    Returns:
+        Dataset: The new current dataset, or None if the file has not changed
+    """
+    global figure_pool
+    with _reload_lock:
+        if dataset_version(path) == current_dataset().version:
+            return None
+        dataset = Dataset.load(path)
+        # Resolvable by its version, so its default view can be computed, but not current yet
+        add_dataset(dataset)
+        if figure_pool.mode == 'process':
+            # The workers were forked before this version existed; fork new ones
+            previous_pool, figure_pool = figure_pool, FigurePool(figure_pool.mode, figure_pool.workers)
+            previous_pool.shutdown(wait=False)
+        warm_result_cache(dataset)
+        activate_dataset(dataset)
+        retire_dataset_versions(set(_datasets))
+        # Build the new page now rather than on the next visitor's request
+        serve_layout()
+        return dataset
+
+
+def watch_dataset(path, interval, stop):
+    """
+    Reload the dataset whenever the source file changes, until stop is set.
+
+    A new version is only loaded once the file has looked the same on two
+    checks in a row, so a file that is still being written is not read half
+    way. A version that fails to load is not retried until the file changes
+    again.
+    """
+    seen = failed = None
+    while not stop.wait(interval):
+        try:
+            version = dataset_version(path)
+        except OSError:
+            # The file is being replaced
+            continue
+        if version != seen or version in (current_dataset().version, failed):
+            seen = version
+            continue
+        try:
+            reload_dataset(path)
+        except Exception as exc:
+            print(f"Warning: could not reload {path}: {exc}", file=sys.stderr)
+            failed = version
+
+
+def start_dataset_watcher(path=DATA_FILE, interval=RELOAD_INTERVAL):
+    """
+    Watch the source file for new versions on a daemon thread.
+
+    Returns:
+        Event: Set it to stop the watcher
+    """
+    stop = threading.Event()
+    threading.Thread(target=watch_dataset, args=(path, interval, stop),
+                     name='dataset-watcher', daemon=True).start()
+    return stop
+
+
+dataset_watcher = None
+_watcher_lock = threading.Lock()
+
+
+@app.server.before_request
+def start_reloading():
+    """Start watching the source file with the first request this server process handles."""
+    global dataset_watcher
+    if RELOAD_INTERVAL > 0 and dataset_watcher is None:
+        with _watcher_lock:
+            if dataset_watcher is None:
+                dataset_watcher = start_dataset_watcher()
+
+# ============================================================================
+# FILM DETAILS
+# ============================================================================
+
+def movie_detail(row, dataset=None):
+    """
+    Detail card for one movie, with the text fields read from the text store.
+
+    Args:
+        row (int): Positional row index in the dataset
+        dataset (Dataset): Dataset version the row belongs to (the current one by default)
+    """
+    dataset = dataset or current_dataset()
+    movie = dataset.frame.iloc[row]
+    stars = [movie[f'Star{i}'] for i in range(1, 5) if isinstance(movie[f'Star{i}'], str)]
+    poster = dataset.text_store.get('Poster_Link', row)
+    overview = dataset.text_store.get('Overview', row)
+    return html.Div([
+        html.Img(src=poster, style={'height': '180px', 'borderRadius': '6px'}) if poster else None,
+        html.Div([
+            html.H3(f"{movie['Series_Title']} ({movie['Released_Year']})", style={'margin': '0 0 10px 0'}),
+            html.P(f"Directed by {movie['Director']}", style={'margin': '0 0 5px 0'}),
+            html.P(f"Starring {', '.join(stars)}", style={'margin': '0 0 5px 0', 'color': '#666'}),
+            html.P(f"⭐ {movie['IMDB_Rating']:.1f} | {int(movie['No_of_Votes']):,} votes | "
+                   f"{movie['Runtime_Minutes']} min"
+                   + (f" | ${movie['Gross']:,.0f}" if movie['Gross'] > 0 else ""),
+                   style={'margin': '0 0 10px 0', 'fontWeight': 'bold'}),
+            html.P(overview or "No overview available.", style={'margin': '0'}),
+        ]),
+    ], style={'display': 'flex', 'gap': '20px', 'alignItems': 'flex-start'})
+
+
+def _clicked_row(click_data):
+    """Row index stored in the customdata of a clicked point, or None."""
+    if not click_data or not click_data.get('points'):
+        return None
+    customdata = click_data['points'][0].get('customdata')
+    if isinstance(customdata, list):
+        customdata = customdata[0] if customdata else None
+    return int(customdata) if customdata is not None else None
+
+
+@app.callback(
+    Output('movie-detail', 'children'),
+    Input('scatter-rating-votes', 'clickData'),
+    Input('bar-top-30-films', 'clickData'),
+    State('filter-state', 'data'),
+    prevent_initial_call=True
+)
+def show_movie_detail(scatter_click, top_30_click, filter_state):
+    """Show the details of the film clicked in the votes scatter plot or the top 30 chart."""
+    click_data = scatter_click if _triggered_id() == 'scatter-rating-votes' else top_30_click
+    row = _clicked_row(click_data)
+    # Row positions are those of the version the figures were built from
+    dataset = dataset_for(filter_state) if filter_state else current_dataset()
+    if filter_state and dataset.version != filter_state['version']:
+        # That version has been retired: its rows cannot be resolved any more
+        raise PreventUpdate
+    if row is None or not 0 <= row < len(dataset.frame):
+        raise PreventUpdate
+    return movie_detail(row, dataset)
+
+# ============================================================================
+# EXPORT API
+# ============================================================================
+
+# Reports read the filtered rows and the aggregate tables behind the charts
+# from /export/<table>.<format> instead of scraping the page. The query
+# parameters are the filter controls of update_dashboard; missing ones take
+# their reset values:
+#   year_range=1990,1999  genre=Drama (repeated or comma-separated)
+#   genre_mode=any|all  min_rating=7.5  search=<search box query>
+# The rows table also takes columns=Series_Title,IMDB_Rating,...
+# Tables come from the same functions as the charts, but no figure is built.
+# They are sent in chunks of EXPORT_CHUNK_ROWS rows as they are encoded
+# (chunked transfer encoding), so a large export is never held in memory as
+# one JSON or CSV string. /export lists the tables and formats.
+# այսինքն՝ գիշերային հաշվետվությունները այլևս բրաուզեր չեն բացում։
+
+# Rows per encoded chunk of an export response
+EXPORT_CHUNK_ROWS = int(os.environ.get('DASHBOARD_EXPORT_CHUNK_ROWS', '50000'))
+
+# Internal columns left out of the rows table
+EXPORT_HIDDEN_COLUMNS = ['Genre_Mask']
+
+EXPORT_MIMETYPES = {
+    'json': 'application/json',
+    'csv': 'text/csv',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+
+def export_filter_state(args, dataset):
+    """
+    Filter state from the query parameters of an export request.
+
+    Raises:
+        ValueError: If a parameter cannot be parsed or is out of range
+    """
+    year_range = list(dataset.year_bounds)
+    if 'year_range' in args:
+        year_range = [int(year) for year in args['year_range'].split(',')]
+        if len(year_range) != 2:
+            raise ValueError("year_range must be two years, e.g. year_range=1990,1999")
+    genres = [genre for value in args.getlist('genre') for genre in value.split(',') if genre]
+    unknown = sorted(set(genres) - set(dataset.all_genres))
+    if unknown:
+        raise ValueError(f"Unknown genres {unknown}, expected some of {list(dataset.all_genres)}")
+    genre_mode = args.get('genre_mode', DEFAULT_GENRE_MODE)
+    if genre_mode not in ('any', 'all'):
+        raise ValueError("genre_mode must be 'any' or 'all'")
+    min_rating = float(args.get('min_rating', DEFAULT_MIN_RATING))
+    # float() also accepts 'inf' and 'nan'
+    if not (math.isfinite(min_rating) and MIN_RATING_RANGE[0] <= min_rating <= MIN_RATING_RANGE[1]):
+        raise ValueError(f"min_rating must be a number from {MIN_RATING_RANGE[0]} to {MIN_RATING_RANGE[1]}")
+    return make_filter_state(year_range, genres or DEFAULT_GENRE, min_rating, genre_mode, dataset,
+                             search=args.get('search', ''))
+
+
+def _frame_chunks(frame):
+    """Split a table into EXPORT_CHUNK_ROWS-row chunks (at least one, possibly empty)."""
+    yield frame.iloc[:EXPORT_CHUNK_ROWS]
+    for start in range(EXPORT_CHUNK_ROWS, len(frame), EXPORT_CHUNK_ROWS):
+        yield frame.iloc[start:start + EXPORT_CHUNK_ROWS]
+
+
+def export_rows(filter_state, args):
+    """Filtered movies, gathered chunk by chunk while the response is sent."""
+    dataset = dataset_for(filter_state)
+    available = [column for column in dataset.frame.columns if column not in EXPORT_HIDDEN_COLUMNS]
+    columns = [column for column in args.get('columns', '').split(',') if column] or available
+    unknown = sorted(set(columns) - set(available))
+    if unknown:
+        raise ValueError(f"Unknown columns {unknown}, expected some of {available}")
+    rows = filtered_rows(filter_state)
+
+    def chunks():
+        yield frame_rows(dataset, rows[:EXPORT_CHUNK_ROWS], columns)
+        for start in range(EXPORT_CHUNK_ROWS, len(rows), EXPORT_CHUNK_ROWS):
+            yield frame_rows(dataset, rows[start:start + EXPORT_CHUNK_ROWS], columns)
+
+    return chunks()
+
+
+def export_metrics(filter_state, args):
+    """The metric cards as numbers."""
+    count, avg_rating, total_votes, total_gross = metric_totals(filter_state)
+    return _frame_chunks(pd.DataFrame({'Movie_Count': [count], 'Average_Rating': [avg_rating],
+                                       'Total_Votes': [total_votes], 'Total_Gross': [total_gross]}))
+
+
+def export_yearly(filter_state, args):
+    """Average rating and movie count per year (the rating trend chart)."""
+    return _frame_chunks(yearly_average(filter_state))
+
+
+def export_genres(filter_state, args):
+    """Movie count of every genre with movies, most common first (the top genres chart)."""
+    counts = rank_genres(genre_totals(filter_state))
+    return _frame_chunks(pd.DataFrame({'Genre': counts.index, 'Count': counts.to_numpy()}))
+
+
+def export_directors(filter_state, args):
+    """Average rating and movie count of every director, best first (the top directors chart)."""
+    return _frame_chunks(director_averages(filter_state).sort_values(
+        'Avg_Rating', ascending=False, kind='stable').reset_index(drop=True))
+
+
+def export_top_30(filter_state, args):
+    """The 30 most voted movies, most voted first (the top 30 chart)."""
+    return _frame_chunks(frame_rows(dataset_for(filter_state), top_voted_rows(filter_state, 30),
+                                    ['Series_Title', 'Released_Year', 'Director', 'IMDB_Rating',
+                                     'No_of_Votes', 'Gross']).reset_index(drop=True))
+
+
+# Each exported table and the function that returns its chunks. The filters
+# are applied when the function is called (so invalid parameters are reported
+# before the response starts); the chunks may be produced lazily.
+EXPORT_TABLES = {
+    'rows': export_rows,
+    'metrics': export_metrics,
+    'yearly': export_yearly,
+    'genres': export_genres,
+    'directors': export_directors,
+    'top30': export_top_30,
+}
+
+
+def encode_json(chunks, header):
+    """A JSON object with the header fields and a 'records' list, one chunk at a time."""
+    # The header object, reopened to append the records
+    yield json.dumps(header, allow_nan=False)[:-1] + ', "records": ['
+    separator = ''
+    for chunk in chunks:
+        if len(chunk):
+            yield separator + chunk.to_json(orient='records')[1:-1]
+            separator = ','
+    yield ']}'
+
+
+def encode_csv(chunks, header):
+    """CSV with a header line, one chunk at a time."""
+    for position, chunk in enumerate(chunks):
+        yield chunk.to_csv(index=False, header=position == 0)
+
+
+def arrow_schema(frame, header):
+    """
+    Arrow schema of an exported table, taken from its column types.
+
+    Text columns are strings also when a chunk holds no text (e.g. only
+    missing overviews), so every record batch has the same schema.
+    """
+    schema = pyarrow.Schema.from_pandas(frame.iloc[:0], preserve_index=False)
+    for position, (column, dtype) in enumerate(frame.dtypes.items()):
+        if dtype == object:
+            schema = schema.set(position, pyarrow.field(column, pyarrow.string()))
+    return schema.with_metadata({**(schema.metadata or {}), b'export': json.dumps(header).encode()})
+
+
+def encode_arrow(chunks, header):
+    """Arrow IPC stream with one record batch per chunk (the header goes in the schema metadata)."""
+    sink = io.BytesIO()
+    writer = None
+    for chunk in chunks:
+        if writer is None:
+            # Every chunk of a table has the column types of the first one
+            schema = arrow_schema(chunk, header)
+            writer = pyarrow.ipc.new_stream(sink, schema)
+        writer.write_batch(pyarrow.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False))
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+    writer.close()
+    yield sink.getvalue()
+
+
+EXPORT_ENCODERS = {'json': encode_json, 'csv': encode_csv, 'arrow': encode_arrow}
+
+
+@app.server.route('/export')
+def export_index():
+    """Tables, formats and filter parameters of the export API as JSON."""
+    return {'tables': {table: export.__doc__.split('\n')[0] for table, export in EXPORT_TABLES.items()},
+            'formats': [fmt for fmt in EXPORT_ENCODERS if fmt != 'arrow' or pyarrow is not None],
+            'parameters': ['year_range', 'genre', 'genre_mode', 'min_rating', 'search', 'columns (rows only)'],
+            'example': '/export/rows.csv?year_range=1990,1999&genre=Drama&min_rating=8'}
+
+
+@app.server.route('/export/<table>.<fmt>')
+def export_table(table, fmt):
+    """Stream one table for the filters in the query string."""
+    if table not in EXPORT_TABLES or fmt not in EXPORT_ENCODERS:
+        return {'error': f"Unknown export {table}.{fmt}, see /export"}, 404
+    if fmt == 'arrow' and pyarrow is None:
+        return {'error': "The Arrow format needs pyarrow (pip install pyarrow)"}, 501
+    dataset = current_dataset()
+    try:
+        filter_state = export_filter_state(flask.request.args, dataset)
+        with stage_timings.time(f'export:{table}'):
+            chunks = EXPORT_TABLES[table](filter_state, flask.request.args)
+    except ValueError as exc:
+        return {'error': str(exc)}, 400
+    header = {'table': table, 'version': dataset.version,
+              'filters': {name: value for name, value in filter_state.items() if name != 'key'}}
+    return flask.Response(flask.stream_with_context(EXPORT_ENCODERS[fmt](chunks, header)),
+                          mimetype=EXPORT_MIMETYPES[fmt],
+                          headers={'X-Dataset-Version': dataset.version})
 
 # ============================================================================
 # RUN THE APPLICATION
 # ============================================================================
 
 if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="IMDB Movies Dashboard")
+    parser.add_argument('--memory-report', action='store_true',
+                        help="print memory used per column before/after the compact schema and exit")
+    parser.add_argument('--quality-report', action='store_true',
+                        help="print the data-quality report and preprocessing step costs and exit")
+    args, _ = parser.parse_known_args()
+    if args.memory_report:
+        print(memory_report(load_and_preprocess_data(compact=False), current_dataset().frame).to_string())
+        sys.exit(0)
+    if args.quality_report:
+        print(format_quality_report(load_and_preprocess_data().attrs['quality_report']))
+        sys.exit(0)
+    
     print("=" * 70)
     print("IMDB MOVIES DASHBOARD - Starting Application")
     print("=" * 70)
@@ -0,0 +1,58 @@
+"""
+Shared setup of the equivalence tests.
+
+movie_dashboard loads its dataset when it is imported, so the environment is
+set here, before any test module imports it: the dashboard runs on a small
+synthetic catalog (generated like the benchmark's) in a temporary cache
+directory, with the approximate view enabled, reloading disabled and no
+shared result store. The shipped imdb_top_1000.csv is loaded next to it as a
+second dataset version (see the `shipped` fixture).
+"""
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import benchmark_dashboard  # noqa: E402
+
+# Movies in the synthetic catalog
+SYNTHETIC_ROWS = 3000
+
+_work_dir = tempfile.mkdtemp(prefix='dashboard-tests-')
+atexit.register(shutil.rmtree, _work_dir, ignore_errors=True)
+
+os.environ.update(
+    DASHBOARD_DATA_FILE=benchmark_dashboard.generate_catalog(os.path.join(_work_dir, 'catalog.csv'),
+                                                             SYNTHETIC_ROWS),
+    DASHBOARD_CACHE_DIR=os.path.join(_work_dir, 'cache'),
+    DASHBOARD_RELOAD_INTERVAL='0',
+    DASHBOARD_RESULT_STORE='none',
+    DASHBOARD_DATA_SOURCE='pandas',
+    DASHBOARD_FIGURE_POOL='serial',
+    # Small enough for the synthetic catalog to get a sample
+    DASHBOARD_APPROXIMATE_MIN_ROWS='1000',
+    DASHBOARD_SAMPLE_ROWS='600',
+)
+
+import movie_dashboard as dashboard  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def synthetic():
+    """The synthetic catalog (the current dataset)."""
+    return dashboard.current_dataset()
+
+
+@pytest.fixture(scope='session')
+def shipped():
+    """The shipped imdb_top_1000.csv, resolvable by its version but not current."""
+    dataset = dashboard.Dataset.load(os.path.join(REPO_DIR, 'imdb_top_1000.csv'))
+    dashboard.add_dataset(dataset)
+    return dataset
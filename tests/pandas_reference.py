@@ -0,0 +1,140 @@
+"""
+Plain pandas answers to the dashboard's queries, computed by scanning the table.
+
+Every index, aggregate and chart of movie_dashboard is compared with these in
+the tests. They follow the original dashboard: a boolean mask over the table,
+then pandas operations on the filtered rows in table order.
+"""
+
+import decimal
+import itertools
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+import movie_dashboard as dashboard
+
+# Filter control values (year_range, selected_genre, min_rating, genre_mode)
+# the indexes are checked on: full and narrow year ranges, an empty one,
+# no/one/several genres in both modes, and thresholds on and between the data
+# cube's rating buckets
+FILTERS = [
+    (year_range, genre, min_rating, genre_mode)
+    for year_range in ([1920, 2020], [1990, 1999], [1955, 1955], [2030, 2040])
+    for genre, genre_mode in (([], 'any'), ('Drama', 'any'), (['Crime', 'Drama'], 'any'),
+                              (['Crime', 'Drama'], 'all'), ('Film-Noir', 'any'))
+    for min_rating in (5, 8.0, 8.45)
+]
+
+
+def genre_lists(frame):
+    """Genres of every movie, in the order its Genre string lists them."""
+    return frame['Genre'].astype(str).str.split(', ')
+
+
+def ratings(frame):
+    """IMDB ratings as the float64 values of the file."""
+    return pd.Series(dashboard.widen_float32(frame['IMDB_Rating'].to_numpy()), index=frame.index)
+
+
+def filter_mask(frame, filter_state):
+    """Boolean mask of the movies passing the year, genre and rating filters (not the search)."""
+    year_lo, year_hi = filter_state['year_range']
+    years = frame['Released_Year']
+    mask = (years >= year_lo) & (years <= year_hi) & (ratings(frame) >= filter_state['min_rating'])
+    selected = set(filter_state['genres'])
+    if selected:
+        if filter_state['genre_mode'] == 'all':
+            mask &= genre_lists(frame).apply(lambda genres: selected <= set(genres))
+        else:
+            mask &= genre_lists(frame).apply(lambda genres: bool(selected & set(genres)))
+    return mask.to_numpy()
+
+
+def filtered(frame, filter_state):
+    """The filtered movies, in table order."""
+    return frame[filter_mask(frame, filter_state)]
+
+
+def average_rating(movies):
+    """The average rating to two decimals, from the rating sum rounded to millionths, ties rounded up."""
+    rating_sum = decimal.Decimal(repr(round(ratings(movies).sum(), 6)))
+    return str((rating_sum / len(movies)).quantize(decimal.Decimal('0.01'), rounding=decimal.ROUND_HALF_UP))
+
+
+def metric_cards(frame, filter_state):
+    """The four metric card values, formatted like the original dashboard."""
+    movies = filtered(frame, filter_state)
+    return (len(movies),
+            average_rating(movies) if len(movies) else 'nan',
+            f"{int(movies['No_of_Votes'].sum()):,}",
+            f"${movies['Gross'].sum() / 1e9:.2f}B" if movies['Gross'].sum() > 0 else "$0")
+
+
+def top_genres(frame, filter_state, k=10):
+    """The genres of the top genres chart, most common first, ties in alphabetical order."""
+    genre_counts = {}
+    for genres in genre_lists(filtered(frame, filter_state)):
+        for genre in genres:
+            genre_counts[genre] = genre_counts.get(genre, 0) + 1
+    genre_df = pd.DataFrame(list(genre_counts.items()), columns=['Genre', 'Count'])
+    return genre_df.sort_values(['Count', 'Genre'], ascending=[False, True]).head(k)['Genre'].tolist()
+
+
+def top_voted(frame, filter_state, k):
+    """Row positions of the k most voted filtered movies, most voted first and ties in table order."""
+    movies = frame.reset_index(drop=True)[filter_mask(frame, filter_state)]
+    return movies.sort_values('No_of_Votes', ascending=False, kind='stable').head(k).index.to_numpy()
+
+
+def search_mask(frame, text_store, clauses):
+    """Boolean mask of the movies matching every [field, term] clause of parse_search()."""
+    titles = frame['Series_Title'].astype(str).tolist()
+    overviews = text_store.values('Overview', 0, len(frame))
+    names = {column: [dashboard.search_name(name) if isinstance(name, str) else None
+                      for name in frame[column]]
+             for column in ['Director', 'Star1', 'Star2', 'Star3', 'Star4']}
+    mask = np.ones(len(frame), dtype=bool)
+    for field, term in clauses:
+        if field == 'title':
+            matches = [term in dashboard.search_words(title) for title in titles]
+        elif field == 'text':
+            matches = [term in dashboard.search_words(f"{title} {overview or ''}")
+                       for title, overview in zip(titles, overviews)]
+        elif field == 'director':
+            matches = [name == term for name in names['Director']]
+        else:
+            matches = [term in (star1, star2, star3, star4)
+                       for star1, star2, star3, star4 in zip(*(names[f'Star{i}'] for i in range(1, 5)))]
+        mask &= np.asarray(matches, dtype=bool)
+    return mask
+
+
+def film_people(movie):
+    """Distinct director and star names of one movie row."""
+    return {name for name in movie[['Director', 'Star1', 'Star2', 'Star3', 'Star4']] if isinstance(name, str)}
+
+
+def collaborations(movies):
+    """Number of films each unordered pair of people shares: {(name, name): films}."""
+    counts = Counter()
+    for _, movie in movies.iterrows():
+        counts.update(itertools.combinations(sorted(film_people(movie)), 2))
+    return counts
+
+
+def director_star_pairs(movies):
+    """Films and rating sum of each (director, star) pair: {(director, star): [films, rating sum]}."""
+    totals = {}
+    for (_, movie), rating in zip(movies.iterrows(), ratings(movies)):
+        director = movie['Director']
+        if not isinstance(director, str):
+            continue
+        stars = {movie[f'Star{i}'] for i in range(1, 5)} - {director}
+        for star in stars:
+            if isinstance(star, str):
+                entry = totals.setdefault((director, star), [0, 0.0])
+                entry[0] += 1
+                entry[1] += rating
+    return totals
@@ -0,0 +1,59 @@
+"""
+The compact dtype schema of the movie table and widening float32 values back.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import movie_dashboard as dashboard
+
+
+def test_table_uses_the_compact_schema(synthetic):
+    frame = synthetic.frame
+    for column, dtype in dashboard.COMPACT_SCHEMA.items():
+        assert frame[column].dtype == dtype, column
+    # The synthetic catalog has at most 31 genres
+    assert len(synthetic.all_genres) <= 31 and frame['Genre_Mask'].dtype == np.int32
+
+
+def test_apply_compact_schema_keeps_values_and_attrs(synthetic):
+    plain = synthetic.frame.astype({column: object if dtype == 'category' else np.float64
+                                    for column, dtype in dashboard.COMPACT_SCHEMA.items()})
+    plain['Genre_Mask'] = plain['Genre_Mask'].astype(np.int64)
+    plain.attrs = dict(synthetic.frame.attrs)
+    compact = dashboard.apply_compact_schema(plain)
+    assert compact.attrs['all_genres'] == synthetic.all_genres
+    pd.testing.assert_frame_equal(compact, synthetic.frame, check_categorical=False)
+
+
+def test_genre_mask_stays_int64_with_many_genres(synthetic):
+    plain = synthetic.frame.copy()
+    plain['Genre_Mask'] = plain['Genre_Mask'].astype(np.int64)
+    plain.attrs = {**synthetic.frame.attrs, 'all_genres': [f'Genre {i}' for i in range(40)]}
+    assert dashboard.apply_compact_schema(plain)['Genre_Mask'].dtype == np.int64
+
+
+@pytest.mark.parametrize('values', [[8.1, 7.6, 9.3, 5.0], [0.3, 0.1], [65.11604, 80.0], [2.5e6, 1.23456e5]])
+def test_widen_float32_recovers_parsed_values(values):
+    widened = dashboard.widen_float32(np.asarray(values, dtype=np.float32))
+    assert widened.dtype == np.float64
+    assert widened.tolist() == values
+
+
+def test_widen_float32_edge_cases():
+    assert dashboard.widen_float32(np.array([], dtype=np.float32)).tolist() == []
+    widened = dashboard.widen_float32(np.array([np.nan, 8.1], dtype=np.float32))
+    assert np.isnan(widened[0]) and widened[1] == 8.1
+    assert dashboard.widen_float32(np.zeros(3, dtype=np.float32)).tolist() == [0.0, 0.0, 0.0]
+    # Other types are returned as they are
+    values = np.array([8.100000381469727])
+    assert dashboard.widen_float32(values) is values
+
+
+def test_memory_report_totals(synthetic):
+    plain = synthetic.frame.astype({column: object for column, dtype in dashboard.COMPACT_SCHEMA.items()
+                                    if dtype == 'category'})
+    report = dashboard.memory_report(plain, synthetic.frame)
+    assert report.loc['TOTAL', 'Before_Bytes'] == report['Before_Bytes'].drop('TOTAL').sum()
+    assert report.loc['Director', 'Ratio'] > 1
@@ -0,0 +1,73 @@
+"""
+The data cube's yearly, total and genre rollups against groupbys of the filtered rows.
+"""
+
+import numpy as np
+import pytest
+
+import movie_dashboard as dashboard
+import pandas_reference as reference
+
+
+@pytest.fixture(scope='module')
+def cube(synthetic):
+    return dashboard.DataCube(synthetic.frame)
+
+
+def filter_state(synthetic, args):
+    return dashboard.make_filter_state(*args, dataset=synthetic)
+
+
+@pytest.mark.parametrize('args', reference.FILTERS)
+def test_answers_bucket_thresholds_with_at_most_one_genre(cube, synthetic, args):
+    fs = filter_state(synthetic, args)
+    answerable = args[2] != 8.45
+    assert (cube.totals(fs) is not None) == (answerable and len(fs['genres']) <= 1)
+    assert (cube.genre_counts(fs) is not None) == (answerable and not fs['genres'])
+
+
+@pytest.mark.parametrize('args', reference.FILTERS)
+def test_totals_match_filtered_sums(cube, synthetic, args):
+    fs = filter_state(synthetic, args)
+    totals = cube.totals(fs)
+    if totals is None:
+        return
+    movies = reference.filtered(synthetic.frame, fs)
+    np.testing.assert_allclose(totals, [len(movies), reference.ratings(movies).sum(),
+                                        movies['No_of_Votes'].sum(), movies['Gross'].sum()], rtol=1e-12)
+
+
+@pytest.mark.parametrize('args', reference.FILTERS)
+def test_yearly_matches_groupby(cube, synthetic, args):
+    fs = filter_state(synthetic, args)
+    yearly = cube.yearly(fs)
+    if yearly is None:
+        return
+    years, stats = yearly
+    has_movies = stats[:, 0] > 0
+    movies = reference.filtered(synthetic.frame, fs)
+    expected = reference.ratings(movies).groupby(movies['Released_Year']).agg(['size', 'sum'])
+    np.testing.assert_array_equal(years[has_movies], expected.index)
+    np.testing.assert_allclose(stats[has_movies, :2], expected.to_numpy(), rtol=1e-12)
+
+
+@pytest.mark.parametrize('args', reference.FILTERS)
+def test_genre_counts_match_exploded_genres(cube, synthetic, args):
+    fs = filter_state(synthetic, args)
+    counts = cube.genre_counts(fs)
+    if counts is None:
+        return
+    exploded = reference.genre_lists(reference.filtered(synthetic.frame, fs)).explode()
+    expected = exploded.value_counts().reindex(synthetic.all_genres, fill_value=0)
+    assert counts.to_dict() == expected.to_dict()
+
+
+def test_rating_buckets(cube):
+    assert cube.rating_bucket(8) == 80
+    assert cube.rating_bucket(7.9) == 79
+    assert cube.rating_bucket(8.45) is None
+    assert cube.rating_bucket(10.5) is None
+
+
+def test_unknown_genre_is_not_answered(cube, synthetic):
+    assert cube.totals(filter_state(synthetic, ([1920, 2020], 'Nope', 8.0, 'any'))) is None
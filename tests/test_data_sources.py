@@ -0,0 +1,123 @@
+"""
+The pandas and SQL data sources against plain pandas scans of the same table.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import movie_dashboard as dashboard
+import pandas_reference as reference
+
+
+@pytest.fixture(scope='module', params=['pandas', 'sqlite'])
+def source(request, synthetic):
+    """Each data source backend over the synthetic catalog."""
+    return dashboard.make_data_source(request.param, synthetic.frame, dashboard.DATA_FILE)
+
+
+def filter_state(dataset, args, search=''):
+    return dashboard.make_filter_state(*args, dataset=dataset, search=search)
+
+
+@pytest.mark.parametrize('args', reference.FILTERS)
+def test_rows_match_boolean_mask(source, synthetic, args):
+    fs = filter_state(synthetic, args)
+    expected = np.flatnonzero(reference.filter_mask(synthetic.frame, fs))
+    np.testing.assert_array_equal(source.rows(fs), expected)
+
+
+@pytest.mark.parametrize('args', reference.FILTERS)
+def test_totals_match_pandas(source, synthetic, args):
+    fs = filter_state(synthetic, args)
+    totals = source.totals(fs)
+    if totals is None:
+        # Only filters the aggregates cannot answer exactly fall back to rows
+        assert source.name != 'pandas' or len(fs['genres']) > 1 or args[2] == 8.45
+        return
+    movies = reference.filtered(synthetic.frame, fs)
+    np.testing.assert_allclose(totals, [len(movies), reference.ratings(movies).sum(),
+                                        movies['No_of_Votes'].sum(), movies['Gross'].sum()], rtol=1e-12)
+
+
+@pytest.mark.parametrize('args', reference.FILTERS)
+def test_yearly_matches_groupby(source, synthetic, args):
+    fs = filter_state(synthetic, args)
+    yearly = source.yearly(fs)
+    if yearly is None:
+        return
+    years, stats = yearly
+    has_movies = stats[:, 0] > 0
+    movies = reference.filtered(synthetic.frame, fs)
+    expected = reference.ratings(movies).groupby(movies['Released_Year']).agg(['size', 'sum'])
+    np.testing.assert_array_equal(years[has_movies], expected.index)
+    np.testing.assert_allclose(stats[has_movies, :2], expected.to_numpy(), rtol=1e-12)
+
+
+@pytest.mark.parametrize('args', reference.FILTERS)
+def test_genre_counts_match_pandas(source, synthetic, args):
+    fs = filter_state(synthetic, args)
+    counts = source.genre_counts(fs)
+    if counts is None:
+        return
+    exploded = reference.genre_lists(reference.filtered(synthetic.frame, fs)).explode()
+    expected = exploded.value_counts().reindex(synthetic.all_genres, fill_value=0)
+    np.testing.assert_array_equal(counts.reindex(synthetic.all_genres).to_numpy(), expected.to_numpy())
+
+
+@pytest.mark.parametrize('args', reference.FILTERS)
+def test_director_totals_match_groupby(source, synthetic, args):
+    fs = filter_state(synthetic, args)
+    totals = source.director_totals(fs)
+    movies = reference.filtered(synthetic.frame, fs)
+    if totals is None:
+        totals = source.director_totals_for_rows(np.flatnonzero(reference.filter_mask(synthetic.frame, fs)))
+    counts, sums = totals
+    names = np.asarray(source.director_names, dtype=object)
+    expected = reference.ratings(movies).groupby(movies['Director'].astype(object)).agg(['size', 'sum'])
+    has_movies = counts > 0
+    assert sorted(names[has_movies]) == sorted(expected.index)
+    expected = expected.reindex(names[has_movies])
+    np.testing.assert_allclose(counts[has_movies], expected['size'].to_numpy())
+    np.testing.assert_allclose(sums[has_movies], expected['sum'].to_numpy(), rtol=1e-12)
+
+
+@pytest.mark.parametrize('args', reference.FILTERS)
+@pytest.mark.parametrize('k', [1, 30])
+def test_top_votes_match_stable_sort(source, synthetic, args, k):
+    fs = filter_state(synthetic, args)
+    np.testing.assert_array_equal(source.top_votes(fs, k), reference.top_voted(synthetic.frame, fs, k))
+
+
+def test_sql_source_needs_create_and_connect():
+    class Incomplete(dashboard.SQLSource):
+        name, suffix = 'incomplete', '.db'
+
+        def create(self, path, table):
+            pass
+
+    with pytest.raises(TypeError, match='connect'):
+        Incomplete(None, 'unused')
+
+
+def test_database_is_written_once_per_version(synthetic, monkeypatch):
+    first = dashboard.make_data_source('sqlite', synthetic.frame, dashboard.DATA_FILE)
+    monkeypatch.setattr(dashboard.SQLiteSource, 'create', lambda self, path, table: pytest.fail('rewritten'))
+    second = dashboard.make_data_source('sqlite', synthetic.frame, dashboard.DATA_FILE)
+    assert second.path == first.path
+
+
+def test_pooled_connections_serve_concurrent_queries(synthetic):
+    source = dashboard.make_data_source('sqlite', synthetic.frame, dashboard.DATA_FILE)
+    states = [filter_state(synthetic, args) for args in reference.FILTERS] * 4
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(source.rows, states))
+    for fs, rows in zip(states, results):
+        np.testing.assert_array_equal(rows, np.flatnonzero(reference.filter_mask(synthetic.frame, fs)))
+    assert source.pool._idle.qsize() <= source.pool.size
+
+
+def test_unknown_source_is_rejected(synthetic):
+    with pytest.raises(ValueError):
+        dashboard.make_data_source('oracle', synthetic.frame)
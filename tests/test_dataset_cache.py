@@ -0,0 +1,68 @@
+"""
+The memory-mapped dataset cache: round trip and invalidation.
+"""
+
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import benchmark_dashboard
+import movie_dashboard as dashboard
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    """A small catalog file with its own (empty) dataset cache directory."""
+    monkeypatch.setattr(dashboard, 'DATASET_CACHE_DIR', str(tmp_path / 'cache'))
+    return benchmark_dashboard.generate_catalog(str(tmp_path / 'catalog.csv'), 500)
+
+
+def test_round_trip_preserves_the_frame(catalog):
+    frame = dashboard.load_and_preprocess_data(catalog)
+    dashboard.write_dataset_cache(frame, catalog)
+    cached = dashboard.read_dataset_cache(catalog)
+    pd.testing.assert_frame_equal(cached, frame)
+    assert cached.attrs['all_genres'] == frame.attrs['all_genres']
+    assert cached.attrs['quality_report'] == frame.attrs['quality_report']
+    assert cached.attrs['version'] == dashboard.dataset_version(catalog)
+    # Numeric columns are memory maps of the cache files
+    assert isinstance(cached['No_of_Votes'].to_numpy().base, np.memmap)
+
+
+def test_load_dataset_writes_the_cache_on_a_miss(catalog):
+    assert dashboard.read_dataset_cache(catalog) is None
+    frame = dashboard.load_dataset(catalog)
+    assert os.path.exists(os.path.join(dashboard.DATASET_CACHE_DIR, 'catalog', 'meta.json'))
+    pd.testing.assert_frame_equal(dashboard.load_dataset(catalog), frame)
+
+
+def test_cache_of_another_format_is_ignored(catalog, monkeypatch):
+    dashboard.load_dataset(catalog)
+    monkeypatch.setattr(dashboard, 'DATASET_CACHE_FORMAT', dashboard.DATASET_CACHE_FORMAT + 1)
+    assert dashboard.read_dataset_cache(catalog) is None
+
+
+def test_cache_survives_a_touch_but_not_a_change(catalog):
+    dashboard.load_dataset(catalog)
+    # Same contents with a new modification time (e.g. copied during a deploy)
+    stat = os.stat(catalog)
+    os.utime(catalog, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert dashboard.read_dataset_cache(catalog) is not None
+    # New contents of the same size
+    with open(catalog, 'rb') as f:
+        contents = f.read()
+    with open(catalog, 'wb') as f:
+        f.write(contents.replace(b'Movie 1,', b'Movie 2,', 1))
+    assert dashboard.read_dataset_cache(catalog) is None
+
+
+def test_damaged_cache_is_ignored(catalog):
+    dashboard.load_dataset(catalog)
+    cache_path = os.path.join(dashboard.DATASET_CACHE_DIR, 'catalog')
+    os.remove(os.path.join(cache_path, 'No_of_Votes.npy'))
+    assert dashboard.read_dataset_cache(catalog) is None
+    shutil.rmtree(cache_path)
+    assert dashboard.read_dataset_cache(catalog) is None
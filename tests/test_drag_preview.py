@@ -0,0 +1,70 @@
+"""
+The client-side drag preview: the columns shipped with the page, and the
+preview callback run on them by Node.js against plain pandas scans.
+"""
+
+import json
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+import movie_dashboard as dashboard
+import pandas_reference as reference
+
+# Runs the callback on every case of a JSON document read from stdin, with the
+# year slider being dragged and the rating slider at the case's threshold
+NODE_SCRIPT = """
+var window = {dash_clientside: {no_update: null, callback_context: {triggered: [{prop_id: 'year-slider.drag_value'}]}}};
+var preview = (CALLBACK);
+var input = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+console.log(JSON.stringify(input.cases.map(function (args) {
+    return preview(args[0], null, args[0], args[2], args[1], args[3], input.columns, input.histogram, {search: ''});
+})));
+"""
+
+
+def run_preview(columns, cases, histogram):
+    """Results of the preview callback for (year_range, selected_genre, min_rating, genre_mode) cases."""
+    output = subprocess.run(['node', '-e', NODE_SCRIPT.replace('CALLBACK', dashboard.PREVIEW_CALLBACK_JS)],
+                            input=json.dumps({'columns': columns, 'cases': cases, 'histogram': histogram}),
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def test_columns_are_json_and_match_the_table(synthetic):
+    columns = json.loads(json.dumps(dashboard.preview_columns(synthetic)))
+    frame = synthetic.frame
+    assert columns['genres'] == list(synthetic.all_genres)
+    np.testing.assert_array_equal(columns['year'], frame['Released_Year'])
+    np.testing.assert_array_equal(columns['rating'], reference.ratings(frame))
+    np.testing.assert_array_equal(columns['votes'], frame['No_of_Votes'])
+    # Bit i of a genre mask is genre i of the vocabulary
+    for genres, mask in zip(reference.genre_lists(frame), columns['genre_mask']):
+        assert {columns['genres'][bit] for bit in range(len(columns['genres'])) if mask >> bit & 1} == set(genres)
+
+
+def test_large_catalogs_get_no_preview(synthetic, monkeypatch):
+    monkeypatch.setattr(dashboard, 'PREVIEW_MAX_ROWS', len(synthetic.frame) - 1)
+    assert dashboard.preview_columns(synthetic) is None
+    monkeypatch.setattr(dashboard, 'PREVIEW_MAX_ROWS', 0)
+    assert dashboard.preview_columns(synthetic) is None
+    monkeypatch.setattr(dashboard, 'PREVIEW_MAX_ROWS', len(synthetic.frame))
+    assert dashboard.preview_columns(synthetic) is not None
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='needs Node.js')
+def test_preview_callback_matches_pandas(synthetic):
+    cases = [list(args) for args in reference.FILTERS] + [[[1990, 1999], ['Drama', 'Unknown'], 5, 'all']]
+    histogram = {'data': [{'type': 'histogram', 'x': [], 'histfunc': 'sum', 'y': [1]}], 'layout': {}}
+    results = run_preview(dashboard.preview_columns(synthetic), cases, histogram)
+    for args, (count, avg_rating, votes, gross, figure) in zip(cases, results):
+        fs = dashboard.make_filter_state(*args, dataset=synthetic)
+        movies = reference.filtered(synthetic.frame, fs)
+        expected = reference.metric_cards(synthetic.frame, fs)
+        # The same cards as the server, also at rounding ties of the average
+        assert (count, avg_rating, votes, gross) == expected, args
+        trace = figure['data'][0]
+        assert trace['x'] == reference.ratings(movies).tolist()
+        assert 'y' not in trace and 'histfunc' not in trace
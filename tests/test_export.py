@@ -0,0 +1,94 @@
+"""
+The export API: tables, formats and parameter checks against the filtered
+table and the views.
+"""
+
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import movie_dashboard as dashboard
+import pandas_reference as reference
+
+
+@pytest.fixture(scope='module')
+def client():
+    return dashboard.app.server.test_client()
+
+
+EXPORT_QUERY = 'year_range=1990,1999&genre=Drama&min_rating=8'
+EXPORT_FILTERS = ([1990, 1999], 'Drama', 8)
+
+
+def test_export_rows_match_filtered_table(synthetic, client):
+    response = client.get(f'/export/rows.csv?{EXPORT_QUERY}&columns=Series_Title,IMDB_Rating,No_of_Votes')
+    assert response.status_code == 200
+    exported = pd.read_csv(io.BytesIO(response.data))
+    expected = reference.filtered(synthetic.frame, dashboard.make_filter_state(*EXPORT_FILTERS, dataset=synthetic))
+    assert exported['Series_Title'].tolist() == expected['Series_Title'].astype(str).tolist()
+    np.testing.assert_allclose(exported['IMDB_Rating'], reference.ratings(expected))
+    np.testing.assert_array_equal(exported['No_of_Votes'], expected['No_of_Votes'])
+
+
+def test_export_metrics_and_genres_match_views(synthetic, client):
+    fs = dashboard.make_filter_state(*EXPORT_FILTERS, dataset=synthetic)
+    metrics = json.loads(client.get(f'/export/metrics.json?{EXPORT_QUERY}').data)
+    assert metrics['version'] == synthetic.version
+    record = metrics['records'][0]
+    count, _, votes, _ = reference.metric_cards(synthetic.frame, fs)
+    assert (record['Movie_Count'], f"{record['Total_Votes']:,}") == (count, votes)
+    genres = json.loads(client.get(f'/export/genres.json?{EXPORT_QUERY}').data)['records']
+    assert [row['Genre'] for row in genres][:10] == reference.top_genres(synthetic.frame, fs)
+
+
+@pytest.mark.parametrize('min_rating', ['inf', 'nan', '-inf', '4', '11', 'eight'])
+def test_export_rejects_bad_min_rating(client, min_rating):
+    for table in ('rows.json', 'yearly.json', 'metrics.csv'):
+        response = client.get(f'/export/{table}?min_rating={min_rating}')
+        assert response.status_code == 400
+        json.loads(response.data)
+
+
+def test_export_rejects_unknown_tables_and_formats(client):
+    assert client.get('/export/nothing.json').status_code == 404
+    assert client.get('/export/rows.xml').status_code == 404
+
+
+def test_export_rejects_unknown_genres(client):
+    response = client.get('/export/rows.json?genre=Drama,Space%20Opera')
+    assert response.status_code == 400
+    assert 'Space Opera' in json.loads(response.data)['error']
+
+
+@pytest.mark.skipif(dashboard.pyarrow is None, reason='needs pyarrow')
+def test_arrow_export_round_trips(synthetic, client, monkeypatch):
+    monkeypatch.setattr(dashboard, 'EXPORT_CHUNK_ROWS', 50)
+    query = 'year_range=1920,2020&min_rating=7.5'
+    response = client.get(f'/export/rows.arrow?{query}')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/vnd.apache.arrow.stream'
+    reader = dashboard.pyarrow.ipc.open_stream(response.data)
+    batches = list(reader)
+    assert len(batches) > 1 and all(batch.schema.equals(reader.schema) for batch in batches)
+    header = json.loads(reader.schema.metadata[b'export'])
+    assert header['table'] == 'rows' and header['version'] == synthetic.version
+    exported = dashboard.pyarrow.Table.from_batches(batches, reader.schema).to_pandas()
+    expected = pd.DataFrame(json.loads(client.get(f'/export/rows.json?{query}').data)['records'])
+    assert list(exported.columns) == list(expected.columns)
+    assert exported['Series_Title'].tolist() == expected['Series_Title'].tolist()
+    np.testing.assert_allclose(exported['IMDB_Rating'], expected['IMDB_Rating'], rtol=1e-6)
+    np.testing.assert_array_equal(exported['No_of_Votes'], expected['No_of_Votes'])
+
+
+@pytest.mark.skipif(dashboard.pyarrow is None, reason='needs pyarrow')
+def test_arrow_schema_does_not_depend_on_the_first_chunk():
+    chunks = [pd.DataFrame({'Overview': [None, None], 'Votes': [1, 2]}),
+              pd.DataFrame({'Overview': ['A heist.', None], 'Votes': [3, 4]})]
+    stream = b''.join(dashboard.encode_arrow(iter(chunks), {'table': 'rows'}))
+    table = dashboard.pyarrow.ipc.open_stream(stream).read_all()
+    assert table.schema.field('Overview').type == dashboard.pyarrow.string()
+    assert table.column('Overview').to_pylist() == [None, None, 'A heist.', None]
+    assert table.column('Votes').to_pylist() == [1, 2, 3, 4]
@@ -0,0 +1,62 @@
+"""
+dash.Patch updates of the patched graphs: applied to the figure on the page they
+give the new figure, and they are a fraction of its size.
+"""
+
+import copy
+import json
+
+import plotly.utils
+import pytest
+
+import movie_dashboard as dashboard
+
+
+def apply_patch(figure, patch):
+    """Apply the Assign/Delete operations of a serialized dash.Patch to a figure dict."""
+    figure = copy.deepcopy(figure)
+    for operation in patch.to_plotly_json()['operations']:
+        *parents, field = operation['location']
+        target = figure
+        for parent in parents:
+            target = target[parent]
+        if operation['operation'] == 'Assign':
+            target[field] = operation['params']['value']
+        else:
+            assert operation['operation'] == 'Delete'
+            # Like the browser, deleting a field that is not there is a no-op
+            target.pop(field, None)
+    return json.loads(json.dumps(figure, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+def size(value):
+    return len(json.dumps(value, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+@pytest.fixture(scope='module')
+def page_state(synthetic):
+    """The default view, whose figures the page starts with."""
+    return dashboard.default_filter_state(synthetic)
+
+
+@pytest.mark.parametrize('graph_id', sorted(dashboard.PATCHED_GRAPHS))
+@pytest.mark.parametrize('args', [([1990, 1999], 'Drama', 8.0), ([2030, 2040], [], 5)])
+def test_patch_turns_the_page_figure_into_the_new_one(synthetic, page_state, graph_id, args):
+    on_page = dashboard.chart_figure(graph_id, page_state)
+    new = dashboard.chart_figure(graph_id, dashboard.make_filter_state(*args, dataset=synthetic))
+    patch = dashboard.chart_patch(graph_id, new)
+    assert apply_patch(on_page, patch) == new
+    assert size(patch.to_plotly_json()) < size(new) / 2
+
+
+def test_patch_from_an_approximate_histogram_drops_the_weights(synthetic, page_state):
+    fs = dashboard.make_filter_state([1990, 2010], 'Drama', 7.9, dataset=synthetic)
+    approximate = json.loads(json.dumps(dashboard.approximate_figure('histogram-ratings', fs),
+                                        cls=plotly.utils.PlotlyJSONEncoder))
+    assert approximate['data'][0]['histfunc'] == 'sum'
+    exact = dashboard.chart_figure('histogram-ratings', fs)
+    shown = apply_patch(dashboard.chart_figure('histogram-ratings', page_state),
+                        dashboard.chart_patch('histogram-ratings', approximate))
+    refined = apply_patch(shown, dashboard.chart_patch('histogram-ratings', exact))
+    assert refined == exact
+    assert 'histfunc' not in refined['data'][0] and 'y' not in refined['data'][0]
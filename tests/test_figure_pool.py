@@ -0,0 +1,66 @@
+"""
+Building figures serially and on thread and process pools gives the same figures.
+"""
+
+import json
+
+import pytest
+
+import movie_dashboard as dashboard
+
+
+@pytest.fixture(scope='module')
+def filter_state(synthetic):
+    return dashboard.make_filter_state([1980, 2010], ['Drama', 'Crime'], 7.6, 'any', dataset=synthetic)
+
+
+@pytest.fixture(scope='module')
+def serial_figures(filter_state):
+    return dashboard.FigurePool('serial').build_all(filter_state)
+
+
+@pytest.mark.parametrize('mode', ['thread', 'process'])
+def test_pools_build_the_same_figures(mode, filter_state, serial_figures):
+    pool = dashboard.FigurePool(mode, workers=2)
+    try:
+        figures = pool.build_all(filter_state)
+    finally:
+        pool.shutdown()
+    assert figures.keys() == dashboard.FIGURE_BUILDERS.keys()
+    for graph_id, payload in figures.items():
+        assert json.loads(payload) == json.loads(serial_figures[graph_id]), graph_id
+
+
+def test_build_all_builds_only_the_requested_graphs(filter_state):
+    figures = dashboard.FigurePool('serial').build_all(filter_state, ['bar-top-genres'])
+    assert list(figures) == ['bar-top-genres']
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        dashboard.FigurePool('cluster')
+
+
+def test_serial_errors_are_raised_by_the_future(monkeypatch, filter_state):
+    def fail(filter_state):
+        raise RuntimeError('broken chart')
+
+    monkeypatch.setitem(dashboard.FIGURE_BUILDERS, 'bar-top-genres', fail)
+    future = dashboard.FigurePool('serial').submit('bar-top-genres', filter_state)
+    with pytest.raises(RuntimeError, match='broken chart'):
+        future.result()
+
+
+def test_prefetched_figures_are_cached(monkeypatch, filter_state, serial_figures):
+    pool = dashboard.FigurePool('thread', workers=2)
+    monkeypatch.setattr(dashboard, 'figure_pool', pool)
+    dashboard.clear_caches()
+    try:
+        dashboard.prefetch_figures(filter_state)
+        # A chart requested while its figure is being built waits for that build
+        assert dashboard.chart_figure('bar-top-genres', filter_state) == \
+            json.loads(serial_figures['bar-top-genres'])
+    finally:
+        pool.shutdown()
+    assert all((graph_id, filter_state['key']) in dashboard.result_cache for graph_id in dashboard.FIGURE_BUILDERS)
+    assert not dashboard._pending_figures
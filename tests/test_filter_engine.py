@@ -0,0 +1,51 @@
+"""
+The filter engine's sorted year and rating indexes against a boolean mask over the table.
+"""
+
+import numpy as np
+import pytest
+
+import movie_dashboard as dashboard
+import pandas_reference as reference
+
+
+@pytest.fixture(scope='module')
+def engine(synthetic):
+    return dashboard.FilterEngine(synthetic.frame)
+
+
+def query(engine, filter_state):
+    return engine.query(filter_state['year_range'], tuple(filter_state['genres']),
+                        filter_state['min_rating'], filter_state['genre_mode'])
+
+
+@pytest.mark.parametrize('args', reference.FILTERS)
+def test_query_matches_boolean_mask(engine, synthetic, args):
+    fs = dashboard.make_filter_state(*args, dataset=synthetic)
+    expected = np.flatnonzero(reference.filter_mask(synthetic.frame, fs))
+    np.testing.assert_array_equal(query(engine, fs), expected)
+
+
+def test_query_without_rating_threshold(engine, synthetic):
+    years = synthetic.frame['Released_Year'].to_numpy()
+    np.testing.assert_array_equal(engine.query([1990, 1999]), np.flatnonzero((years >= 1990) & (years <= 1999)))
+
+
+def test_threshold_equal_to_stored_ratings(engine, synthetic):
+    """A threshold keeps the movies rated exactly at it, although ratings are stored as float32."""
+    ratings = reference.ratings(synthetic.frame)
+    for threshold in np.unique(ratings)[::7]:
+        rows = engine.query([1920, 2020], min_rating=round(float(threshold), 6))
+        np.testing.assert_array_equal(rows, np.flatnonzero(ratings >= round(float(threshold), 6)))
+
+
+def test_year_and_rating_bounds(engine):
+    lo, hi = engine.year_bounds(1990, 1999)
+    assert (engine.years_sorted[lo:hi] >= 1990).all() and (engine.years_sorted[lo:hi] <= 1999).all()
+    assert hi - lo == np.count_nonzero((engine.years_sorted >= 1990) & (engine.years_sorted <= 1999))
+    # An inverted range is empty rather than a negative slice
+    lo, hi = engine.year_bounds(2000, 1990)
+    assert lo == hi
+    lo, hi = engine.rating_bounds(8.0)
+    assert hi == engine.n_rows and (engine.ratings_sorted[lo:] >= np.float32(8.0)).all()
+    assert lo == 0 or engine.ratings_sorted[lo - 1] < np.float32(8.0)
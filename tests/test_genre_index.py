@@ -0,0 +1,61 @@
+"""
+The genre bitmask index and the genre dropdown against the Genre strings.
+"""
+
+import numpy as np
+import pytest
+
+import movie_dashboard as dashboard
+import pandas_reference as reference
+
+SELECTIONS = [['Drama'], ['Crime', 'Drama'], ['Drama', 'Crime', 'Drama'], ['Film-Noir', 'Western', 'Sci-Fi']]
+
+
+@pytest.mark.parametrize('selected, expected', [(None, ()), ([], ()), ('Drama', ('Drama',)),
+                                                (['Drama', 'Crime', 'Drama'], ('Crime', 'Drama'))])
+def test_normalize_genre_selection(selected, expected):
+    assert dashboard.normalize_genre_selection(selected) == expected
+
+
+def test_genre_bitmask_ignores_unknown_genres(synthetic):
+    vocabulary = synthetic.all_genres
+    assert dashboard.genre_bitmask(['Nope'], vocabulary) == 0
+    assert dashboard.genre_bitmask([vocabulary[0], 'Nope', vocabulary[2]], vocabulary) == 0b101
+
+
+@pytest.mark.parametrize('selected', SELECTIONS)
+@pytest.mark.parametrize('genre_mode', ['any', 'all'])
+def test_genre_match_matches_genre_lists(synthetic, selected, genre_mode):
+    genres = dashboard.normalize_genre_selection(selected)
+    found = dashboard.genre_match(synthetic.frame['Genre_Mask'].to_numpy(), genres, genre_mode, synthetic.all_genres)
+    wanted = set(genres)
+    lists = reference.genre_lists(synthetic.frame)
+    if genre_mode == 'all':
+        expected = lists.apply(lambda movie_genres: wanted <= set(movie_genres))
+    else:
+        expected = lists.apply(lambda movie_genres: bool(wanted & set(movie_genres)))
+    np.testing.assert_array_equal(found, expected.to_numpy())
+
+
+def test_genre_match_all_with_unknown_genre_matches_nothing(synthetic):
+    found = dashboard.genre_match(synthetic.frame['Genre_Mask'].to_numpy(), ('Drama', 'Nope'), 'all',
+                                  synthetic.all_genres)
+    assert not found.any()
+
+
+def test_count_genres_matches_exploded_genres(synthetic):
+    counts = dashboard.count_genres(synthetic.frame['Genre_Mask'].to_numpy(), synthetic.all_genres)
+    expected = reference.genre_lists(synthetic.frame).explode().value_counts()
+    assert counts.to_dict() == expected.reindex(synthetic.all_genres, fill_value=0).to_dict()
+
+
+def test_genre_dropdown_has_no_all_option(synthetic):
+    dropdown = dashboard.build_layout(synthetic)['genre-dropdown']
+    assert [option['value'] for option in dropdown.options] == synthetic.all_genres
+    assert dropdown.value == [] and dropdown.multi
+
+
+def test_reset_clears_the_genre_selection(monkeypatch):
+    monkeypatch.setattr(dashboard, '_triggered_id', lambda: 'reset-button')
+    result = dashboard.update_dashboard([1990, 1999], ['Drama'], 8.0, 1, 'any', '')
+    assert result[6] == [] and result[0]['genres'] == []
@@ -0,0 +1,90 @@
+"""
+Chunked ingestion: per-chunk compaction, chunk-size independence and the text side store.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import benchmark_dashboard
+import movie_dashboard as dashboard
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    """A small catalog file with its own dataset cache directory."""
+    monkeypatch.setattr(dashboard, 'DATASET_CACHE_DIR', str(tmp_path / 'cache'))
+    return benchmark_dashboard.generate_catalog(str(tmp_path / 'catalog.csv'), 700)
+
+
+def test_chunks_are_compact_before_they_are_concatenated(catalog, monkeypatch):
+    compacted = []
+
+    def record_chunk(chunk, run):
+        compact_chunk(chunk, run)
+        compacted.append(chunk.dtypes.to_dict())
+
+    compact_chunk = dashboard.compact_chunk
+    monkeypatch.setattr(dashboard, 'compact_chunk', record_chunk)
+    dashboard.load_and_preprocess_data(catalog, chunksize=100)
+    assert len(compacted) == 7
+    for dtypes in compacted:
+        for column, dtype in dashboard.COMPACT_SCHEMA.items():
+            if column not in dtypes:
+                # Added by FILE_STEPS after the concatenation
+                assert column == 'Decade'
+            elif dtype == 'category':
+                # Codes into the vocabularies shared by all chunks
+                assert dtypes[column] == np.int32, column
+            elif column == 'Released_Year':
+                # Missing years are only filled once the whole file is read
+                assert dtypes[column] == np.float32
+            else:
+                assert dtypes[column] == np.dtype(dtype), column
+        assert [column for column, dtype in dtypes.items() if dtype == object] == ['Series_Title']
+
+
+def test_result_does_not_depend_on_the_chunk_size(catalog):
+    whole = dashboard.load_and_preprocess_data(catalog, chunksize=10 ** 6)
+    chunked = dashboard.load_and_preprocess_data(catalog, chunksize=64)
+    pd.testing.assert_frame_equal(chunked, whole)
+    assert chunked.attrs['all_genres'] == whole.attrs['all_genres']
+
+
+def test_compact_and_plain_tables_hold_the_same_values(catalog):
+    compact = dashboard.load_and_preprocess_data(catalog, chunksize=128)
+    plain = dashboard.load_and_preprocess_data(catalog, chunksize=128, compact=False)
+    for column, dtype in dashboard.COMPACT_SCHEMA.items():
+        assert compact[column].dtype == dtype, column
+        if dtype == 'category':
+            # Same categories, in the same order, as converting the whole column at once
+            expected = plain[column].astype('category')
+            pd.testing.assert_series_equal(compact[column], expected, check_names=False)
+        else:
+            np.testing.assert_allclose(dashboard.widen_float32(compact[column].to_numpy()),
+                                       plain[column].to_numpy(), rtol=1e-6, err_msg=column)
+    assert plain.memory_usage(deep=True).sum() > 1.5 * compact.memory_usage(deep=True).sum()
+
+
+def test_text_fields_are_spilled_to_the_text_store(catalog):
+    frame = dashboard.load_and_preprocess_data(catalog, chunksize=100)
+    assert not set(dashboard.TEXT_FIELDS) & set(frame.columns)
+    raw = pd.read_csv(catalog, dtype=str)
+    store = dashboard.TextStore(frame.attrs['text_store'])
+    for field in dashboard.TEXT_FIELDS:
+        expected = [value if isinstance(value, str) else None for value in raw[field]]
+        assert store.values(field, 0, len(raw)) == expected
+        assert store.values(field, 150, 260) == expected[150:260]
+        assert [store.get(field, row) for row in (0, 99, 100, len(raw) - 1)] == \
+            [expected[row] for row in (0, 99, 100, len(raw) - 1)]
+
+
+def test_text_store_is_rebuilt_for_a_new_file(catalog):
+    dashboard.load_and_preprocess_data(catalog)
+    raw = pd.read_csv(catalog, dtype=str)
+    raw.loc[3, 'Overview'] = 'Rewritten overview'
+    raw.loc[4, 'Overview'] = None
+    raw.to_csv(catalog, index=False)
+    store = dashboard.open_text_store(catalog)
+    assert store.get('Overview', 3) == 'Rewritten overview'
+    assert store.get('Overview', 4) is None
@@ -0,0 +1,64 @@
+"""
+Stage latency histograms and the Prometheus text exposition at /metrics.
+"""
+
+import re
+
+import pytest
+
+import movie_dashboard as dashboard
+
+SAMPLE_LINE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_exposition(text):
+    """Samples of a Prometheus text exposition: {(name, labels): value}, plus {name: type}."""
+    samples, types = {}, {}
+    assert text.endswith('\n')
+    for line in text.splitlines():
+        if line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            types[name] = kind
+            continue
+        if line.startswith('# HELP '):
+            continue
+        match = SAMPLE_LINE.match(line)
+        assert match, line
+        name, labels, value = match.groups()
+        samples[name, tuple(LABEL.findall(labels or ''))] = float(value)
+    return samples, types
+
+
+def test_observations_fall_in_inclusive_buckets():
+    timings = dashboard.StageTimings(buckets=(0.01, 0.1))
+    for seconds in (0.005, 0.01, 0.05, 0.5):
+        timings.observe('stage', seconds)
+    with timings.time('block'):
+        pass
+    snapshot = timings.snapshot()
+    assert snapshot['stage'] == {'buckets': [2, 1, 1], 'sum': pytest.approx(0.565), 'count': 4}
+    assert snapshot['block']['count'] == 1
+
+
+def test_metrics_endpoint_is_a_valid_exposition(synthetic):
+    dashboard.update_dashboard([1990, 1999], 'Drama', 8.0, 0, 'any', '')
+    response = dashboard.app.server.test_client().get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    samples, types = parse_exposition(response.get_data(as_text=True))
+    assert types['dashboard_stage_seconds'] == 'histogram'
+    assert types['dashboard_result_cache_hits_total'] == 'counter'
+    assert types['dashboard_result_cache_bytes'] == 'gauge'
+
+    stages = {dict(labels)['stage'] for name, labels in samples if name == 'dashboard_stage_seconds_count'}
+    assert {'callback', 'filter'} <= stages
+    for stage in stages:
+        buckets = [(dict(labels)['le'], value) for (name, labels), value in samples.items()
+                   if name == 'dashboard_stage_seconds_bucket' and dict(labels)['stage'] == stage]
+        counts = [value for _, value in buckets]
+        # Cumulative buckets in increasing order, ending with +Inf = count
+        assert counts == sorted(counts)
+        assert [float(le) for le, _ in buckets] == sorted(float(le) for le, _ in buckets)
+        assert buckets[-1] == ('+Inf', samples['dashboard_stage_seconds_count', (('stage', stage),)])
+    assert samples['dashboard_result_cache_max_bytes', ()] == dashboard.result_cache.max_bytes
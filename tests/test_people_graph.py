@@ -0,0 +1,93 @@
+"""
+The collaboration graph against plain pandas scans of the same table.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import movie_dashboard as dashboard
+import pandas_reference as reference
+
+PEOPLE_FILTERS = [([1920, 2020], [], 5, 'any'), ([1990, 1999], [], 5, 'any'),
+                  ([1920, 2020], 'Drama', 8.0, 'any')]
+
+
+def _rows(synthetic, args):
+    filter_state = dashboard.make_filter_state(*args, dataset=synthetic)
+    return np.flatnonzero(reference.filter_mask(synthetic.frame, filter_state))
+
+
+@pytest.mark.parametrize('args', PEOPLE_FILTERS)
+def test_people_graph_edges_match_pairs(synthetic, args):
+    graph = synthetic.people_graph
+    rows = _rows(synthetic, args)
+    counts = graph.edge_counts(rows)
+    found = {(graph.names[a], graph.names[b]): int(n)
+             for (a, b), n in zip(graph.edge_people, counts) if n > 0}
+    assert found == dict(reference.collaborations(synthetic.frame.iloc[rows]))
+
+
+@pytest.mark.parametrize('args', PEOPLE_FILTERS)
+def test_people_graph_degrees_match_pairs(synthetic, args):
+    graph = synthetic.people_graph
+    rows = _rows(synthetic, args)
+    partners = {}
+    for first, second in reference.collaborations(synthetic.frame.iloc[rows]):
+        partners.setdefault(first, set()).add(second)
+        partners.setdefault(second, set()).add(first)
+    degrees = graph.degrees(rows)
+    assert {graph.names[i]: int(d) for i, d in enumerate(degrees) if d > 0} == \
+        {name: len(others) for name, others in partners.items()}
+
+
+@pytest.mark.parametrize('args', PEOPLE_FILTERS)
+def test_people_graph_director_star_pairs_match(synthetic, args):
+    graph = synthetic.people_graph
+    rows = _rows(synthetic, args)
+    films, rating_sums = graph.pair_totals(rows, dashboard.widen_float32(synthetic.frame['IMDB_Rating'].to_numpy()))
+    found = {(graph.names[d], graph.names[s]): (int(n), total)
+             for (d, s), n, total in zip(graph.pair_people, films, rating_sums) if n > 0}
+    expected = reference.director_star_pairs(synthetic.frame.iloc[rows])
+    assert set(found) == set(expected)
+    for pair, (n, total) in found.items():
+        assert n == expected[pair][0]
+        assert total == pytest.approx(expected[pair][1], rel=1e-12)
+
+
+@pytest.mark.parametrize('args', PEOPLE_FILTERS)
+def test_people_graph_collaborators_match(synthetic, args):
+    graph = synthetic.people_graph
+    rows = _rows(synthetic, args)
+    movies = synthetic.frame.iloc[rows]
+    pairs = reference.collaborations(movies)
+    # The best connected person, and one with no film under the filters (if any)
+    person = pd.Series([name for pair in pairs for name in pair]).value_counts().index[0]
+    absent = [name for name in graph.names if not any(name in pair for pair in pairs)][:1]
+    for name in [person] + absent:
+        person_id = graph.person_id(name)
+        ids, counts = graph.collaborators(person_id, rows)
+        found = {graph.names[i]: int(n) for i, n in zip(ids, counts)}
+        expected = {(b if a == name else a): n for (a, b), n in pairs.items() if name in (a, b)}
+        assert found == expected
+        films = [row for row, (_, movie) in zip(rows, movies.iterrows()) if name in reference.film_people(movie)]
+        np.testing.assert_array_equal(graph.films_of(person_id, rows), films)
+
+
+def test_people_graph_survives_save_and_load(synthetic, tmp_path):
+    graph = synthetic.people_graph
+    graph.save(str(tmp_path / 'people'))
+    loaded = dashboard.PeopleGraph.load(str(tmp_path / 'people'))
+    assert list(loaded.names) == list(graph.names)
+    rows = _rows(synthetic, PEOPLE_FILTERS[1])
+    np.testing.assert_array_equal(loaded.edge_counts(rows), graph.edge_counts(rows))
+    np.testing.assert_array_equal(loaded.degrees(rows), graph.degrees(rows))
+    for name in dashboard.PeopleGraph.ARRAYS:
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(graph, name))
+
+
+def test_unknown_people_have_no_id(synthetic):
+    graph = synthetic.people_graph
+    assert graph.person_id(graph.names[0]) == 0
+    assert graph.person_id('Nobody Anyone') is None
+    assert graph.person_id(None) is None
@@ -0,0 +1,91 @@
+"""
+The data-quality report of the preprocessing pipeline: issue counters, step
+costs, the text rendering and the /data-quality endpoint.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import benchmark_dashboard
+import movie_dashboard as dashboard
+
+
+@pytest.fixture
+def dirty_catalog(tmp_path, monkeypatch):
+    """A small catalog with known numbers of bad years, revenues and meta scores."""
+    monkeypatch.setattr(dashboard, 'DATASET_CACHE_DIR', str(tmp_path / 'cache'))
+    path = benchmark_dashboard.generate_catalog(str(tmp_path / 'clean.csv'), 200)
+    raw = pd.read_csv(path, dtype=str, keep_default_na=False)
+    # The generated catalog has issues of its own; start from a clean one
+    for column, valid in (('Released_Year', '2000'), ('Gross', '1,000'), ('Meta_score', '70')):
+        raw.loc[pd.to_numeric(raw[column].str.replace(',', ''), errors='coerce').isna(), column] = valid
+    raw.loc[[3, 50, 150], 'Released_Year'] = 'PG'
+    raw.loc[[4, 120], 'Released_Year'] = ''
+    raw.loc[[5, 6, 7, 190], 'Gross'] = 'unknown'
+    raw.loc[[8], 'Gross'] = ''
+    raw.loc[[9, 10], 'Meta_score'] = ''
+    raw.loc[[11], 'Meta_score'] = 'tbd'
+    dirty = str(tmp_path / 'dirty.csv')
+    raw.to_csv(dirty, index=False)
+    return dirty
+
+
+EXPECTED_ISSUES = {'coerced_years': 3, 'missing_years': 2, 'unparseable_gross': 4, 'missing_gross': 1,
+                   'imputed_meta_scores': 3}
+
+
+@pytest.mark.parametrize('chunksize', [16, 10 ** 6])
+def test_issues_are_counted_across_chunks(dirty_catalog, chunksize):
+    frame = dashboard.load_and_preprocess_data(dirty_catalog, chunksize=chunksize)
+    report = frame.attrs['quality_report']
+    assert report['rows'] == len(frame) == 200
+    assert report['issues'] == EXPECTED_ISSUES
+
+
+def test_issues_are_handled_as_documented(dirty_catalog):
+    frame = dashboard.load_and_preprocess_data(dirty_catalog, compact=False)
+    raw = pd.read_csv(dirty_catalog, dtype=str, keep_default_na=False)
+    years = pd.to_numeric(raw['Released_Year'], errors='coerce')
+    assert (frame['Released_Year'][years.isna()] == years.median()).all()
+    assert (frame['Gross'][[5, 6, 7, 8, 190]] == 0).all()
+    meta_scores = pd.to_numeric(raw['Meta_score'], errors='coerce')
+    np.testing.assert_allclose(frame['Meta_score'][[9, 10, 11]], meta_scores.mean())
+
+
+def test_every_step_is_timed(dirty_catalog):
+    report = dashboard.load_and_preprocess_data(dirty_catalog, chunksize=64).attrs['quality_report']
+    names = [name for name, _, _ in dashboard.CHUNK_STEPS + dashboard.FILE_STEPS]
+    assert set(names + ['read_csv', 'spill_text', 'compact']) == set(report['steps'])
+    for name, totals in report['steps'].items():
+        assert totals['seconds'] >= 0, name
+    # Chunk steps write at most one chunk of rows per call
+    chunk_bytes = report['steps']['parse_gross']['peak_bytes']
+    assert 0 < chunk_bytes <= 64 * 8
+
+
+def test_report_is_rendered_and_cached_with_the_dataset(dirty_catalog):
+    report = dashboard.load_and_preprocess_data(dirty_catalog).attrs['quality_report']
+    assert json.loads(json.dumps(report)) == report
+    text = dashboard.format_quality_report(report)
+    lines = text.splitlines()
+    assert lines[0] == '200 movies'
+    for issue, description in dashboard.QUALITY_ISSUES.items():
+        assert f"{EXPECTED_ISSUES[issue]:>10,}  {description}" in text
+    assert sum(line.startswith('  parse_') for line in lines) == 4
+    # A version read back from the dataset cache keeps its report
+    dataset = dashboard.Dataset.load(dirty_catalog)
+    assert dashboard.Dataset.load(dirty_catalog).frame.attrs['quality_report'] == \
+        dataset.frame.attrs['quality_report']
+    assert dataset.frame.attrs['quality_report']['issues'] == EXPECTED_ISSUES
+
+
+def test_data_quality_endpoint_reports_the_current_version(synthetic):
+    response = dashboard.app.server.test_client().get('/data-quality')
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report['version'] == synthetic.version
+    assert report['rows'] == len(synthetic.frame)
+    assert set(report['issues']) == set(dashboard.QUALITY_ISSUES)
@@ -0,0 +1,124 @@
+"""
+Hot reload of the dataset: warming a new version next to the live one, version
+routing of filter states and retiring old versions.
+"""
+
+import os
+import subprocess
+import sys
+from collections import OrderedDict
+
+import pytest
+
+import benchmark_dashboard
+import conftest
+import movie_dashboard as dashboard
+
+
+@pytest.fixture
+def versions():
+    """Restore the dataset versions and caches of the other tests afterwards."""
+    datasets, current = OrderedDict(dashboard._datasets), dashboard.current_dataset()
+    yield
+    dashboard._datasets.clear()
+    dashboard._datasets.update(datasets)
+    dashboard._current_dataset = current
+    dashboard.clear_caches()
+
+
+def write_catalog(path, n_rows, seed):
+    """Replace a catalog file with a new version."""
+    if os.path.exists(path):
+        os.remove(path)
+    benchmark_dashboard.generate_catalog(path, n_rows, seed=seed)
+    return path
+
+
+def default_keys(dataset):
+    fs = dashboard.default_filter_state(dataset)
+    return [('metrics', fs['key'])] + [(graph_id, fs['key']) for graph_id in dashboard.FIGURE_BUILDERS]
+
+
+def test_new_version_is_warmed_next_to_the_live_one(versions, tmp_path, monkeypatch):
+    live = dashboard.current_dataset()
+    dashboard.warm_result_cache(live)
+    live_state = dashboard.make_filter_state([1990, 1999], 'Drama', 8.0, dataset=live)
+    live_metrics = dashboard.cached_metrics(live_state)
+    seen_during_warm_up = []
+    warm_result_cache = dashboard.warm_result_cache
+
+    def warm_up(dataset=None, pool=None):
+        # Requests arriving meanwhile are still answered from the live version's cache
+        seen_during_warm_up.append((dashboard.current_dataset() is live,
+                                    all(key in dashboard.result_cache for key in default_keys(live)),
+                                    ('metrics', live_state['key']) in dashboard.result_cache))
+        warm_result_cache(dataset, pool)
+
+    monkeypatch.setattr(dashboard, 'warm_result_cache', warm_up)
+    new = dashboard.reload_dataset(write_catalog(str(tmp_path / 'reload.csv'), 400, seed=1))
+    assert seen_during_warm_up == [(True, True, True)]
+    assert dashboard.current_dataset() is new and new.version != live.version
+    assert all(key in dashboard.result_cache for key in default_keys(new))
+    # The replaced version stays resolvable, with its cached results
+    assert dashboard.dataset_for(live_state) is live
+    assert ('metrics', live_state['key']) in dashboard.result_cache
+    assert dashboard.cached_metrics(live_state) == live_metrics
+
+
+def test_unchanged_file_is_not_reloaded(versions, tmp_path):
+    path = write_catalog(str(tmp_path / 'reload.csv'), 300, seed=1)
+    assert dashboard.reload_dataset(path) is not None
+    assert dashboard.reload_dataset(path) is None
+
+
+def test_versions_no_longer_kept_are_retired(versions, tmp_path):
+    path = str(tmp_path / 'reload.csv')
+    first = dashboard.reload_dataset(write_catalog(path, 300, seed=1))
+    first_state = dashboard.make_filter_state([1990, 1999], [], 5, dataset=first)
+    dashboard.cached_metrics(first_state)
+    dashboard.filtered_rows(first_state)
+    second = dashboard.reload_dataset(write_catalog(path, 350, seed=2))
+    assert dashboard.dataset_for(first_state) is first
+    third = dashboard.reload_dataset(write_catalog(path, 320, seed=3))
+    assert list(dashboard._datasets) == [second.version, third.version]
+    # A retired state falls back to the current version, and nothing of the old one is cached
+    assert dashboard.dataset_for(first_state) is third
+    assert ('metrics', first_state['key']) not in dashboard.result_cache
+    assert not any(key in dashboard.result_cache for key in default_keys(first))
+    assert first.version not in dashboard.result_cache.stats()['versions']
+    assert not [key for key in dashboard._filtered_index_cache if key[0] == first.version]
+    assert all(key in dashboard.result_cache for key in default_keys(second) + default_keys(third))
+
+
+def test_clicked_film_is_resolved_in_the_version_of_the_figure(versions, tmp_path, monkeypatch):
+    live = dashboard.current_dataset()
+    live_state = dashboard.make_filter_state([1920, 2020], [], 5, dataset=live)
+    new = dashboard.reload_dataset(write_catalog(str(tmp_path / 'reload.csv'), 300, seed=1))
+    # Titles are 'Movie <n>' in every synthetic version, the directors differ
+    row = next(row for row in range(300)
+               if live.frame['Director'].iloc[row] != new.frame['Director'].iloc[row])
+    monkeypatch.setattr(dashboard, '_triggered_id', lambda: 'bar-top-30-films')
+    card = str(dashboard.show_movie_detail(None, {'points': [{'customdata': [row]}]}, live_state))
+    assert live.frame['Director'].iloc[row] in card
+    assert new.frame['Director'].iloc[row] not in card
+
+
+def test_importing_the_module_starts_no_thread(tmp_path):
+    env = {name: value for name, value in os.environ.items() if name != 'DASHBOARD_RELOAD_INTERVAL'}
+    env['DASHBOARD_CACHE_DIR'] = str(tmp_path / 'cache')
+    script = ("import threading, movie_dashboard as m; "
+              "print(m.RELOAD_INTERVAL, sorted(t.name for t in threading.enumerate()))")
+    output = subprocess.run([sys.executable, '-c', script], cwd=conftest.REPO_DIR, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    assert output.strip() == "30.0 ['MainThread']"
+
+
+def test_first_request_starts_the_watcher(monkeypatch):
+    started = []
+    monkeypatch.setattr(dashboard, 'RELOAD_INTERVAL', 30)
+    monkeypatch.setattr(dashboard, 'dataset_watcher', None)
+    monkeypatch.setattr(dashboard, 'start_dataset_watcher', lambda: started.append(1) or 'watcher')
+    client = dashboard.app.server.test_client()
+    client.get('/cache-stats')
+    client.get('/cache-stats')
+    assert started == [1] and dashboard.dataset_watcher == 'watcher'
@@ -0,0 +1,85 @@
+"""
+The byte-bounded LRU result cache: eviction order, the byte budget and pinned entries.
+"""
+
+import movie_dashboard as dashboard
+
+
+def payload(size, fill='x'):
+    return fill * size
+
+
+def test_least_recently_used_entries_are_evicted_first():
+    cache = dashboard.ResultCache(max_bytes=30)
+    for key in 'abc':
+        cache.put(key, payload(10, key))
+    # Reading a makes b the least recently used entry
+    assert cache.get('a') == payload(10, 'a')
+    cache.put('d', payload(10, 'd'))
+    assert 'b' not in cache
+    assert all(key in cache for key in 'acd')
+    assert cache.stats()['evictions'] == 1
+
+
+def test_budget_is_in_bytes_not_entries():
+    cache = dashboard.ResultCache(max_bytes=100)
+    for i in range(10):
+        cache.put(i, payload(10))
+    assert cache.stats()['entries'] == 10
+    cache.put('big', payload(55))
+    stats = cache.stats()
+    assert stats['bytes'] <= 100
+    assert stats['entries'] == 5 and 'big' in cache
+    # Replacing an entry accounts for its new size only
+    cache.put('big', payload(20))
+    assert cache.stats()['bytes'] == 60
+
+
+def test_entries_larger_than_the_budget_are_not_cached():
+    cache = dashboard.ResultCache(max_bytes=50)
+    cache.put('a', payload(10))
+    cache.put('huge', payload(51))
+    assert 'huge' not in cache and 'a' in cache
+
+
+def test_pinned_entries_are_never_evicted():
+    cache = dashboard.ResultCache(max_bytes=30)
+    cache.put('default', payload(20), pinned=True)
+    for i in range(10):
+        cache.put(i, payload(10))
+    assert 'default' in cache
+    assert cache.stats()['bytes'] <= 30
+    # A pinned entry can exceed the budget; the unpinned ones then make way for it
+    cache.put('reset', payload(40), pinned=True)
+    assert 'default' in cache and 'reset' in cache
+    assert cache.stats()['entries'] == 2
+
+
+def test_get_or_compute_counts_hits_and_misses():
+    cache = dashboard.ResultCache(max_bytes=1000)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return 'result'
+
+    assert cache.get_or_compute('key', compute) == 'result'
+    assert cache.get_or_compute('key', compute) == 'result'
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+
+
+def test_retired_versions_are_dropped_pinned_entries_included():
+    cache = dashboard.ResultCache(max_bytes=1000)
+    cache.put('old default', payload(10), pinned=True, version='v1')
+    cache.put('old', payload(10), version='v1')
+    cache.put('new default', payload(10), pinned=True, version='v2')
+    cache.put('untagged', payload(10))
+    assert cache.stats()['versions'] == ['v1', 'v2']
+    cache.retain_versions({'v1', 'v2'})
+    assert cache.stats()['entries'] == 4
+    cache.retain_versions({'v2'})
+    assert sorted(cache._entries) == ['new default', 'untagged']
+    stats = cache.stats()
+    assert stats['versions'] == ['v2'] and stats['pinned_entries'] == 1 and stats['bytes'] == 20
@@ -0,0 +1,162 @@
+"""
+The shared result store: cross-process locks of the disk store, lock timeouts,
+pruning, and single-flight computation, also when the computing caller fails.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+import movie_dashboard as dashboard
+
+needs_fcntl = pytest.mark.skipif(dashboard.fcntl is None, reason='needs fcntl locks')
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A disk store in a temporary directory, used by shared_compute."""
+    store = dashboard.DiskResultStore(str(tmp_path / 'results'), max_bytes=10 ** 6)
+    monkeypatch.setattr(dashboard, 'result_store', store)
+    return store
+
+
+def hold_lock(store, key, log_path, seconds):
+    """Worker process: hold a key's lock for a while, logging when it was held."""
+    with store.lock(key):
+        started = time.monotonic()
+        time.sleep(seconds)
+        with open(log_path, 'a') as log:
+            log.write(f"{started} {time.monotonic()}\n")
+
+
+def compute_shared(key, log_path, results):
+    """Worker process: shared_compute a value, logging every computation."""
+    def compute():
+        with open(log_path, 'a') as log:
+            log.write('computed\n')
+        time.sleep(0.3)
+        return 'value'
+
+    results.put(dashboard.shared_compute(key, compute))
+
+
+def run_processes(target, args_list):
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=target, args=args) for args in args_list]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+
+
+@needs_fcntl
+def test_keys_of_one_shard_exclude_each_other_across_processes(store, tmp_path):
+    first, second = 'abc' + '1' * 61, 'abc' + '2' * 61
+    assert store._lock_path(first) == store._lock_path(second)
+    log_path = str(tmp_path / 'held.log')
+    run_processes(hold_lock, [(store, first, log_path, 0.3), (store, second, log_path, 0.3)])
+    with open(log_path) as log:
+        (start_a, end_a), (start_b, end_b) = sorted(tuple(map(float, line.split())) for line in log)
+    assert end_a <= start_b
+
+
+@needs_fcntl
+def test_competing_processes_compute_a_result_once(store, tmp_path):
+    log_path = str(tmp_path / 'computed.log')
+    results = multiprocessing.get_context('fork').Queue()
+    run_processes(compute_shared, [(('figure', 'key'), log_path, results)] * 2)
+    assert [results.get(timeout=5), results.get(timeout=5)] == ['value', 'value']
+    with open(log_path) as log:
+        assert log.read() == 'computed\n'
+
+
+@needs_fcntl
+def test_waiting_for_a_lock_gives_up_after_the_timeout(store, monkeypatch):
+    monkeypatch.setattr(dashboard, 'RESULT_STORE_LOCK_SECONDS', 0.2)
+    key = 'f' * 64
+    with store.lock(key):
+        # A second open file description does not get the lock held by the first
+        started = time.monotonic()
+        with store.lock(key):
+            waited = time.monotonic() - started
+    assert 0.2 <= waited < 2
+
+
+@needs_fcntl
+def test_waiting_for_a_lock_ends_when_the_result_appears(store, monkeypatch):
+    monkeypatch.setattr(dashboard, 'RESULT_STORE_LOCK_SECONDS', 10)
+    key = 'e' * 64
+    with store.lock(key):
+        threading.Timer(0.1, store.put, (key, b'result')).start()
+        started = time.monotonic()
+        with store.lock(key):
+            waited = time.monotonic() - started
+            assert store.get(key) == b'result'
+    assert waited < 5
+
+
+def test_prune_and_clear_keep_the_lock_files(store):
+    store.max_bytes = 250
+    for i in range(5):
+        key = f"{i:064x}"
+        with store.lock(key):
+            store.put(key, bytes(100))
+        # Distinct modification times, oldest first
+        time.sleep(0.01)
+    store.get(f"{0:064x}")
+    store.prune()
+    kept = [i for i in range(5) if store.get(f"{i:064x}") is not None]
+    # The most recently read and written results are kept
+    assert kept == [0, 4]
+    locks = sorted(os.listdir(store.lock_directory))
+    store.clear()
+    assert all(store.get(f"{i:064x}") is None for i in range(5))
+    assert sorted(os.listdir(store.lock_directory)) == locks != []
+
+
+def test_waiters_get_the_exception_of_a_failing_leader():
+    flight = dashboard.SingleFlight()
+    leader_started, release = threading.Event(), threading.Event()
+    outcomes = []
+
+    def fail():
+        leader_started.set()
+        release.wait(5)
+        raise RuntimeError('database is gone')
+
+    def call(compute):
+        try:
+            outcomes.append(flight.do('key', compute))
+        except RuntimeError as exc:
+            outcomes.append(str(exc))
+
+    leader = threading.Thread(target=call, args=(fail,))
+    leader.start()
+    leader_started.wait(5)
+    waiters = [threading.Thread(target=call, args=(lambda: pytest.fail('computed twice'),)) for _ in range(3)]
+    for waiter in waiters:
+        waiter.start()
+    while flight.coalesced < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in [leader] + waiters:
+        thread.join(5)
+    assert outcomes == ['database is gone'] * 4
+    # The failure is not remembered: the next caller computes again
+    assert flight.do('key', lambda: 'value') == 'value'
+    assert not flight._calls
+
+
+def test_failed_shared_computation_publishes_nothing(store):
+    def fail():
+        raise RuntimeError('broken chart')
+
+    with pytest.raises(RuntimeError, match='broken chart'):
+        dashboard.shared_compute(('figure', 'failing'), fail)
+    assert dashboard.fetch_shared(('figure', 'failing')) is None
+    assert dashboard.shared_compute(('figure', 'failing'), lambda: 'value') == 'value'
+    assert dashboard.fetch_shared(('figure', 'failing')) == 'value'
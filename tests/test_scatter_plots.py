@@ -0,0 +1,66 @@
+"""
+Scatter plots on large selections: WebGL traces, server-side density bins and zooming.
+"""
+
+import numpy as np
+import pytest
+
+import movie_dashboard as dashboard
+import pandas_reference as reference
+
+
+@pytest.fixture
+def everything(synthetic):
+    return dashboard.make_filter_state(list(synthetic.year_bounds), [], 5, dataset=synthetic)
+
+
+def test_small_selections_are_svg_points(synthetic, everything):
+    figure = dashboard.build_scatter_votes(everything)
+    trace, = figure['data']
+    assert trace['type'] == 'scatter' and trace['orientation'] == 'v'
+    assert len(trace['x']) == len(synthetic.frame)
+
+
+def test_large_selections_use_webgl(monkeypatch, synthetic, everything):
+    monkeypatch.setattr(dashboard, 'SCATTERGL_THRESHOLD', 100)
+    trace, = dashboard.build_scatter_votes(everything)['data']
+    assert trace['type'] == 'scattergl' and 'orientation' not in trace
+    assert len(trace['x']) == len(synthetic.frame)
+
+
+def test_huge_selections_are_binned_on_the_server(monkeypatch, synthetic, everything):
+    monkeypatch.setattr(dashboard, 'DENSITY_THRESHOLD', 100)
+    trace, = dashboard.build_scatter_votes(everything)['data']
+    assert trace['type'] == 'heatmap'
+    assert trace['z'].shape == (dashboard.DENSITY_BINS, dashboard.DENSITY_BINS)
+    assert np.nansum(trace['z']) == len(synthetic.frame)
+    # The revenue plot bins the movies with a gross, on a log axis
+    figure = dashboard.build_rating_revenue(everything)
+    assert np.nansum(figure['data'][0]['z']) == np.count_nonzero(synthetic.frame['Gross'] > 0)
+    assert figure['layout']['yaxis']['type'] == 'log'
+
+
+def test_zoomed_window_is_rendered_as_points(monkeypatch, synthetic, everything):
+    monkeypatch.setattr(dashboard, 'DENSITY_THRESHOLD', 100)
+    votes = synthetic.frame['No_of_Votes'].to_numpy()
+    ratings = reference.ratings(synthetic.frame).to_numpy()
+    view = {'x': (float(np.quantile(votes, 0.5)), float(votes.max())), 'y': (8.8, 10.0)}
+    figure = dashboard.build_scatter_votes(everything, view=view)
+    trace, = figure['data']
+    in_view = (votes >= view['x'][0]) & (ratings >= 8.8)
+    assert 0 < np.count_nonzero(in_view) <= 100
+    assert trace['type'] == 'scatter' and len(trace['x']) == np.count_nonzero(in_view)
+    assert figure['layout']['xaxis']['range'] == list(view['x'])
+    assert figure['layout']['yaxis']['range'] == list(view['y'])
+
+
+@pytest.mark.parametrize('relayout, log_y, expected', [
+    (None, False, None),
+    ({'autosize': True}, False, None),
+    ({'xaxis.autorange': True, 'yaxis.autorange': True}, False, {}),
+    ({'xaxis.range[0]': 10, 'xaxis.range[1]': 2}, False, {'x': (2, 10)}),
+    ({'xaxis.range': [1, 2], 'yaxis.range': [3, 4]}, False, {'x': (1, 2), 'y': (3, 4)}),
+    ({'yaxis.range[0]': 6, 'yaxis.range[1]': 8}, True, {'y': (10 ** 6, 10 ** 8)}),
+])
+def test_parse_zoom(relayout, log_y, expected):
+    assert dashboard.parse_zoom(relayout, log_y=log_y) == expected
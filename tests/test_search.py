@@ -0,0 +1,55 @@
+"""
+The search index against plain scans of the table and the text side store.
+"""
+
+import warnings
+
+import numpy as np
+import pytest
+
+import movie_dashboard as dashboard
+import pandas_reference as reference
+
+SEARCHES = ['synthetic', 'number 42', 'title:movie 7', 'director:"Director 7"', 'star:"Actor 42"',
+            'nosuchword', 'STAR:"actor  42"']
+
+
+def filter_state(dataset, args, search=''):
+    return dashboard.make_filter_state(*args, dataset=dataset, search=search)
+
+
+@pytest.mark.parametrize('query', SEARCHES)
+def test_search_index_matches_scan(synthetic, query):
+    clauses = dashboard.parse_search(query)
+    expected = np.flatnonzero(reference.search_mask(synthetic.frame, synthetic.text_store, clauses))
+    np.testing.assert_array_equal(synthetic.search_index.query(clauses), expected)
+
+
+@pytest.mark.parametrize('query', SEARCHES)
+@pytest.mark.parametrize('args', [([1990, 1999], [], 5, 'any'), ([1920, 2020], 'Drama', 8.0, 'any')])
+def test_search_with_filters_matches_scan(synthetic, query, args):
+    fs = filter_state(synthetic, args, search=query)
+    expected = np.flatnonzero(reference.search_mask(synthetic.frame, synthetic.text_store, fs['search'])
+                              & reference.filter_mask(synthetic.frame, fs))
+    np.testing.assert_array_equal(dashboard.filtered_rows(fs), expected)
+
+
+def test_search_index_survives_save_and_load(synthetic, tmp_path):
+    synthetic.search_index.save(str(tmp_path / 'index'))
+    loaded = dashboard.SearchIndex.load(str(tmp_path / 'index'))
+    for query in SEARCHES:
+        clauses = dashboard.parse_search(query)
+        np.testing.assert_array_equal(loaded.query(clauses), synthetic.search_index.query(clauses))
+
+
+def test_postings_accept_lists_of_values():
+    builder = dashboard._PostingsBuilder(lambda value: value.lower().split())
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        builder.add(0, ['Night Train', None, 'night owl', 'Night Train'])
+        builder.add(4, np.array(['Owl'], dtype=object))
+    terms = {term_id: term for term, term_id in builder.term_ids.items()}
+    pairs = sorted((int(row), terms[term_id]) for term_ids, rows in zip(builder._terms, builder._rows)
+                   for term_id, row in zip(term_ids, rows))
+    assert pairs == [(0, 'night'), (0, 'train'), (2, 'night'), (2, 'owl'),
+                     (3, 'night'), (3, 'train'), (4, 'owl')]
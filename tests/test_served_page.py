@@ -0,0 +1,77 @@
+"""
+The page served to new visitors: built once per dataset version, also under
+concurrent first requests, and answered from its serialized form by Dash's
+layout route.
+"""
+
+import threading
+import time
+
+import plotly.io as pio
+import pytest
+
+import movie_dashboard as dashboard
+
+
+@pytest.fixture
+def build_count(monkeypatch):
+    """Forget the cached page and count the pages built from now on."""
+    builds = []
+    build_layout = dashboard.build_layout
+
+    def counted(dataset):
+        builds.append(dataset.version)
+        # Slow enough for concurrent requests to arrive while the page is built
+        time.sleep(0.05)
+        return build_layout(dataset)
+
+    monkeypatch.setattr(dashboard, 'build_layout', counted)
+    monkeypatch.setattr(dashboard, '_served_layout', (None, None, None))
+    return builds
+
+
+def test_layout_route_serves_the_cached_page(synthetic, build_count):
+    client = dashboard.app.server.test_client()
+    responses = [client.get('/_dash-layout') for _ in range(3)]
+    assert build_count == [synthetic.version]
+    assert all(response.status_code == 200 and response.mimetype == 'application/json'
+               for response in responses)
+    page = dashboard._served_layout
+    assert responses[0].data.decode() == page[2] == pio.json.to_json_plotly(page[1])
+    # The default view of the current version is embedded in the page
+    assert page[1]['filter-state'].data['key'] == dashboard.default_filter_state(synthetic)['key']
+
+
+def test_concurrent_first_requests_build_the_page_once(synthetic, build_count):
+    start = threading.Barrier(8)
+    pages = []
+
+    def visit():
+        start.wait()
+        pages.append(dashboard.app.server.test_client().get('/_dash-layout').data)
+
+    threads = [threading.Thread(target=visit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert build_count == [synthetic.version]
+    assert len(pages) == 8 and len(set(pages)) == 1
+
+
+def test_only_the_configured_layout_path_is_answered(build_count):
+    client = dashboard.app.server.test_client()
+    # Dash's catch-all route answers with the index page, not the layout
+    response = client.get('/export/_dash-layout')
+    assert response.mimetype == 'text/html'
+    assert build_count == []
+
+
+def test_pathname_prefix_is_honoured(synthetic, build_count):
+    app = dashboard.DashboardApp(__name__, routes_pathname_prefix='/movies/', requests_pathname_prefix='/movies/')
+    app.layout = dashboard.serve_layout
+    client = app.server.test_client()
+    assert client.get('/_dash-layout').status_code == 404
+    response = client.get('/movies/_dash-layout')
+    assert response.status_code == 200
+    assert response.data.decode() == dashboard._served_layout[2]
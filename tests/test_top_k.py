@@ -0,0 +1,84 @@
+"""
+The top-K votes index and per-director statistics against sorting and groupby.
+"""
+
+import numpy as np
+import pytest
+
+import movie_dashboard as dashboard
+import pandas_reference as reference
+
+
+@pytest.fixture(scope='module')
+def tied_frame(synthetic):
+    """The synthetic catalog with votes rounded to thousands, so many movies tie."""
+    frame = synthetic.frame.copy()
+    frame['No_of_Votes'] = (frame['No_of_Votes'] // 1000 * 1000).astype(frame['No_of_Votes'].dtype)
+    frame.attrs = dict(synthetic.frame.attrs)
+    return frame
+
+
+@pytest.mark.parametrize('args', reference.FILTERS)
+@pytest.mark.parametrize('k', [1, 30])
+def test_top_votes_match_stable_sort(synthetic, tied_frame, args, k):
+    fs = dashboard.make_filter_state(*args, dataset=synthetic)
+    for frame in (synthetic.frame, tied_frame):
+        index = dashboard.TopVotesIndex(frame)
+        np.testing.assert_array_equal(index.top(fs, k), reference.top_voted(frame, fs, k))
+
+
+def test_both_walks_are_used(synthetic):
+    """Wide year ranges walk the global ordering, narrow ones merge per-year lists."""
+    index = dashboard.TopVotesIndex(synthetic.frame)
+    walks = []
+    original = index._walk
+
+    def walk(order, *args, **kwargs):
+        walks.append(order is index.order)
+        return original(order, *args, **kwargs)
+
+    index._walk = walk
+    index.top(dashboard.make_filter_state([1920, 2020], [], 5, dataset=synthetic), 30)
+    assert walks == [True]
+    walks.clear()
+    index.top(dashboard.make_filter_state([1990, 1992], [], 5, dataset=synthetic), 30)
+    assert walks == [False, False, False]
+
+
+def director_groupby(frame, filter_state):
+    movies = reference.filtered(frame, filter_state)
+    return reference.ratings(movies).groupby(movies['Director'].astype(object)).agg(['size', 'sum'])
+
+
+@pytest.mark.parametrize('args', reference.FILTERS)
+def test_director_stats_match_groupby(synthetic, args):
+    stats = synthetic.source.director_stats
+    fs = dashboard.make_filter_state(*args, dataset=synthetic)
+    totals = stats.totals(fs)
+    assert (totals is None) == (bool(fs['genres']) or args[2] == 8.45)
+    if totals is None:
+        totals = stats.totals_for_rows(np.flatnonzero(reference.filter_mask(synthetic.frame, fs)))
+    counts, sums = totals
+    has_movies = counts > 0
+    expected = director_groupby(synthetic.frame, fs)
+    assert sorted(stats.names[has_movies]) == sorted(expected.index)
+    expected = expected.reindex(stats.names[has_movies])
+    np.testing.assert_array_equal(counts[has_movies], expected['size'].to_numpy())
+    np.testing.assert_allclose(sums[has_movies], expected['sum'].to_numpy(), rtol=1e-12)
+
+
+def test_director_averages_match_groupby(synthetic):
+    fs = dashboard.make_filter_state([1980, 2010], [], 7.6, dataset=synthetic)
+    averages = dashboard.director_averages(fs).set_index('Director')
+    expected = director_groupby(synthetic.frame, fs)
+    np.testing.assert_array_equal(averages['Movie_Count'], expected.reindex(averages.index)['size'])
+    np.testing.assert_allclose(averages['Avg_Rating'],
+                               (expected['sum'] / expected['size']).reindex(averages.index), rtol=1e-12)
+
+
+def test_top_30_chart_lists_the_most_voted_films(synthetic):
+    fs = dashboard.make_filter_state([1990, 1999], 'Drama', 7.6, dataset=synthetic)
+    figure = dashboard.build_top_30_films(fs)
+    expected = synthetic.frame['Series_Title'].to_numpy()[reference.top_voted(synthetic.frame, fs, 30)]
+    # Horizontal bars are listed bottom-up
+    assert sorted(figure['data'][0]['y']) == sorted(expected)
@@ -0,0 +1,114 @@
+"""
+What the dashboard shows (metric cards, top genres, the approximate view and
+its refinement) against the original dashboard's pandas code.
+"""
+
+import random
+
+import pytest
+
+import movie_dashboard as dashboard
+import pandas_reference as reference
+
+
+def random_filters(dataset, n, seed):
+    """n filter control values (year range, one genre or all, threshold) spread over a catalog."""
+    rng = random.Random(seed)
+    year_min, year_max = dataset.year_bounds
+    genres = [[]] + dataset.all_genres
+    filters = []
+    for _ in range(n):
+        first = rng.randint(year_min, year_max)
+        filters.append(([first, rng.randint(first, year_max)], rng.choice(genres),
+                        rng.choice([5, 7.6, 7.8, 7.9, 8.0, 8.1, 8.2, 8.5])))
+    return filters
+
+
+# Film-Noir at 8.0 averages exactly 8.075 (shown as 8.08), and the full
+# catalog at 8.3 has tied genre counts
+SHIPPED_FILTERS = ([([1920, 2020], 'Film-Noir', 8.0), ([1920, 2020], [], 8.3)]
+                   + [([1920, 2020], genre, rating) for genre in ([], 'Drama', 'Action', 'Western')
+                      for rating in (5, 7.6, 8.0, 8.5)])
+
+
+@pytest.fixture(scope='module')
+def shipped_filters(shipped):
+    return SHIPPED_FILTERS + random_filters(shipped, 150, seed=1)
+
+
+def test_metric_cards_match_original_dashboard(shipped, shipped_filters):
+    for args in shipped_filters:
+        fs = dashboard.make_filter_state(*args, dataset=shipped)
+        expected = reference.metric_cards(shipped.frame, fs)
+        if expected[0] == 0:
+            continue
+        assert dashboard.compute_metrics(fs) == expected, args
+
+
+def test_metric_cards_match_pandas_on_synthetic_catalog(synthetic):
+    for args in random_filters(synthetic, 100, seed=2):
+        fs = dashboard.make_filter_state(*args, dataset=synthetic)
+        expected = reference.metric_cards(synthetic.frame, fs)
+        if expected[0] == 0:
+            continue
+        assert dashboard.compute_metrics(fs) == expected, args
+
+
+def test_top_genres_match_original_dashboard(shipped, shipped_filters):
+    for args in shipped_filters:
+        fs = dashboard.make_filter_state(*args, dataset=shipped)
+        expected = reference.top_genres(shipped.frame, fs)
+        if not expected:
+            continue
+        figure = dashboard.FIGURE_BUILDERS['bar-top-genres'](fs)
+        assert list(figure['data'][0]['y']) == expected, args
+
+
+@pytest.mark.parametrize('rating_sum, count, shown', [(16.15, 2, '8.08'), (16.149999999999999, 2, '8.08'),
+                                                     (24.225000000000001, 3, '8.08'), (8.074999, 1, '8.07'),
+                                                     (8.125, 1, '8.13'), (0.0, 0, 'nan')])
+def test_average_rating_rounds_ties_up_on_every_path(rating_sum, count, shown):
+    """Sums that differ in their last bits give the same average and card."""
+    assert dashboard.format_average_rating(dashboard.average_rating(rating_sum, count)) == shown
+
+
+@pytest.fixture
+def approximate_state(synthetic):
+    """A filter state shown from the sample (nothing cached), after update_dashboard."""
+    dashboard.clear_caches()
+    result = dashboard.update_dashboard([1990, 2010], 'Drama', 7.9, 0, 'any', '')
+    return result[0], result[1:5]
+
+
+def test_update_dashboard_estimates_large_catalogs(synthetic, approximate_state):
+    fs, cards = approximate_state
+    assert synthetic.sample is not None
+    assert fs['approximate'] is True
+    assert all('±' in card for card in cards[:3])
+    # The key is that of the exact state, so the exact results are found under it
+    assert fs['key'] == dashboard.make_filter_state([1990, 2010], 'Drama', 7.9, dataset=synthetic)['key']
+
+
+def test_refine_view_matches_exact_metrics(synthetic, approximate_state):
+    fs, _ = approximate_state
+    refined = dashboard.refine_view(fs)
+    assert refined['key'] == fs['key']
+    assert refined['metrics'] == list(reference.metric_cards(synthetic.frame, fs))
+    # A state that is already exact has nothing to refine
+    with pytest.raises(dashboard.PreventUpdate):
+        dashboard.refine_view({key: value for key, value in fs.items() if key != 'approximate'})
+    assert not dashboard.approximate_view(fs)
+
+
+def test_approximate_charts_estimate_exact_ones(synthetic):
+    fs = dashboard.make_filter_state([1920, 2020], [], 5, dataset=synthetic)
+    ratings, weights = synthetic.sample.rating_values(fs)
+    # The weights of a sample of the whole catalog add up to the number of movies
+    assert weights.sum() == pytest.approx(len(synthetic.frame))
+    yearly = synthetic.sample.yearly(fs).set_index('Year')
+    exact = dashboard.yearly_average(fs).set_index('Year')
+    # Each year's estimate is rounded to a whole number of movies
+    assert abs(yearly['Movie_Count'].sum() - exact['Movie_Count'].sum()) <= len(yearly) / 2
+    histogram = dashboard.approximate_figure('histogram-ratings', fs)
+    assert histogram['data'][0]['histfunc'] == 'sum'
+    assert histogram['layout']['title']['text'].endswith('(Estimated from a Sample)')